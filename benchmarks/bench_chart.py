@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#可视化基准测试：各策略目录的visualize_performance生成的HTML大小与耗时
+#本文件：逐个运行各Demo，show改为写入临时HTML文件，记录visualize_performance(含生成HTML)的耗时与文件大小；
+#       给出--base时，同时运行该git版本中的Demo作为对比(如改用factorlib.chart之前的版本)
+#运行方式：python benchmarks/bench_chart.py [--base <git版本>]
+
+#加载库
+import argparse
+import contextlib
+import glob
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import pandas as pd
+import bokeh.plotting
+from bokeh.io import save
+from bokeh.resources import CDN
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+# 部分Demo同时用matplotlib画图，不弹出窗口
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+#运行部分开始的标记，RSRS没有'#运行部分'
+RUN_MARKERS = ('#运行部分', '#导入数据')
+
+
+def read_source(path, rev=None):
+    """
+    :param path str Demo相对仓库根目录的路径
+    :param rev str git版本，None为工作区中的文件
+
+    :return source str 源码
+    """
+    if rev is None:
+        with open(os.path.join(ROOT, path), encoding='utf-8') as f:
+            return f.read()
+    return subprocess.run(['git', 'show', '%s:%s' % (rev, path)], cwd=ROOT, check=True,
+                          stdout=subprocess.PIPE).stdout.decode('utf-8')
+
+
+def render_demo(path, rev=None):
+    """
+    运行一个Demo，统计其中各visualize*函数的耗时与生成的HTML大小;
+
+    :param path str Demo相对仓库根目录的路径
+    :param rev str git版本
+
+    :return seconds float visualize*函数的总耗时，秒
+    :return size int 生成的HTML总字节数
+    """
+    source = read_source(path, rev)
+    split = min(source.index(marker) for marker in RUN_MARKERS if marker in source)
+    out_dir = tempfile.mkdtemp(prefix='factorlib_bench_chart_')
+    files = []
+
+    def fake_show(layout):
+        filename = os.path.join(out_dir, '%d.html' % len(files))
+        save(layout, filename=filename, resources=CDN, title=os.path.basename(path))
+        files.append(filename)
+
+    namespace = {'__name__': '__main__', '__file__': os.path.join(ROOT, path)}
+    timing = [0.0]
+
+    def timed(func):
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timing[0] += time.perf_counter() - t0
+        return wrapper
+
+    show, bokeh.plotting.show = bokeh.plotting.show, fake_show
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            exec(compile(source[:split], path, 'exec'), namespace)
+            for name in list(namespace):
+                if name.startswith('visualize'):
+                    namespace[name] = timed(namespace[name])
+            exec(compile(source[split:], path, 'exec'), namespace)
+    finally:
+        bokeh.plotting.show = show
+    size = sum(os.path.getsize(f) for f in files)
+    for f in files:
+        os.remove(f)
+    os.rmdir(out_dir)
+    return timing[0], size
+
+
+#运行部分
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base', default=None, help='对比的git版本')
+    args = parser.parse_args()
+
+    demos = sorted(os.path.relpath(path, ROOT) for path in glob.glob(os.path.join(ROOT, '*', '*Demo.py')))
+    rows = []
+    for path in demos:
+        if 'visualize' not in read_source(path):
+            continue
+        seconds, size = render_demo(path)
+        row = [os.path.dirname(path), size / 1024, seconds]
+        if args.base:
+            base_seconds, base_size = render_demo(path, args.base)
+            row = [row[0], base_size / 1024, size / 1024, base_seconds, seconds]
+        rows.append(row)
+
+    if args.base:
+        columns = ['目录', '原HTML(KB)', 'HTML(KB)', '原耗时(s)', '耗时(s)']
+    else:
+        columns = ['目录', 'HTML(KB)', '耗时(s)']
+    result = pd.DataFrame(rows, columns=columns)
+    pd.set_option('display.width', 200)
+    print(result.to_string(index=False, float_format=lambda x: '%.3f' % x))
+    if args.base:
+        print('合计 HTML {:.0f}KB -> {:.0f}KB, 耗时 {:.2f}s -> {:.2f}s'.format(
+            result['原HTML(KB)'].sum(), result['HTML(KB)'].sum(), result['原耗时(s)'].sum(), result['耗时(s)'].sum()))
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+#图表降采样基准测试：factorlib.chart.plot_backtest 全部点 vs LTTB降采样(max_points)
+#本文件：在000001日线与由其生成的分钟线(每日240根，MACD参数按分钟数放大)上运行MACD策略，对比生成HTML的大小与耗时，
+#       并校验降采样后数据源不超过max_points行，全部持仓变化点与最大回撤的前高、最低点仍在图中
+#运行方式：python benchmarks/bench_downsample.py
+
+#加载库
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from bokeh.io import save
+from bokeh.models import ColumnDataSource
+from bokeh.resources import CDN
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.chart import plot_backtest, to_datetime
+from factorlib.farm import load_strategy
+from factorlib.store import load_market_data
+
+INDICATORS = [('DIF', 'yellow'), ('DEM', 'blue')]
+
+
+def make_minute_data(daily, bars_per_day=240, seed=0):
+    """
+    由日线生成分钟线：每日的分钟收益为随机游走，且各分钟收益之和等于当日涨跌幅;
+
+    :param daily DataFrame 日线行情，需要包含日期['date']、涨跌幅['pct_chg']
+    :param bars_per_day int 每日分钟数
+    :param seed int 随机数种子
+
+    :return minute DataFrame 分钟线，含['date']['close']['pct_chg']
+    """
+    rng = np.random.RandomState(seed)
+    n_day = len(daily)
+    noise = rng.standard_normal((n_day, bars_per_day)) * 0.05
+    noise -= noise.mean(axis=1, keepdims=True)
+    pct_chg = (daily['pct_chg'].to_numpy()[:, None] / bars_per_day + noise).ravel()
+    minutes = np.arange(bars_per_day) * np.timedelta64(1, 'm') + np.timedelta64(570, 'm')
+    dates = (to_datetime(daily['date'])[:, None] + minutes[None, :]).ravel()
+    close = daily['close'].iloc[0] * np.cumprod(1 + pct_chg / 100)
+    return pd.DataFrame({'date': dates, 'close': close, 'pct_chg': pct_chg})
+
+
+def render(mkt_data, max_points):
+    """
+    :param mkt_data DataFrame 回测结果
+    :param max_points int 数据源最多保留的行数，None为全部
+
+    :return seconds float 作图并生成HTML的耗时
+    :return size int HTML字节数
+    :return dates ndarray 图中数据源保留的日期
+    """
+    with tempfile.NamedTemporaryFile(suffix='.html', delete=False) as f:
+        filename = f.name
+    try:
+        t0 = time.perf_counter()
+        p = plot_backtest(mkt_data, INDICATORS, max_points=max_points)
+        save(p, filename=filename, resources=CDN, title='bench_downsample')
+        seconds = time.perf_counter() - t0
+        size = os.path.getsize(filename)
+    finally:
+        os.remove(filename)
+    source = list(p.select({'type': ColumnDataSource}))[0]
+    return seconds, size, np.asarray(source.data['trade_datetime'])
+
+
+def must_keep(mkt_data):
+    """
+    :return dates ndarray 持仓变化前后两行、最大回撤前高与最低点的日期
+    """
+    position = mkt_data['position'].to_numpy(dtype=np.float64)
+    change = np.flatnonzero(position[1:] != position[:-1]) + 1
+    drawdown = mkt_data['drawdown'].to_numpy()
+    trough = int(np.nanargmax(drawdown))
+    peak = int(np.flatnonzero(drawdown[:trough + 1] == 0)[-1])
+    rows = np.unique(np.concatenate([change - 1, change, [peak, trough]]))
+    return to_datetime(mkt_data['date'])[rows]
+
+
+#运行部分
+if __name__ == '__main__':
+    warnings.simplefilter('ignore')
+    macd = load_strategy('MACD')
+    daily = load_market_data('000001')
+    # 分钟线上的参数放大240倍，与日线策略的持仓周期相当
+    datasets = [('日线', daily, 1440, {}),
+                ('分钟线', make_minute_data(daily), 1, {'n1': 12 * 240, 'n2': 26 * 240, 'm': 9 * 240})]
+
+    rows = []
+    for label, df, data_period, params in datasets:
+        data = macd.calc_position(macd.calc_signal(macd.calc_MACD(df.copy(), **params)))
+        data, _ = macd.statistic_performance(data, data_period=data_period)
+        keep = must_keep(data)
+        for max_points in (None, 5000, 1000):
+            if max_points is not None and max_points >= len(data):
+                continue
+            seconds, size, dates = render(data, max_points)
+            assert np.isin(keep, dates).all(), (label, max_points)
+            assert max_points is None or len(dates) <= max_points, (label, max_points, len(dates))
+            rows.append((label, len(data), max_points or len(data), len(dates), len(keep), size / 1024, seconds))
+
+    result = pd.DataFrame(rows, columns=['数据', '行数', 'max_points', '保留行数', '必保留行数', 'HTML(KB)', '耗时(s)'])
+    pd.set_option('display.width', 200)
+    print(result.to_string(index=False, float_format=lambda x: '%.3f' % x))
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+#批量回测基准测试：factorlib.farm.run_farm 进程池 + 共享行情
+#本文件：以3个标的的行情复制出n个标的，运行全部23个策略 × n个标的，对比单进程逐个运行与进程池的吞吐量(任务/秒)，
+#并校验两者的指标一致
+#运行方式：python benchmarks/bench_farm.py [标的数，缺省20]
+
+#加载库
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.farm import STRATEGIES, METRIC_COLS, NEEDS_BENCHMARK, load_strategy, run_strategy, run_farm
+from factorlib.store import load_market_data
+
+
+def run_serial(frames, jobs, benchmark='000001'):
+    """
+    单进程逐个运行，作为基准;
+
+    :param frames dict 标的 -> DataFrame
+    :param jobs list (策略名, 标的, 参数dict)
+    :param benchmark str QR策略使用的大盘指数标的
+
+    :return metrics ndarray (任务数 × 指标数)
+    """
+    modules = {}
+    metrics = np.full((len(jobs), len(METRIC_COLS)), np.nan)
+    for i, (name, symbol, params) in enumerate(jobs):
+        if name not in modules:
+            modules[name] = load_strategy(name)
+        benchmark_data = frames[benchmark].copy() if name in NEEDS_BENCHMARK else None
+        metrics[i] = run_strategy(modules[name], STRATEGIES[name][1], frames[symbol].copy(), params, benchmark_data)
+    return metrics
+
+
+#运行部分
+if __name__ == '__main__':
+    n_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    base = {code: load_market_data(code)
+            for code in ('000001', '000016', '000300')}
+    codes = list(base)
+    frames = dict(base)
+    for k in range(n_symbols - len(base)):
+        frames['S%04d' % k] = base[codes[k % len(codes)]]
+    jobs = [(name, symbol, None) for symbol in frames for name in STRATEGIES]
+
+    t0 = time.perf_counter()
+    ref = run_serial(frames, jobs)
+    t_serial = time.perf_counter() - t0
+    print('单进程: {}个任务 {:.2f}s, {:.1f}任务/秒'.format(len(jobs), t_serial, len(jobs) / t_serial))
+
+    for chunksize in (1, None):
+        result_df, stats = run_farm(frames, jobs, chunksize=chunksize)
+        assert (result_df['error'] == '').all(), result_df.loc[result_df['error'] != '', 'error'].iloc[0]
+        np.testing.assert_array_equal(result_df[METRIC_COLS].to_numpy(), ref)
+        # 只有一个CPU时run_farm缺省不建进程池，在本进程内依次运行
+        print('run_farm(chunksize={}, {}进程): {}个任务 {:.2f}s, {:.1f}任务/秒'.format(
+            chunksize or '自动', stats['processes'], stats['jobs'], stats['seconds'], stats['jobs_per_sec']))
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+#策略表现统计基准测试：原 statistic_performance 中的逐日结算循环 vs factorlib.performance
+#本文件：对比单条持仓序列与多条序列(日期 × 标的)矩阵的耗时，并校验多仓/空仓次数、胜率、持有期一致
+#运行方式：python benchmarks/bench_performance.py
+
+#加载库
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.performance import calc_hold_stats, calc_performance
+from factorlib.store import load_market_data
+
+
+def loop_hold_stats(hold_r, position):
+    """
+    原策略中的逐日结算循环，作为基准;
+
+    :param hold_r Series 持仓收益
+    :param position Series 持仓
+
+    :return stats tuple 多仓次数、多仓盈利次数、多仓持有期、多仓盈利周期数，空仓同理
+    """
+    v_pos_hold_times = 0
+    v_pos_hold_win_times = 0
+    v_pos_hold_period = 0
+    v_pos_hold_win_period = 0
+    v_neg_hold_times = 0
+    v_neg_hold_win_times = 0
+    v_neg_hold_period = 0
+    v_neg_hold_win_period = 0
+    for r, pre_pos, pos in zip(hold_r, position.shift(1), position):
+        if pre_pos != pos:
+            if pre_pos == pre_pos:
+                if pre_pos > 0:
+                    v_pos_hold_times += 1
+                    v_pos_hold_period += tmp_hold_period
+                    v_pos_hold_win_period += tmp_hold_win_period
+                    if tmp_hold_r > 0:
+                        v_pos_hold_win_times += 1
+                elif pre_pos < 0:
+                    v_neg_hold_times += 1
+                    v_neg_hold_period += tmp_hold_period
+                    v_neg_hold_win_period += tmp_hold_win_period
+                    if tmp_hold_r > 0:
+                        v_neg_hold_win_times += 1
+            tmp_hold_r = r
+            tmp_hold_period = 0
+            tmp_hold_win_period = 0
+        else:
+            if abs(pos) > 0:
+                tmp_hold_period += 1
+                if r > 0:
+                    tmp_hold_win_period += 1
+                if abs(r) > 0:
+                    tmp_hold_r = (1 + tmp_hold_r) * (1 + r) - 1
+    return (v_pos_hold_times, v_pos_hold_win_times, v_pos_hold_period, v_pos_hold_win_period,
+            v_neg_hold_times, v_neg_hold_win_times, v_neg_hold_period, v_neg_hold_win_period)
+
+
+def timeit(func, repeat=3):
+    """
+    取多次运行的最短耗时;
+
+    :param func function 无参函数
+    :param repeat int 重复次数
+
+    :return best float 秒
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+#运行部分
+if __name__ == '__main__':
+    df = load_market_data('000001')
+    rng = np.random.RandomState(0)
+
+    """单标的：以均线多空构造多空持仓"""
+    ma_20 = df['close'].rolling(20, min_periods=1).mean()
+    ma_60 = df['close'].rolling(60, min_periods=1).mean()
+    position = pd.Series(np.where(ma_20 > ma_60, 1, -1), index=df.index).shift(1).fillna(0)
+    hold_r = df['pct_chg'] / 100 * position
+    assert loop_hold_stats(hold_r, position) == calc_hold_stats(hold_r, position)
+
+    t_loop = timeit(lambda: loop_hold_stats(hold_r, position))
+    t_vec = timeit(lambda: calc_hold_stats(hold_r, position))
+    print('单标的 {}日: 循环 {:.4f}s, 游程编码 {:.6f}s, 加速 {:.0f}倍'.format(len(df), t_loop, t_vec, t_loop / t_vec))
+
+    """多标的：随机持仓段构造1000条多/空/空仓序列"""
+    n_symbols = 1000
+    pct_chg = pd.DataFrame(rng.normal(0, 1.5, (len(df), n_symbols)))
+    positions = pd.DataFrame(rng.choice([-1, 0, 1], (len(df) // 5 + 1, n_symbols)).repeat(5, axis=0)[:len(df)])
+    hold_rs = pct_chg / 100 * positions
+    panel_stats = calc_hold_stats(hold_rs.values, positions.values)
+    for j in rng.choice(n_symbols, 20, replace=False):
+        assert loop_hold_stats(hold_rs[j], positions[j]) == tuple(s[j] for s in panel_stats)
+
+    t_stats = timeit(lambda: calc_hold_stats(hold_rs.values, positions.values))
+    t_panel = timeit(lambda: calc_performance(pct_chg, positions))
+    t_loop_one = timeit(lambda: loop_hold_stats(hold_rs[0], positions[0]))
+    print('多标的 {}日 × {}条: calc_hold_stats {:.4f}s, calc_performance(全部指标) {:.4f}s, 按单条循环估算 {:.1f}s'.format(
+        len(df), n_symbols, t_stats, t_panel, t_loop_one * n_symbols))
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+#正部滚动比值基准测试：原 Series.apply(quzheng) 写法 vs factorlib.rolling.calc_positive_ratio
+#本文件：在000001.csv上对比BR、AR、CR、VRSI(6/12/24)的耗时，并校验结果一致(相对误差<1e-9)
+#运行方式：python benchmarks/bench_positive_ratio.py
+
+#加载库
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.rolling import calc_positive_ratio
+from factorlib.volume import calc_VRSI_multi
+from factorlib.store import load_market_data
+
+
+def quzheng(x):
+    z = x if x > 0 else 0
+    return z
+
+
+def apply_indicators(df, m=26, N=26, N_list=(6, 12, 24), with_AR=True):
+    """
+    原Demo中的写法，作为基准;
+
+    :param df DataFrame 需要包含开盘价、最高价、最低价、收盘价、成交量
+    :param m int BRAR参数
+    :param N int CR参数
+    :param N_list tuple VRSI参数
+    :param with_AR bool 是否计算AR(原写法中AR不经过apply)
+
+    :return result dict 各指标的值
+    """
+    result = {}
+    if with_AR:
+        result['AR'] = 100 * (df['high'] - df['open']).rolling(m).sum() / (df['open'] - df['low']).rolling(m).sum()
+    result['BR'] = 100 * (df['high'] - df['close'].shift(1)).apply(quzheng).rolling(m).sum() / (df['close'].shift(1) - df['low']).apply(quzheng).rolling(m).sum()
+    mid = (df['high'] + df['low']) / 2
+    result['CR'] = 100 * (df['high'] - mid.shift(1)).apply(quzheng).rolling(N).sum() / (mid.shift(1) - df['low']).apply(quzheng).rolling(N).sum()
+    vol_chg = df['volume'] - df['volume'].shift(1)
+    for n in N_list:
+        result['VRSI%d' % n] = 100 * vol_chg.apply(quzheng).rolling(n).mean() / vol_chg.apply(abs).rolling(n).mean()
+    return result
+
+
+def kernel_indicators(df, m=26, N=26, N_list=(6, 12, 24), with_AR=True):
+    """
+    factorlib实现;
+
+    :param df DataFrame 同apply_indicators
+    :param m int BRAR参数
+    :param N int CR参数
+    :param N_list tuple VRSI参数
+    :param with_AR bool 是否计算AR
+
+    :return result dict 各指标的值
+    """
+    high = df['high'].values
+    low = df['low'].values
+    open_ = df['open'].values
+    pre_close = np.empty(len(df))
+    pre_close[0] = np.nan
+    pre_close[1:] = df['close'].values[:-1]
+    pre_mid = np.empty(len(df))
+    pre_mid[0] = np.nan
+    pre_mid[1:] = (high[:-1] + low[:-1]) / 2
+    result = {}
+    if with_AR:
+        result['AR'] = 100 * calc_positive_ratio(high - open_, open_ - low, m, clip=False)
+    result['BR'] = 100 * calc_positive_ratio(high - pre_close, pre_close - low, m)
+    result['CR'] = 100 * calc_positive_ratio(high - pre_mid, pre_mid - low, N)
+    VRSI = calc_VRSI_multi(df['volume'].values, N_list)
+    for n in N_list:
+        result['VRSI%d' % n] = VRSI[n]
+    return result
+
+
+def timeit(func, repeat=5, number=20):
+    """
+    每轮连续运行number次取平均，返回多轮中的最短耗时;
+
+    :param func function 无参函数
+    :param repeat int 轮数
+    :param number int 每轮运行次数
+
+    :return best float 单次耗时，秒
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
+
+
+#运行部分
+if __name__ == '__main__':
+    df = load_market_data('000001')
+
+    ref = apply_indicators(df)
+    new = kernel_indicators(df)
+    for key in ref:
+        np.testing.assert_allclose(new[key], ref[key].values, rtol=1e-9)
+
+    t_apply = timeit(lambda: apply_indicators(df, with_AR=False))
+    t_kernel = timeit(lambda: kernel_indicators(df, with_AR=False))
+    print('BR/CR/VRSI {}日: apply {:.4f}s, 向量化 {:.6f}s, 加速 {:.0f}倍'.format(
+        len(df), t_apply, t_kernel, t_apply / t_kernel))
+    t_apply = timeit(lambda: apply_indicators(df))
+    t_kernel = timeit(lambda: kernel_indicators(df))
+    print('含AR {}日: 原写法 {:.4f}s, 向量化 {:.6f}s, 加速 {:.0f}倍'.format(
+        len(df), t_apply, t_kernel, t_apply / t_kernel))
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#行情回放基准测试：把data/*.csv的日线或由其生成的分钟线逐根推给factorlib.replay.Pipeline(全部增量指标与交叉信号规则)
+#本文件：先在000001日线上校验回放得到的交叉信号、持仓与批量的make_signal、calc_signal_position一致，
+#       再对各标的回放，统计每秒K线数、每次更新耗时的p50/p99，--alloc时另跑一遍统计净增内存块数与峰值内存
+#运行方式：python benchmarks/bench_replay.py [--symbols 000001,000300] [--minute 240] [--days 60]
+#                                             [--indicators MACD,DMI] [--rate 5000] [--alloc]
+
+#加载库
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.replay import INDICATORS, make_pipeline, make_minute_bars, run_replay
+from factorlib.signals import cross_above, cross_below, make_signal, calc_signal_position
+from factorlib.store import DATA_ROOT, load_market_data
+
+
+def check_signals(mkt_data):
+    """
+    逐根回放全部指标，校验各交叉信号规则的信号与持仓与批量计算一致;
+
+    :param mkt_data DataFrame 日线行情
+
+    :return n_rule int 校验的规则数
+    """
+    pipeline = make_pipeline()
+    bars = zip(*[mkt_data[field].to_numpy(dtype=np.float64).tolist() for field in pipeline.FIELDS])
+    values, signals = [], []
+    for bar in bars:
+        v, s = pipeline.update(bar)
+        values.append(v)
+        signals.append(s)
+    values = pd.DataFrame(values, columns=list(pipeline.OUTPUTS), dtype=np.float64)
+    signals = np.array(signals, dtype=np.float64)
+    for k, (name, _, (A, B)) in enumerate(pipeline.rules):
+        signal = make_signal(cross_above(values[A], values[B]), cross_below(values[A], values[B]))
+        assert np.array_equal(signals[:, k, 0], signal), name
+        assert np.array_equal(signals[:, k, 1], calc_signal_position(signal)), name
+    return len(pipeline.rules)
+
+
+#运行部分
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', default=None, help='标的代码，逗号分隔，缺省为data目录下的全部CSV')
+    parser.add_argument('--minute', type=int, default=240, help='每日分钟数，0为直接回放日线')
+    parser.add_argument('--days', type=int, default=60, help='生成分钟线所用的最近交易日数')
+    parser.add_argument('--indicators', default=None, help='指标名，逗号分隔，缺省为全部：' + ','.join(INDICATORS))
+    parser.add_argument('--rate', type=float, default=0, help='每秒推送的K线数，0为尽快推送')
+    parser.add_argument('--alloc', action='store_true', help='另跑一遍用tracemalloc统计内存分配')
+    args = parser.parse_args()
+
+    print('交叉信号规则与批量计算一致：%d个' % check_signals(load_market_data('000001')))
+
+    if args.symbols:
+        symbols = args.symbols.split(',')
+    else:
+        symbols = sorted(os.path.splitext(os.path.basename(path))[0]
+                         for path in glob.glob(os.path.join(DATA_ROOT, '*.csv')))
+    names = args.indicators.split(',') if args.indicators else None
+
+    rows = []
+    for symbol in symbols:
+        bars = load_market_data(symbol)
+        if args.minute:
+            bars = make_minute_bars(bars.iloc[-args.days:], args.minute)
+        pipeline = make_pipeline(names)
+        report = run_replay(bars, pipeline, rate=args.rate)
+        row = [symbol, report['bars'], len(pipeline.indicators), report['bars_per_sec'], report['p50_us'],
+               report['p99_us'], report['signals'], report['lag_ms']]
+        if args.alloc:
+            traced = run_replay(bars, make_pipeline(names), trace_alloc=True)
+            row += [traced['alloc_blocks'], traced['alloc_kb'], traced['peak_kb']]
+        rows.append(row)
+
+    columns = ['标的', 'K线数', '指标数', '根/秒', 'p50(us)', 'p99(us)', '信号数', '最多落后(ms)']
+    if args.alloc:
+        columns += ['净增内存块', '净增(KB)', '峰值(KB)']
+    result = pd.DataFrame(rows, columns=columns)
+    pd.set_option('display.width', 200)
+    print(result.to_string(index=False, float_format=lambda x: '%.2f' % x))
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#RSRS增量版本基准测试：择时类-RSRS/main_Demo.py中各策略的批量计算 vs factorlib.rsrs.RSRSUpdater逐根K线更新
+#本文件：在000300上逐根K线喂给RSRSUpdater，统计每次update的耗时与每根K线批量重算的耗时；
+#       修正标准分、右偏标准分缺省(只用截至当前的历史)时给出与批量持仓相同的比例；
+#       与批量结果逐步一致的校验见tests/test_rsrs.py
+#运行方式：python benchmarks/bench_rsrs.py
+
+#加载库
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.regression import calc_rolling_ols
+from factorlib.rsrs import RSRSUpdater
+from factorlib.store import load_market_data
+
+
+def load_rsrs_demo():
+    """
+    导入RSRS Demo中的函数，只执行'#导入数据'之前的代码(该Demo没有__name__ == '__main__'保护);
+
+    :return namespace dict Demo中定义的函数
+    """
+    path = os.path.join(ROOT, '择时类-RSRS', 'main_Demo.py')
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    namespace = {'__name__': 'demo', '__file__': path}
+    exec(compile(source[:source.index('#导入数据')], path, 'exec'), namespace)
+    return namespace
+
+
+def run_stream(updater, mkt_data):
+    """
+    逐根K线更新，记录每次update的耗时;
+
+    :param updater RSRSUpdater 增量RSRS
+    :param mkt_data DataFrame 行情数据
+
+    :return result DataFrame 每根K线一行，列为updater.OUTPUTS
+    :return latency ndarray 每次update的耗时，秒
+    """
+    columns = [mkt_data[field].to_numpy(dtype=np.float64).tolist() for field in updater.FIELDS]
+    rows = []
+    latency = np.empty(len(mkt_data))
+    clock = time.perf_counter
+    for i, bar in enumerate(zip(*columns)):
+        t0 = clock()
+        values = updater.update(*bar)
+        latency[i] = clock() - t0
+        rows.append(values)
+    return pd.DataFrame(rows, columns=list(updater.OUTPUTS)), latency
+
+
+#运行部分
+if __name__ == '__main__':
+    warnings.simplefilter('ignore')
+    demo = load_rsrs_demo()
+    df = load_market_data('000300')
+
+    # 修正标准分的批量版本：全部样本(n=16)斜率的均值与标准差
+    full_beta = calc_rolling_ols(df['low'], df['high'], 16)['beta'][15:]
+    mu, sigma = np.mean(full_beta), np.std(full_beta)
+
+    #(规则, n, m, 批量策略, 传给RSRSUpdater的额外参数)
+    cases = [
+        ('beta', 18, 60, lambda d: demo['cal_nbeta'](d, 18), {}),
+        ('stdbeta', 18, 60, lambda d: demo['cal_stdbeta'](d, 18, 60), {}),
+        ('better_stdbeta', 16, 60, lambda d: demo['cal_better_stdbeta'](d, 16), {'mu': mu, 'sigma': sigma}),
+        ('right_stdbeta', 16, 60, lambda d: demo['cal_right_stdbeta'](d, 16, 60), {'mu': mu, 'sigma': sigma}),
+        ('ma_beta', 16, 60, lambda d: demo['cal_ma_beta'](d, 16, 60), {}),
+        ('vol_beta', 16, 60, lambda d: demo['cal_vol_beta'](d, 16, 60), {}),
+    ]
+
+    rows = []
+    for rule, n, m, batch, params in cases:
+        calc = batch(df.copy())
+        _, latency = run_stream(RSRSUpdater(n, m, rule, **params), df)
+
+        # 只用截至当前的斜率分布(不含未来数据)时，与批量持仓相同的比例
+        agree = 1.0
+        if 'mu' in params:
+            causal, _ = run_stream(RSRSUpdater(n, m, rule), df)
+            agree = np.mean(causal['position'].to_numpy()[n - 1:] == calc['position'].to_numpy())
+
+        # 每来一根新K线就用批量策略重算全部历史的耗时
+        t0 = time.perf_counter()
+        for _ in range(3):
+            batch(df.copy())
+        t_batch = (time.perf_counter() - t0) / 3
+        rows.append((rule, len(df), int(calc['flag'].abs().sum()), np.mean(latency) * 1e6,
+                     np.percentile(latency, 50) * 1e6, np.percentile(latency, 99) * 1e6, t_batch * 1e6,
+                     agree * 100))
+
+    result = pd.DataFrame(rows, columns=['规则', 'K线数', '开平仓次数', '平均(us)', 'p50(us)', 'p99(us)',
+                                         '批量重算(us)', '不含未来数据时持仓一致(%)'])
+    pd.set_option('display.width', 200)
+    print(result.to_string(index=False, float_format=lambda x: '%.2f' % x))
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#增量指标快照基准测试：factorlib.snapshot保存、恢复Pipeline状态 vs 重启后读取CSV从第0根K线重算
+#本文件：先在000001上校验：前一半K线后保存快照、写入文件、读回并恢复到新建的Pipeline，后一半K线的全部指标输出、
+#       信号与持仓与不中断运行的结果逐位相同(同一快照恢复两次互不影响)；
+#       再对几千个标的保存、读取、恢复，统计文件大小与耗时，并与每个标的读取CSV重算全部历史的耗时对比；
+#       状态按列存储，读取时整块引用各组的float、int矩阵，restore_many批量恢复全部标的时不逐个标的解析pickle
+#运行方式：python benchmarks/bench_snapshot.py [--symbols 2000]
+
+#加载库
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.replay import INDICATORS, make_pipeline
+from factorlib.snapshot import Snapshot
+from factorlib.store import load_market_data
+
+
+def run(pipeline, bars):
+    """
+    :return values ndarray 每根K线一行，各指标输出
+    :return signals ndarray 每根K线一行，各规则的(信号, 持仓)
+    """
+    values, signals = [], []
+    for bar in bars:
+        v, s = pipeline.update(bar)
+        values.append(v)
+        signals.append(s)
+    return np.array(values, dtype=np.float64), np.array(signals, dtype=np.float64)
+
+
+def check_restore(bars, path):
+    """
+    中途保存、恢复后继续运行，与不中断运行的结果逐位相同;
+
+    :param bars list 按make_pipeline().FIELDS排列的K线
+    :param path str 快照文件路径
+    """
+    half = len(bars) // 2
+    ref_values, ref_signals = run(make_pipeline(), bars)
+
+    pipeline = make_pipeline()
+    run(pipeline, bars[:half])
+    snapshot = Snapshot()
+    snapshot.put('000001', 'all', pipeline)
+    snapshot.save(path)
+    loaded = Snapshot.load(path)
+    for _ in range(2):
+        restored = loaded.restore('000001', 'all', make_pipeline)
+        values, signals = run(restored, bars[half:])
+        assert np.array_equal(values, ref_values[half:], equal_nan=True)
+        assert np.array_equal(signals, ref_signals[half:], equal_nan=True)
+
+
+def bench_symbols(n_symbol, names, path):
+    """
+    n_symbol个标的各一个Pipeline，保存、读取、恢复的耗时;
+
+    :param n_symbol int 标的个数
+    :param names list 指标名
+    :param path str 快照文件路径
+
+    :return row list 指标、标的数、文件大小与各项耗时
+    """
+    # 重启后不用快照：读取CSV并从第0根K线重算
+    t0 = time.perf_counter()
+    mkt_data = load_market_data('000001')
+    pipeline = make_pipeline(names)
+    bars = list(zip(*[mkt_data[field].to_numpy(dtype=np.float64).tolist() for field in pipeline.FIELDS]))
+    run(pipeline, bars)
+    t_warm = time.perf_counter() - t0
+
+    # 各标的的状态相同，只是键不同
+    symbols = ['%06d' % k for k in range(n_symbol)]
+    snapshot = Snapshot()
+    t0 = time.perf_counter()
+    for symbol in symbols:
+        snapshot.put(symbol, 'pipeline', pipeline, names)
+    size = snapshot.save(path)
+    t_save = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    loaded = Snapshot.load(path)
+    t_load = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    restored = loaded.restore_many(symbols, 'pipeline', lambda: make_pipeline(names), names)
+    t_restore = time.perf_counter() - t0
+    assert len(restored) == n_symbol
+
+    return [','.join(names) if len(names) < 6 else '全部%d个' % len(names), n_symbol, size / 1024,
+            t_save * 1e3, t_load * 1e3, t_restore / n_symbol * 1e3, t_restore * 1e3, t_warm * 1e3, t_warm * n_symbol]
+
+
+#运行部分
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=2000, help='标的个数')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'indicators.snap')
+    mkt_data = load_market_data('000001')
+    fields = make_pipeline().FIELDS
+    check_restore(list(zip(*[mkt_data[field].to_numpy(dtype=np.float64).tolist() for field in fields])), path)
+    print('中途保存、恢复后的指标输出、信号与持仓与不中断运行逐位相同')
+
+    rows = []
+    # 需要全部历史预热的递推类指标，以及全部增量指标
+    for names in (['MACD', 'TRIX', 'JLHB', 'GDX'], list(INDICATORS)):
+        rows.append(bench_symbols(args.symbols, names, path))
+    os.remove(path)
+
+    result = pd.DataFrame(rows, columns=['指标', '标的数', '快照(KB)', '保存(ms)', '读取(ms)', '恢复单个标的(ms)',
+                                         '恢复全部标的(ms)', '单个标的从CSV重算(ms)', '全部标的从CSV重算(s)'])
+    pd.set_option('display.width', 200)
+    print(result.to_string(index=False, float_format=lambda x: '%.2f' % x))
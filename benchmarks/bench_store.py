@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#行情读取基准测试：pd.read_csv(原各Demo写法) vs factorlib.store按SCHEMA解析并缓存的load_csv
+#本文件：对data/下的每个CSV分别计时 推断类型解析、推断类型解析+逐行strptime转换日期、冷读取(解析并写缓存)、热读取(映射缓存)，
+#       并校验结果一致、清单中的标的代码原样读回
+#运行方式：python benchmarks/bench_store.py
+
+#加载库
+import datetime
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.store import DATA_ROOT, MarketDataStore, parse_market_csv, read_market_csv
+
+
+def timeit(func, repeat=5, number=20):
+    """
+    每轮连续运行number次取平均，返回多轮中的最短耗时;
+
+    :param func function 无参函数
+    :param repeat int 轮数
+    :param number int 每轮运行次数
+
+    :return best float 单次耗时，秒
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
+
+
+def read_csv_strptime(path):
+    """
+    原写法：推断类型读入，再逐行strptime得到日期(visualize_performance中的做法);
+
+    :param path str CSV路径
+
+    :return df DataFrame
+    """
+    df = pd.read_csv(path)
+    df['date'] = df['date'].apply(lambda x: datetime.datetime.strptime(x, '%Y-%m-%d'))
+    return df
+
+
+def cold_load(path, root):
+    """
+    冷读取：每次用一个空的缓存目录，计入解析CSV与写缓存的开销;
+
+    :param path str CSV路径
+    :param root str 临时目录
+
+    :return df DataFrame
+    """
+    store_root = tempfile.mkdtemp(dir=root)
+    try:
+        return MarketDataStore(store_root).load_csv(path)
+    finally:
+        shutil.rmtree(store_root)
+
+
+#运行部分
+if __name__ == '__main__':
+    tmp_root = tempfile.mkdtemp(prefix='factorlib_bench_store_')
+    store = MarketDataStore(os.path.join(tmp_root, 'store'))
+    rows = []
+    try:
+        for path in sorted(glob.glob(os.path.join(DATA_ROOT, '*.csv'))):
+            ref = parse_market_csv(path)
+            pd.testing.assert_frame_equal(store.load_csv(path), ref)
+            pd.testing.assert_frame_equal(store.load_csv(path), ref)
+            assert (read_csv_strptime(path)['date'] == ref['date']).all()
+            # 清单记录的标的代码与文件名一致，原样读回
+            symbol = os.path.splitext(os.path.basename(path))[0]
+            assert store.import_csv(path)['symbol'] == symbol
+            assert store.manifest(symbol)['symbol'] == symbol
+            pd.testing.assert_frame_equal(store.load(symbol), read_market_csv(path))
+            # 内容相同、文件名不同的CSV各自缓存，交替读取不会互相改写清单
+            alias = os.path.join(tmp_root, 'copy_' + os.path.basename(path))
+            shutil.copyfile(path, alias)
+            n_parsed = len(os.listdir(os.path.join(store.root, 'parsed')))
+            pd.testing.assert_frame_equal(store.load_csv(alias), ref)
+            pd.testing.assert_frame_equal(store.load_csv(path), ref)
+            assert len(os.listdir(os.path.join(store.root, 'parsed'))) == n_parsed + 1
+
+            rows.append((os.path.basename(path), len(ref),
+                         timeit(lambda: pd.read_csv(path)),
+                         timeit(lambda: read_csv_strptime(path)),
+                         timeit(lambda: cold_load(path, tmp_root)),
+                         timeit(lambda: store.load_csv(path))))
+    finally:
+        shutil.rmtree(tmp_root)
+
+    result = pd.DataFrame(rows, columns=['文件', '行数', 'read_csv', 'read_csv+strptime', '冷读取', '热读取'])
+    result['热读取加速'] = result['read_csv+strptime'] / result['热读取']
+    pd.set_option('display.width', 200)
+    print(result.to_string(index=False, float_format=lambda x: '%.4f' % x))
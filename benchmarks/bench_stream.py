@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#增量指标基准测试：各Demo的calc_*批量重算 vs factorlib中的逐根K线Updater
+#本文件：在000001(QR为000016对000001)上逐根K线喂给各Updater，校验每一步的输出与批量结果一致，
+#       并统计每次update的耗时(微秒)，与每来一根K线就重算一次全部历史的耗时对比；
+#       另在一百万个量级相差悬殊的随机数上对比滚动和定期精确重算(resync)与不重算时相对math.fsum的累积误差
+#运行方式：python benchmarks/bench_stream.py
+
+#加载库
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.average import EXPMAUpdater, AMVUpdater
+from factorlib.energy import BRARUpdater, CRUpdater
+from factorlib.farm import load_strategy
+from factorlib.rolling import RollingSum
+from factorlib.store import load_market_data
+from factorlib.trend import MACDUpdater, TRIXUpdater, QRUpdater, UOSUpdater, JLHBUpdater, GDXUpdater, \
+    WVADUpdater, VPTUpdater, DMIUpdater, EMVUpdater
+
+
+def load_demo(path):
+    """
+    导入没有 __name__ == '__main__' 保护的Demo中的函数，只执行'#运行部分'之前的代码;
+
+    :param path str Demo相对仓库根目录的路径
+
+    :return namespace dict Demo中定义的函数
+    """
+    path = os.path.join(ROOT, path)
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    namespace = {'__name__': 'demo', '__file__': path}
+    exec(compile(source[:source.index('#运行部分')], path, 'exec'), namespace)
+    return namespace
+
+
+def run_stream(updater, mkt_data):
+    """
+    逐根K线更新，记录每次update的耗时;
+
+    :param updater object 增量指标，含FIELDS、OUTPUTS与update
+    :param mkt_data DataFrame 行情数据
+
+    :return result DataFrame 每根K线一行，列为updater.OUTPUTS
+    :return latency ndarray 每次update的耗时，秒
+    """
+    columns = [mkt_data[field].to_numpy(dtype=np.float64).tolist() for field in updater.FIELDS]
+    rows = []
+    latency = np.empty(len(mkt_data))
+    clock = time.perf_counter
+    for i, bar in enumerate(zip(*columns)):
+        t0 = clock()
+        values = updater.update(*bar)
+        latency[i] = clock() - t0
+        rows.append(values)
+    return pd.DataFrame(rows, columns=list(updater.OUTPUTS), dtype=np.float64), latency
+
+
+def calc_drift(n=1000000, N=20, resync=None, seed=0):
+    """
+    在量级相差悬殊(如成交量)的随机数上逐个更新RollingSum，返回最后窗口和相对math.fsum的误差;
+
+    :param n int 输入个数
+    :param N int 窗口长度
+    :param resync int 精确重算间隔，None为缺省，n为不重算
+
+    :return error float 相对误差
+    """
+    rng = np.random.RandomState(seed)
+    X = np.exp(rng.standard_normal(n) * 4).tolist()
+    rolling = RollingSum(N, resync)
+    for x in X:
+        total = rolling.update(x)
+    exact = math.fsum(X[-N:])
+    return abs(total - exact) / exact
+
+
+#运行部分
+if __name__ == '__main__':
+    df = load_market_data('000001')
+    df_gg = load_market_data('000016')
+
+    modules = {name: load_strategy(name) for name in ('MACD', 'VMACD', 'EXPMA', 'TRIX', 'QR', 'UOS', 'GDX', 'AMV',
+                                                      'BRAR', 'CR', 'WVAD', 'VPT', 'DMI', 'EMV')}
+    jlhb = load_demo('趋势类-JLHB/JLHB_Demo.py')
+
+    #(名称, Updater, 批量计算函数的输入, 批量计算函数, 逐位相同的输出)
+    cases = [
+        ('MACD', MACDUpdater(), df, modules['MACD'].calc_MACD, ('DIF', 'DEM', 'OSC')),
+        ('VMACD', MACDUpdater(field='volume'), df, modules['VMACD'].calc_MACD, ('DIF', 'DEM', 'OSC')),
+        ('EXPMA', EXPMAUpdater(), df, modules['EXPMA'].calc_EXPMA, ('EMA1', 'EMA2')),
+        ('TRIX', TRIXUpdater(), df, modules['TRIX'].calc_TRIX, ('TR', 'TRIX')),
+        ('QR', QRUpdater(), df_gg, lambda d: modules['QR'].calc_QR(d, df.copy()), ('gg', 'zs', 'QR')),
+        ('UOS', UOSUpdater(), df, modules['UOS'].calc_UOS, ()),
+        ('JLHB', JLHBUpdater(), df, jlhb['calc_JLHB'], ('B', 'VAR2', 'JLHB')),
+        ('GDX', GDXUpdater(), df, modules['GDX'].calc_GDX, ()),
+        ('AMV', AMVUpdater(), df, modules['AMV'].calc_AMV, ()),
+        ('BRAR', BRARUpdater(), df, modules['BRAR'].calc_BRAR, ()),
+        ('CR', CRUpdater(), df, modules['CR'].calc_CR, ()),
+        ('WVAD', WVADUpdater(), df, modules['WVAD'].calc_WVAD, ()),
+        ('VPT', VPTUpdater(), df, modules['VPT'].calc_VPT, ()),
+        ('DMI', DMIUpdater(), df, modules['DMI'].calc_DMI, ()),
+        ('EMV', EMVUpdater(), df, modules['EMV'].calc_EMV, ()),
+    ]
+
+    rows = []
+    for name, updater, data, batch, exact in cases:
+        # QR的批量结果含按日期对齐到个股的大盘收盘价['close_zs']，增量版本逐根读取
+        calc = batch(data.copy())
+        stream, latency = run_stream(updater, calc)
+        for key in updater.OUTPUTS:
+            ref = calc[key].to_numpy(dtype=np.float64)
+            if name == 'GDX':
+                # 批量版本的前n-1期用到了未来数据，增量版本为NaN
+                ref = ref.copy()
+                ref[:updater.ma.M - 1] = np.nan
+            if key in exact:
+                assert np.array_equal(stream[key].to_numpy(), ref, equal_nan=True), (name, key)
+            else:
+                np.testing.assert_allclose(stream[key].to_numpy(), ref, rtol=1e-10, atol=1e-12, err_msg=name + key)
+
+        # 每来一根新K线就用批量函数重算全部历史的耗时
+        t0 = time.perf_counter()
+        for _ in range(5):
+            batch(data.copy())
+        t_batch = (time.perf_counter() - t0) / 5
+        rows.append((name, len(data), np.mean(latency) * 1e6, np.percentile(latency, 50) * 1e6,
+                     np.percentile(latency, 99) * 1e6, t_batch * 1e6,
+                     '逐位相同' if len(exact) == len(updater.OUTPUTS) else '部分<1e-10'))
+
+    result = pd.DataFrame(rows, columns=['指标', 'K线数', '平均(us)', 'p50(us)', 'p99(us)', '批量重算(us)', '与批量一致'])
+    pd.set_option('display.width', 200)
+    print(result.to_string(index=False, float_format=lambda x: '%.2f' % x))
+
+    # 滚动和的累积误差：不重算时随输入个数增长，定期重算后保持在舍入误差量级
+    rows = [(label, calc_drift(resync=resync)) for label, resync in (('不重算', 10 ** 7), ('缺省resync', None))]
+    print(pd.DataFrame(rows, columns=['RollingSum', '相对误差']).to_string(index=False))
+    assert rows[1][1] < 1e-13 and rows[1][1] < rows[0][1]
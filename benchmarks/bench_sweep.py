@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#MACD参数网格寻优基准测试：factorlib.sweep.sweep_MACD 一次计算全部参数组合
+#本文件：在000001.csv上运行 n1∈[5,25)、n2∈[10,50)、m∈[5,20) 的20×40×15网格，输出耗时与排名前10的参数组合，
+#并抽取若干组合与MACD_Demo逐组运行的结果核对
+#运行方式：python benchmarks/bench_sweep.py
+
+#加载库
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.recursive import calc_EMA
+from factorlib.signals import cross_above, cross_below, make_signal, calc_signal_position
+from factorlib.performance import calc_performance
+from factorlib.sweep import sweep_MACD
+from factorlib.store import load_market_data
+
+
+def run_single(df, n1, n2, m, init=1):
+    """
+    单组参数按MACD_Demo的流程计算，作为核对基准;
+
+    :param df DataFrame 需要包含收盘价、涨跌幅
+    :param n1 int 短周期
+    :param n2 int 长周期
+    :param m int DEM周期
+    :param init float 首个信号生效前的持仓
+
+    :return performance_df DataFrame 一行表现指标
+    """
+    DIF = pd.Series(calc_EMA(df['close'], n1)) - pd.Series(calc_EMA(df['close'], n2))
+    OSC = DIF - calc_EMA(DIF, m)
+    signal = make_signal(cross_above(OSC, 0), cross_below(OSC, 0))
+    return calc_performance(df['pct_chg'], calc_signal_position(signal, init))
+
+
+#运行部分
+if __name__ == '__main__':
+    df = load_market_data('000001')
+    n1_list, n2_list, m_list = range(5, 25), range(10, 50), range(5, 20)
+
+    t0 = time.perf_counter()
+    sweep_df = sweep_MACD(df, n1_list, n2_list, m_list)
+    elapsed = time.perf_counter() - t0
+    print('{}×{}×{}网格，有效组合{}个，{}日: {:.2f}s'.format(
+        len(n1_list), len(n2_list), len(m_list), len(sweep_df), len(df), elapsed))
+    print(sweep_df.head(10))
+
+    rng = np.random.RandomState(0)
+    for i in rng.choice(len(sweep_df), 10, replace=False):
+        row = sweep_df.iloc[i]
+        ref = run_single(df, int(row['n1']), int(row['n2']), int(row['m'])).iloc[0]
+        np.testing.assert_array_equal(row[ref.index].values.astype(np.float64), ref.values.astype(np.float64))
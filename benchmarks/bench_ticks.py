@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#tick到K线流水线基准测试：factorlib.ticks.TickPipeline(asyncio、有界队列)把模拟逐笔成交聚合成K线并更新增量指标
+#本文件：先校验时间K线与按(标的, 周期)分组的pandas聚合结果一致、成交量K线的成交量守恒且达到阈值，
+#       再分别尽快推送(大、小tick队列)与按固定速率推送，统计每秒tick数、tick到信号的延迟p50/p99与队列满时的等待(反压)
+#运行方式：python benchmarks/bench_ticks.py [--symbols 100] [--ticks 200000] [--kind time] [--interval 60]
+#                                            [--rate 20000] [--tick-queue 1000] [--indicators MACD,DMI,RSRS]
+
+#加载库
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.replay import make_pipeline
+from factorlib.ticks import TickPipeline, make_ticks, iter_ticks, run_tick_pipeline
+
+FIELDS = ['open', 'high', 'low', 'close', 'volume', 'amount', 'ticks']
+
+
+def collect_bars(ticks, kind, interval):
+    """
+    运行流水线(不含指标)，收集全部K线;
+
+    :return bars DataFrame 每根K线一行，含['symbol']['time']与FIELDS
+    """
+    bars = []
+    pipeline = TickPipeline(lambda symbol: make_pipeline([]), kind, interval,
+                            on_bar=lambda symbol, bar, values, signals: bars.append(dict(bar, symbol=symbol)))
+    run_tick_pipeline(pipeline, iter_ticks(ticks))
+    return pd.DataFrame(bars)
+
+
+def check_bars(ticks, interval, threshold):
+    """
+    时间K线与pandas分组聚合一致；成交量K线各标的成交量之和不变，除最后一根外都达到阈值;
+    """
+    df = pd.DataFrame(ticks, columns=['symbol', 'time', 'price', 'volume'])
+    df['amount'] = df['price'] * df['volume']
+    df['start'] = df['time'] - df['time'] % interval
+    ref = df.groupby(['symbol', 'start']).agg(open=('price', 'first'), high=('price', 'max'), low=('price', 'min'),
+                                              close=('price', 'last'), volume=('volume', 'sum'),
+                                              amount=('amount', 'sum'), ticks=('price', 'size'))
+    bars = collect_bars(ticks, 'time', interval).set_index(['symbol', 'time']).sort_index()
+    assert len(bars) == len(ref)
+    assert np.array_equal(bars.index.get_level_values(1), ref.index.get_level_values(1))
+    np.testing.assert_allclose(bars[FIELDS].to_numpy(dtype=np.float64), ref[FIELDS].to_numpy(dtype=np.float64),
+                               rtol=1e-12)
+
+    bars = collect_bars(ticks, 'volume', threshold)
+    assert (bars.groupby('symbol')['volume'].sum() == df.groupby('symbol')['volume'].sum()).all()
+    last = bars.groupby('symbol').cumcount(ascending=False) == 0
+    assert (bars.loc[~last, 'volume'] >= threshold).all()
+
+
+#运行部分
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=100, help='模拟标的个数')
+    parser.add_argument('--ticks', type=int, default=200000, help='全部标的合计的tick数')
+    parser.add_argument('--kind', default='time', help="'time'为时间K线，'volume'为成交量K线")
+    parser.add_argument('--interval', type=float, default=60, help='时间K线的周期(秒)或成交量K线的阈值')
+    parser.add_argument('--rate', type=float, default=20000, help='限速推送时每秒的tick数')
+    parser.add_argument('--tick-queue', type=int, default=1000, help='tick队列的容量')
+    parser.add_argument('--bar-queue', type=int, default=100, help='K线队列的容量')
+    parser.add_argument('--indicators', default='MACD,DMI,RSRS', help='每根K线更新的指标，逗号分隔')
+    args = parser.parse_args()
+
+    symbols = ['%06d' % k for k in range(args.symbols)]
+    ticks = make_ticks(symbols, args.ticks)
+    check_bars(ticks[:20000], 60, 5000)
+    print('时间K线与pandas聚合一致，成交量K线成交量守恒')
+
+    names = args.indicators.split(',') if args.indicators else []
+    rows = []
+    # 小队列下上游更频繁地因队列满而等待，延迟随之下降
+    configs = [('尽快推送', None, args.tick_queue), ('尽快推送(tick队列64)', None, 64),
+               ('限速%d/s' % args.rate, args.rate, args.tick_queue)]
+    for label, rate, tick_maxsize in configs:
+        pipeline = TickPipeline(lambda symbol: make_pipeline(names), args.kind, args.interval,
+                                tick_maxsize=tick_maxsize, bar_maxsize=args.bar_queue)
+        report = run_tick_pipeline(pipeline, iter_ticks(ticks, rate))
+        rows.append([label] + list(report.values()))
+
+    columns = ['推送', 'tick数', 'K线数', '信号数', '耗时(s)', 'tick/秒', 'p50(ms)', 'p99(ms)', '最大(ms)',
+               'tick反压', 'K线反压', '反压等待(s)', 'tick队列最大', 'K线队列最大']
+    result = pd.DataFrame(rows, columns=columns)
+    pd.set_option('display.width', 250)
+    print(result.to_string(index=False, float_format=lambda x: '%.3f' % x))
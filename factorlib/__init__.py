@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+#factorlib：各策略目录共用的指标计算内核
+#各Demo脚本通过 sys.path 引入仓库根目录后按模块导入，例如 from factorlib.recursive import calc_EMA
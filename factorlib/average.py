@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+#均线型指标的逐根K线增量版本，供实盘每来一根新K线时更新，不必重算全部历史
+"""
+FIELDS为update依次需要的K线字段，OUTPUTS为update依次返回的指标名，约定同factorlib.trend。
+"""
+
+#加载库
+import numpy as np
+
+from factorlib.recursive import EMAFilter
+from factorlib.rolling import RollingSum
+
+
+class EXPMAUpdater(object):
+    """
+    逐根K线增量计算EXPMA的两条指数平均线，与calc_EXPMA逐位相同;
+    """
+
+    FIELDS = ('close',)
+    OUTPUTS = ('EMA1', 'EMA2')
+
+    def __init__(self, n1=12, n2=50):
+        """
+        :param n1 int 短期EMA参数
+        :param n2 int 长期EMA参数
+        """
+        self.ema1 = EMAFilter(n1)
+        self.ema2 = EMAFilter(n2)
+
+    def update(self, close):
+        """
+        :param close float 收盘价
+
+        :return EMA1 float
+        :return EMA2 float
+        """
+        return self.ema1.update(close), self.ema2.update(close)
+
+
+class AMVUpdater(object):
+    """
+    逐根K线增量计算成本价均线AMV1~AMV4：N日成交额(成交量 × 开收盘均价)之和除以N日成交量之和;
+    """
+
+    FIELDS = ('open', 'close', 'volume')
+    OUTPUTS = ('AMV1', 'AMV2', 'AMV3', 'AMV4')
+
+    def __init__(self, M1=5, M2=10, M3=20, M4=250):
+        """
+        :param M1 int AMV1周期
+        :param M2 int AMV2周期
+        :param M3 int AMV3周期
+        :param M4 int AMV4周期
+        """
+        self.sums = [(RollingSum(M), RollingSum(M)) for M in (M1, M2, M3, M4)]
+
+    def update(self, open_, close, volume):
+        """
+        :param open_ float 开盘价
+        :param close float 收盘价
+        :param volume float 成交量
+
+        :return AMV1 float 预热期内为NaN
+        :return AMV2 float
+        :return AMV3 float
+        :return AMV4 float
+        """
+        AMV0 = volume * (open_ + close) / 2
+        result = []
+        for amount, vol in self.sums:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result.append(float(np.float64(amount.update(AMV0)) / vol.update(volume)))
+        return tuple(result)
@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+#各Demo中calc_*指标的计算图声明，供IndicatorPlan统一去重计算
+"""
+每个declare_*与同名Demo中calc_*的公式、默认参数和输出列一一对应，返回 输出名 -> Node，
+与Demo中的计算结果逐位相同(tests/test_catalog.py逐个与Demo的calc_*对比，改动任一方而未同步另一方时测试失败)。常见的共用中间量：
+    MA(CLOSE, N)       MA、BBI、BBIBOLL、GDX(同一公式中出现两次)，DMA与CHO共用min_periods=1的版本，RSRS的ma20
+    MA(HIGH-LOW, N)    EMV、MASS
+    EMA(CLOSE, N)      EXPMA、MACD、TRIX
+    REF(CLOSE, 1)      BRAR、DMI、UOS、VPT等
+"""
+
+#加载库
+from factorlib.graph import (IndicatorPlan, col, ref, ma, msum, std, hhv, llv, fmax, ema, dma, positive_ratio,
+                             bfill, fillna)
+
+
+def declare_MA(N1=5, N2=90):
+    """
+    MA_Demo.calc_MA;
+
+    :return outputs dict ['MA1']['MA2']
+    """
+    return {'MA1': ma('close', N1), 'MA2': ma('close', N2)}
+
+
+def declare_HMA(N1=5, N2=90):
+    """
+    HMA_Demo.calc_HMA;
+
+    :return outputs dict ['HMA1']['HMA2']
+    """
+    return {'HMA1': ma('high', N1), 'HMA2': ma('high', N2)}
+
+
+def declare_LMA(N1=5, N2=90):
+    """
+    LMA_Demo.calc_LMA;
+
+    :return outputs dict ['LMA1']['LMA2']
+    """
+    return {'LMA1': ma('low', N1), 'LMA2': ma('low', N2)}
+
+
+def declare_VMA(M1=6, M2=12, M3=30, M4=72, M5=144):
+    """
+    VMA_Demo.calc_VMA;
+
+    :return outputs dict ['VMA1']...['VMA5']
+    """
+    VV = (col('high') + col('low') + col('open') + col('close')) / 4
+    return {'VMA%d' % (i + 1): ma(VV, M) for i, M in enumerate((M1, M2, M3, M4, M5))}
+
+
+def declare_AMV(M1=5, M2=10, M3=20, M4=250):
+    """
+    AMV_Demo.calc_AMV;
+
+    :return outputs dict ['AMV1']...['AMV4']
+    """
+    VOL = col('volume')
+    AMV0 = VOL * (col('open') + col('close')) / 2
+    return {'AMV%d' % (i + 1): msum(AMV0, M) / msum(VOL, M) for i, M in enumerate((M1, M2, M3, M4))}
+
+
+def declare_BBI():
+    """
+    BBI_Demo.calc_BBI;
+
+    :return outputs dict ['BBI']
+    """
+    return {'BBI': (ma('close', 3) + ma('close', 6) + ma('close', 12) + ma('close', 24)) / 4}
+
+
+def declare_BBIBOLL(N=11, M=6):
+    """
+    BBIBOLL_Demo.calc_BBIBOLL;
+
+    :return outputs dict ['BBIBOLL']['UPPER']['DOWN']
+    """
+    BBIBOLL = declare_BBI()['BBI']
+    return {'BBIBOLL': BBIBOLL,
+            'UPPER': BBIBOLL + M * std(BBIBOLL, N),
+            'DOWN': BBIBOLL - M * std(BBIBOLL, N)}
+
+
+def declare_EXPMA(n1=12, n2=50):
+    """
+    EXPMA_Demo.calc_EXPMA;
+
+    :return outputs dict ['EMA1']['EMA2']
+    """
+    return {'EMA1': ema('close', n1), 'EMA2': ema('close', n2)}
+
+
+def declare_MACD(n1=12, n2=26, m=9):
+    """
+    MACD_Demo.calc_MACD;
+
+    :return outputs dict ['DIF']['DEM']['OSC']
+    """
+    DIF = ema('close', n1) - ema('close', n2)
+    DEM = ema(DIF, m)
+    return {'DIF': DIF, 'DEM': DEM, 'OSC': DIF - DEM}
+
+
+def declare_VMACD(n1=12, n2=26, m=9):
+    """
+    VMACD_Demo.calc_MACD，即成交量的MACD;
+
+    :return outputs dict ['DIF']['DEM']['OSC']
+    """
+    DIF = ema('volume', n1) - ema('volume', n2)
+    DEM = ema(DIF, m)
+    return {'DIF': DIF, 'DEM': DEM, 'OSC': DIF - DEM}
+
+
+def declare_TRIX(n=12, m=9):
+    """
+    TRIX_Demo.calc_TRIX;
+
+    :return outputs dict ['TR']['TRIX']['TRMA']
+    """
+    TR = ema(ema(ema('close', n), n), n)
+    TRIX = (TR - ref(TR, 1)) / ref(TR, 1) * 100
+    return {'TR': TR, 'TRIX': TRIX, 'TRMA': ma(TRIX, m)}
+
+
+def declare_DMA(n1=10, n2=50, m=10):
+    """
+    DMA_Demo.calc_DMA;
+
+    :return outputs dict ['DIF']['DIFMA']
+    """
+    DIF = ma('close', n1, 1) - ma('close', n2, 1)
+    return {'DIF': DIF, 'DIFMA': ma(DIF, m, 1)}
+
+
+def declare_CHO(n1=10, n2=20, m1=6, m2=90):
+    """
+    CHO_Demo.calc_CHO;
+
+    :return outputs dict ['MA90']['CHO']['MACHO']
+    """
+    CHO = ma('close', n1, 1) - ma('close', n2, 1)
+    return {'MA90': ma('close', m2, 1), 'CHO': CHO, 'MACHO': ma(CHO, m1, 1)}
+
+
+def declare_GDX(n=30, m=9):
+    """
+    GDX_Demo.calc_GDX;
+
+    :return outputs dict ['JAX']['UPPER']['LOWER']
+    """
+    close = col('close')
+    AA = bfill(abs((2 * close + col('high') + col('low')) / 4 - ma(close, n)) / ma(close, n))
+    JAX = dma(close, AA)
+    return {'JAX': JAX, 'UPPER': (1 + m / 100) * JAX, 'LOWER': (1 - m / 100) * JAX}
+
+
+def declare_EMV(n=14, m=9):
+    """
+    EMV_Demo.calc_EMV;
+
+    :return outputs dict ['EMV']['MAEMV']
+    """
+    vol, high, low = col('volume'), col('high'), col('low')
+    VOLUME = ma(vol, n) / vol
+    MID = 100 * (high + low - ref(high, 1) - ref(low, 1)) / (high + low)
+    EMV = ma(MID * VOLUME * (high - low) / ma(high - low, n), n)
+    return {'EMV': EMV, 'MAEMV': ma(EMV, m)}
+
+
+def declare_MASS(N1=9, N2=25, M=6):
+    """
+    MASS_Demo.calc_MASS;
+
+    :return outputs dict ['MASS']['MAMASS']
+    """
+    HL = col('high') - col('low')
+    MASS = msum(ma(HL, N1, 1) / ma(ma(HL, N1, 1), N1, 1), N2, 1)
+    return {'MASS': MASS, 'MAMASS': ma(MASS, M, 1)}
+
+
+def declare_BRAR(m=26):
+    """
+    BRAR_Demo.calc_BRAR;
+
+    :return outputs dict ['AR']['BR']
+    """
+    high, low, open_ = col('high'), col('low'), col('open')
+    pre_close = ref('close', 1)
+    return {'AR': 100 * positive_ratio(high - open_, open_ - low, m, clip=False),
+            'BR': 100 * positive_ratio(high - pre_close, pre_close - low, m)}
+
+
+def declare_CR(N=26, M1=10, M2=20, M3=40, M4=62):
+    """
+    CR_Demo.calc_CR;
+
+    :return outputs dict ['mid']['CR']['MA1']...['MA4']
+    """
+    high, low = col('high'), col('low')
+    mid = (high + low) / 2
+    pre_mid = ref(mid, 1)
+    CR = 100 * positive_ratio(high - pre_mid, pre_mid - low, N)
+    outputs = {'mid': mid, 'CR': CR}
+    for i, M in enumerate((M1, M2, M3, M4)):
+        outputs['MA%d' % (i + 1)] = ma(CR, M)
+    return outputs
+
+
+def declare_DMI(n=14, m=6):
+    """
+    DMI_Demo.calc_DMI;
+
+    :return outputs dict ['PDI']['MDI']['ADX']['ADXR']
+    """
+    high, low = col('high'), col('low')
+    pre_close = ref('close', 1)
+    DMIp = hhv(high, 2) - ref(high, 1)
+    DMIn = ref(low, 1) - llv(low, 2)
+    # DMIp和DMIn中只能有一个>0，选大的
+    DMIp = DMIp * (DMIp >= DMIn)
+    DMIn = DMIn * (DMIp < DMIn)
+    TR = fmax(fmax(high - low, abs(high - pre_close)), abs(low - pre_close))
+    PDI = msum(DMIp, n) * 100 / msum(TR, n)
+    MDI = msum(DMIn, n) * 100 / msum(TR, n)
+    ADX = ma(abs(PDI - MDI) / (PDI + MDI) * 100, m)
+    return {'PDI': PDI, 'MDI': MDI, 'ADX': ADX, 'ADXR': (ADX + ref(ADX, m)) / 2}
+
+
+def declare_JS(n=5, m1=5, m2=10, m3=20):
+    """
+    JS_Demo.calc_JS;
+
+    :return outputs dict ['JS']['MAJS1']['MAJS2']['MAJS3']
+    """
+    CLOSE = col('close')
+    JS = 100 * (CLOSE - ref(CLOSE, n)) / (n * ref(CLOSE, n))
+    return {'JS': JS, 'MAJS1': ma(JS, m1), 'MAJS2': ma(JS, m2), 'MAJS3': ma(JS, m3)}
+
+
+def declare_QR(n=21):
+    """
+    QR_Demo.calc_QR，大盘指数收盘价为['close_zs']列(已按个股日期对齐);
+
+    :return outputs dict ['gg']['zs']['QR']
+    """
+    gg = (col('close') - ref('close', n)) / ref('close', n) * 100
+    zs = (col('close_zs') - ref('close_zs', n)) / ref('close_zs', n) * 100
+    return {'gg': gg, 'zs': zs, 'QR': ema(fillna(gg - zs, 0), 2)}
+
+
+def declare_UOS(n1=7, n2=14, n3=28, m=6):
+    """
+    UOS_Demo.calc_UOS(与原Demo一致，TL取MAX(LOW,REF(CLOSE,1)));
+
+    :return outputs dict ['UOS']['MAUOS']
+    """
+    CLOSE = col('close')
+    TH = fmax('high', ref(CLOSE, 1))
+    TL = fmax('low', ref(CLOSE, 1))
+    ACC1, ACC2, ACC3 = [msum(CLOSE - TL, n) / msum(TH - TL, n) for n in (n1, n2, n3)]
+    UOS = (ACC1 * n2 * n3 + ACC2 * n1 * n3 + ACC3 * n1 * n2) * 100 / (n1 * n2 + n1 * n3 + n2 * n3)
+    return {'UOS': UOS, 'MAUOS': ema(UOS, m)}
+
+
+def declare_VPT(n=51, m=6):
+    """
+    VPT_Demo.calc_VPT;
+
+    :return outputs dict ['VPT']['MAVPT']
+    """
+    VPT = msum(col('volume') * (col('close') - ref('close', 1)) / ref('close', 1), n)
+    return {'VPT': VPT, 'MAVPT': ma(VPT, m)}
+
+
+def declare_WVAD(n=24, m=6):
+    """
+    WVAD_Demo.calc_WVAD;
+
+    :return outputs dict ['WVAD']['MAWVAD']
+    """
+    WVAD = msum(col('volume') * (col('close') - col('open')) / (col('high') - col('low')), n)
+    return {'WVAD': WVAD, 'MAWVAD': ma(WVAD, m)}
+
+
+def declare_RSRS_MA(N=20):
+    """
+    RSRS main_Demo.cal_ma_beta中的均线过滤条件，输入与cal_ma_beta中的df1一致，即去掉前n-1行(n为OLS窗口)的行情;
+
+    :return outputs dict ['ma20']['ma20_1']['ma20_3']
+    """
+    ma20 = ma('close', N, 1)
+    return {'ma20': ma20, 'ma20_1': ref(ma20, 1), 'ma20_3': ref(ma20, 3)}
+
+
+INDICATORS = {
+    'MA': declare_MA,
+    'HMA': declare_HMA,
+    'LMA': declare_LMA,
+    'VMA': declare_VMA,
+    'AMV': declare_AMV,
+    'BBI': declare_BBI,
+    'BBIBOLL': declare_BBIBOLL,
+    'EXPMA': declare_EXPMA,
+    'MACD': declare_MACD,
+    'VMACD': declare_VMACD,
+    'TRIX': declare_TRIX,
+    'DMA': declare_DMA,
+    'CHO': declare_CHO,
+    'GDX': declare_GDX,
+    'EMV': declare_EMV,
+    'MASS': declare_MASS,
+    'BRAR': declare_BRAR,
+    'CR': declare_CR,
+    'DMI': declare_DMI,
+    'JS': declare_JS,
+    'QR': declare_QR,
+    'UOS': declare_UOS,
+    'VPT': declare_VPT,
+    'WVAD': declare_WVAD,
+    'RSRS_MA': declare_RSRS_MA,
+}
+
+
+def build_plan(names=None, params=None):
+    """
+    由指标名生成联合计算计划;
+
+    :param names list 指标名，缺省为INDICATORS中的全部指标
+    :param params dict 指标名 -> 参数dict，覆盖declare_*的默认参数
+
+    :return plan IndicatorPlan
+    """
+    names = sorted(INDICATORS) if names is None else names
+    params = params or {}
+    plan = IndicatorPlan()
+    for name in names:
+        plan.add(name, INDICATORS[name](**params.get(name, {})))
+    return plan
+
+
+def calc_indicator(mkt_data, name, **params):
+    """
+    单标的计算指标，输出列追加到行情数据上，与对应Demo中calc_*的结果一致，面板版本见factorlib.panel.calc_panel;
+
+    :param mkt_data DataFrame 股票历史行情数据，日维度
+    :param name str 指标名，INDICATORS中的键
+    :param params dict 指标参数，覆盖默认参数
+
+    :return mkt_data DataFrame 新增该指标的各输出列
+    """
+    outputs = build_plan([name], {name: params}).evaluate(mkt_data)[name]
+    for key, values in outputs.items():
+        mkt_data[key] = values.to_numpy()
+    return mkt_data
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+#图表层：各Demo的bokeh可视化，多个联动子图共用一个ColumnDataSource
+"""
+原写法每个Demo先逐行datetime.strptime得到日期，再给f1、indi、f2、f3、f4各自传入数组，
+同一列日期在生成的HTML中被序列化5次以上。这里：
+1. 日期整列一次pd.to_datetime(format='%Y-%m-%d')，已是datetime64时直接使用(load_market_frame读入的行情)；
+2. 全部子图的字形都以列名引用同一个ColumnDataSource，每列只序列化一次；
+3. 各列统一转为float64 ndarray(日期为datetime64)，bokeh按二进制(base64)编码，而不是逐个数字写成JSON列表。
+   bokeh的二进制编码不支持int64，position等整型列需要先转为float64。
+4. 可选降采样(max_points)：数据源至多保留max_points行，各字形共用：先留出必须保留的点
+   (持仓变化前后两行、最深几段回撤的前高与最低点)，剩下的点数分给各字形的序列各自用LTTB选点，取并集，
+   各列仍只序列化一次。
+   分钟级等很长的历史只需画出几千个点，HTML与浏览器内存随之下降。
+"""
+
+#加载库
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from bokeh.layouts import gridplot
+from bokeh.models import ColumnDataSource
+from bokeh.plotting import figure
+
+from factorlib.downsample import calc_LTTB, calc_trade_points, calc_drawdown_extremes
+
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def to_datetime(dates):
+    """
+    日期整列转为datetime64;
+
+    :param dates Series/ndarray 日期，'%Y-%m-%d'格式的字符串或datetime64，分钟级数据的'%Y-%m-%d %H:%M:%S'等格式由pandas推断
+
+    :return dt ndarray datetime64[ns]
+    """
+    dates = pd.Series(np.asarray(dates))
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        try:
+            dates = pd.to_datetime(dates.astype(str), format=DATE_FORMAT)
+        except ValueError:
+            dates = pd.to_datetime(dates.astype(str))
+    return dates.to_numpy()
+
+
+def make_source(dates, columns, index=None):
+    """
+    生成各子图共用的数据源;
+
+    :param dates Series/ndarray 日期
+    :param columns dict 列名 -> Series/ndarray，与dates等长
+    :param index ndarray 只保留的行号，None时保留全部行
+
+    :return source ColumnDataSource 日期列为['trade_datetime']，其余各列为float64
+    """
+    data = OrderedDict([('trade_datetime', to_datetime(dates))])
+    for name, values in columns.items():
+        data[name] = np.asarray(values, dtype=np.float64)
+    if index is not None:
+        data = OrderedDict((name, values[index]) for name, values in data.items())
+    return ColumnDataSource(data)
+
+
+def downsample_index(dates, columns, max_points, keep=()):
+    """
+    各列分别LTTB降采样后取并集，并集连同必须保留的行不超过max_points行;
+    各列平分扣除必须保留的行后剩下的点数；各列选中的点常有重合，并集不足时按比例增加每列的点数重选，至多再选3次
+
+    :param dates Series/ndarray 日期
+    :param columns dict 列名 -> Series/ndarray，每列对应一个字形
+    :param max_points int 数据源最多保留的行数，各字形共用；必须保留的行多于max_points时只保留这些行
+    :param keep list 必须保留的行号数组
+
+    :return index ndarray int64 保留的行号，升序，含首尾行
+    """
+    dt = to_datetime(dates)
+    required = np.unique(np.concatenate([np.array([0, len(dt) - 1], dtype=np.int64)] +
+                                        [np.asarray(k, dtype=np.int64) for k in keep]))
+    budget = max_points - len(required)
+    # LTTB每列至少选3个点
+    if not columns or budget < 3 * len(columns):
+        return required
+
+    def select(n_out):
+        return np.unique(np.concatenate([required] + [calc_LTTB(dt, values, n_out) for values in columns.values()]))
+
+    n_out = budget // len(columns)
+    index = select(n_out)
+    for _ in range(3):
+        added = len(index) - len(required)
+        if added <= 0 or len(index) >= 0.95 * max_points:
+            break
+        grown = select(int(n_out * budget / added))
+        if len(grown) > max_points:
+            break
+        n_out, index = int(n_out * budget / added), grown
+    return index
+
+
+def _indicator_columns(mkt_data, indicators):
+    return OrderedDict((spec[0], mkt_data[spec[0]]) for spec in indicators)
+
+
+def _price_figure():
+    return figure(height=300, width=700,
+                  sizing_mode='stretch_width',
+                  title='Target Trend',
+                  x_axis_type='datetime',
+                  x_axis_label="trade_datetime", y_axis_label="close")
+
+
+def _indicator_figure(source, indicators, title, x_range):
+    """
+    指标子图，indicators为(列名, 颜色)或(列名, 颜色, 'vbar')
+    """
+    indi = figure(height=200, sizing_mode='stretch_width',
+                  title=title,
+                  x_axis_type='datetime',
+                  x_range=x_range
+                  )
+    for spec in indicators:
+        name, color = spec[0], spec[1]
+        if len(spec) > 2 and spec[2] == 'vbar':
+            indi.vbar(x='trade_datetime', top=name, width=0.9, color=color, source=source)
+        else:
+            indi.line('trade_datetime', name, line_width=1, color=color, source=source)
+    return indi
+
+
+def plot_indicator(mkt_data, indicators, title='Factor', benchmark_close=None, max_points=None):
+    """
+    行情与指标两个联动子图，用于只计算指标、不回测的Demo;
+
+    :param mkt_data DataFrame 股票历史行情数据，日维度，需要包含日期['date']、收盘价['close']及indicators中的列
+    :param indicators list (列名, 颜色)，画成折线；(列名, 颜色, 'vbar')画成柱状
+    :param title str 指标子图标题
+    :param benchmark_close Series/ndarray 大盘指数收盘价，与mkt_data逐行对齐，给出时在行情子图中画出归一化走势
+    :param max_points int 数据源最多保留的行数，各字形共用(LTTB降采样)，None时画出全部点
+
+    :return plot gridplot 可交互式图
+    """
+    # 日期只转换一次，降采样与数据源共用
+    dates = to_datetime(mkt_data['date'])
+    close = mkt_data['close'].to_numpy(dtype=np.float64)
+    columns = OrderedDict([('close_nav', close / close[0])])
+    if benchmark_close is not None:
+        benchmark_close = np.asarray(benchmark_close, dtype=np.float64)
+        columns['benchmark_nav'] = benchmark_close / benchmark_close[0]
+    columns.update(_indicator_columns(mkt_data, indicators))
+    index = None
+    if max_points is not None and len(mkt_data) > max_points:
+        index = downsample_index(dates, columns, max_points)
+    source = make_source(dates, columns, index)
+
+    f1 = _price_figure()
+    # 绘制行情
+    f1.line('trade_datetime', 'close_nav', line_width=1, source=source)
+    if benchmark_close is not None:
+        f1.line('trade_datetime', 'benchmark_nav', line_width=1, color='yellow', source=source)
+
+    # 绘制指标
+    indi = _indicator_figure(source, indicators, title, f1.x_range)
+
+    return gridplot([[f1],
+                     [indi]
+                     ])
+
+
+def plot_backtest(mkt_data, indicators, title='Factor', max_points=None):
+    """
+    回测结果：行情与策略净值、指标、仓位、收益、回撤五个联动子图;
+
+    :param mkt_data DataFrame 股票历史行情数据，日维度，需要包含日期['date']、收盘价['close']、持仓['position']、
+                                           持仓收益['hold_r']、累计持仓收益['hold_cumu_r']、回撤['drawdown']及indicators中的列
+    :param indicators list (列名, 颜色)，画成折线；(列名, 颜色, 'vbar')画成柱状；为空时不画指标子图
+    :param title str 指标子图标题
+    :param max_points int 数据源最多保留的行数，各字形共用(LTTB降采样)，None时画出全部点；
+                          持仓变化前后两行、最深max_points // 20段回撤的前高与最低点总是保留，
+                          它们多于max_points时只画出这些点
+
+    :return plot gridplot 可交互式图
+    """
+    # 日期只转换一次，降采样与数据源共用
+    dates = to_datetime(mkt_data['date'])
+    close = mkt_data['close'].to_numpy(dtype=np.float64)
+    columns = OrderedDict([('close_nav', close / close[0]),
+                           ('hold_nav', mkt_data['hold_cumu_r'] + 1),
+                           ('position', mkt_data['position']),
+                           ('hold_r', mkt_data['hold_r']),
+                           ('drawdown_neg', -mkt_data['drawdown'])])
+    columns.update(_indicator_columns(mkt_data, indicators))
+    index = None
+    if max_points is not None and len(mkt_data) > max_points:
+        # 仓位是阶梯图，只需保留持仓变化的点，不参与LTTB
+        lttb_columns = OrderedDict((name, values) for name, values in columns.items() if name != 'position')
+        keep = [calc_trade_points(columns['position']),
+                calc_drawdown_extremes(mkt_data['drawdown'], max(1, max_points // 20))]
+        index = downsample_index(dates, lttb_columns, max_points, keep)
+    source = make_source(dates, columns, index)
+
+    f1 = _price_figure()
+    f2 = figure(height=200, sizing_mode='stretch_width',
+                title='Position',
+                x_axis_label="trade_datetime", y_axis_label="position",
+                x_axis_type='datetime',
+                x_range=f1.x_range)
+    f3 = figure(height=200, sizing_mode='stretch_width',
+                title='Return',
+                x_axis_type='datetime',
+                x_range=f1.x_range)
+    f4 = figure(height=200, sizing_mode='stretch_width',
+                title='Drawdown',
+                x_axis_type='datetime',
+                x_range=f1.x_range)
+
+    # 绘制行情
+    f1.line('trade_datetime', 'close_nav', line_width=1, source=source)
+    f1.line('trade_datetime', 'hold_nav', line_width=1, color='red', source=source)
+
+    # 绘制仓位
+    f2.step('trade_datetime', 'position', source=source)
+
+    # 绘制收益
+    f3.vbar(x='trade_datetime', top='hold_r', source=source)
+
+    # 绘制回撤
+    f4.line('trade_datetime', 'drawdown_neg', line_width=1, source=source)
+
+    rows = [[f1]]
+    if indicators:
+        # 绘制指标
+        rows.append([_indicator_figure(source, indicators, title, f1.x_range)])
+    return gridplot(rows + [[f2],
+                            [f3],
+                            [f4]
+                            ])
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#图表降采样：Largest-Triangle-Three-Buckets(LTTB)，以及必须保留的交易点、回撤极值点
+"""
+LTTB：首尾点必选，其余点等分为n_out-2个桶，每个桶选一个点，使它与上一个桶选中的点、下一个桶的均值点
+组成的三角形面积最大，保留走势的形状与尖峰，点数可以降到原来的几百分之一。
+各函数只返回被选中的行号，由调用方(factorlib.chart)对各列取并集后统一取行，共用一个数据源。
+"""
+
+#加载库
+import numpy as np
+
+
+def calc_LTTB(x, y, n_out):
+    """
+    LTTB降采样，NaN点不参与选择;
+
+    :param x ndarray 横坐标，单调递增(日期用datetime64或其int64值)
+    :param y ndarray 纵坐标
+    :param n_out int 最多保留的点数
+
+    :return index ndarray int64 选中点的行号，升序
+    """
+    x = np.asarray(x)
+    if x.dtype.kind == 'M':
+        x = x.astype(np.int64)
+    x = x.astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.flatnonzero(np.isfinite(y))
+    if len(finite) <= max(n_out, 2):
+        return finite
+    n_out = max(n_out, 3)
+    x, y = x[finite], y[finite]
+    n = len(y)
+
+    # 第一个和最后一个点单独成桶，中间n-2个点等分为n_out-2个桶
+    edges = (np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    # 每个桶的均值点，作为选下一个桶时的第三个顶点
+    csum_x = np.concatenate(([0.0], np.cumsum(x)))
+    csum_y = np.concatenate(([0.0], np.cumsum(y)))
+    next_starts = np.append(starts[1:], n - 1)
+    next_ends = np.append(ends[1:], n)
+    avg_x = (csum_x[next_ends] - csum_x[next_starts]) / (next_ends - next_starts)
+    avg_y = (csum_y[next_ends] - csum_y[next_starts]) / (next_ends - next_starts)
+
+    index = np.empty(n_out, dtype=np.int64)
+    index[0] = 0
+    index[-1] = n - 1
+    a = 0
+    # 每个桶依赖上一个桶选中的点，桶之间只能顺序计算，桶内向量化
+    for k in range(n_out - 2):
+        s, e = starts[k], ends[k]
+        area = np.abs((x[a] - avg_x[k]) * (y[s:e] - y[a]) - (x[a] - x[s:e]) * (avg_y[k] - y[a]))
+        a = s + int(np.argmax(area))
+        index[k + 1] = a
+    return finite[index]
+
+
+def calc_trade_points(position):
+    """
+    持仓变化的行号：变化前一行与变化当行都保留，阶梯图在两点之间保持原值，形状不变;
+
+    :param position ndarray 持仓
+
+    :return index ndarray int64 升序
+    """
+    position = np.asarray(position, dtype=np.float64)
+    change = np.flatnonzero(position[1:] != position[:-1]) + 1
+    return np.union1d(change - 1, change)
+
+
+def calc_drawdown_extremes(drawdown, n_keep):
+    """
+    最深的n_keep段回撤的起点(前高)与最低点;
+
+    :param drawdown ndarray 回撤，非负，0表示创新高
+    :param n_keep int 保留的回撤段数
+
+    :return index ndarray int64 升序
+    """
+    drawdown = np.nan_to_num(np.asarray(drawdown, dtype=np.float64))
+    n = len(drawdown)
+    in_dd = drawdown > 0
+    if n == 0 or not in_dd.any():
+        return np.empty(0, dtype=np.int64)
+    # 每段回撤：连续drawdown>0的区间，段号为此前创新高的次数
+    episode = np.cumsum(~in_dd)
+    rows = np.flatnonzero(in_dd)
+    # 段内按回撤从深到浅排序，每段第一个即最低点
+    order = rows[np.lexsort((-drawdown[rows], episode[rows]))]
+    first = np.concatenate(([True], episode[order][1:] != episode[order][:-1]))
+    troughs = order[first]
+    troughs = troughs[np.argsort(-drawdown[troughs], kind='stable')[:n_keep]]
+    # 段起点前一行为前高
+    starts = np.flatnonzero(in_dd & np.concatenate(([True], ~in_dd[:-1])))
+    peaks = starts[np.searchsorted(starts, troughs, side='right') - 1] - 1
+    return np.union1d(troughs, peaks[peaks >= 0])
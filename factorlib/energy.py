@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+#能量型指标的共用内核，输入可为一维序列或二维(日期 × 标的)矩阵
+
+#加载库
+import numpy as np
+
+from factorlib.rolling import RollingMean, RollingSum, calc_MA, calc_rolling_count, calc_rolling_sum, calc_up_days
+
+
+def calc_PSY_multi(X, N_list=(6, 12, 24), M=6):
+    """
+    计算多个周期的PSY和PSYMA的值，所有周期共用同一个上涨日前缀和
+    PSY:COUNT(CLOSE>REF(CLOSE,1),N)/N*100;
+    PSYMA:MA(PSY,M);
+
+    :param X Series/ndarray 收盘价，一维序列或二维(日期 × 标的)矩阵
+    :param N_list list PSY参数N的列表
+    :param M int PSYMA参数M
+
+    :return result dict {N: {'PSY': ndarray, 'PSYMA': ndarray}}，前N期PSY为0，与原逐日计算一致
+    """
+    up = calc_up_days(X)
+    result = {}
+    for N in N_list:
+        PSY = calc_rolling_count(up, N) / N * 100
+        PSY[:N] = 0
+        result[N] = {'PSY': PSY, 'PSYMA': calc_MA(PSY, M)}
+    return result
+
+
+def calc_VR(close, volume, N=26, M=6):
+    """
+    计算VR和MAVR的值，上涨日、下跌日、平盘日成交量各做一次滚动求和
+    1.AV=N日内股价上升日成交量；AVS=N日内LAV
+    2.BV=N日内股价下跌日成交量；BVS=N日内LBV
+    3.CV=N日内股价平盘日成交量；CVS=N日内LCV
+    4.VR=(AVS+1/2CVS)/(BVS+1/2CVS)
+    5.MAVR=VR的M日简单移动平均
+
+    :param close Series/ndarray 收盘价，一维序列或二维(日期 × 标的)矩阵
+    :param volume Series/ndarray 成交量，形状同close
+    :param N int VR参数N
+    :param M int MAVR参数M
+
+    :return VR ndarray VR的值，前N期为NaN(原实现为None)
+    :return MAVR ndarray MAVR的值
+    """
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    up = calc_up_days(close)
+    down = np.zeros(close.shape, dtype=bool)
+    np.less(close[1:], close[:-1], out=down[1:])
+    flat = ~(up | down)
+
+    AVS = calc_rolling_sum(np.where(up, volume, 0.0), N)
+    BVS = calc_rolling_sum(np.where(down, volume, 0.0), N)
+    CVS = calc_rolling_sum(np.where(flat, volume, 0.0), N)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        VR = (AVS + 1 / 2 * CVS) / (BVS + 1 / 2 * CVS)
+    # 首日没有上一日收盘价，窗口需从第二日开始，故前N期为空
+    VR[:N] = np.nan
+
+    return VR, calc_MA(VR, M)
+
+
+class VRUpdater(object):
+    """
+    逐根K线增量计算VR和MAVR，每次更新O(1)，与calc_VR的批量结果一致;
+    """
+
+    FIELDS = ('close', 'volume')
+    OUTPUTS = ('VR', 'MAVR')
+
+    def __init__(self, N=26, M=6):
+        """
+        :param N int VR参数N
+        :param M int MAVR参数M
+        """
+        self.N = N
+        self.M = M
+        self.pre_close = None
+        # 最近N日上涨量、下跌量、平盘量的滚动和，与其他Updater一样定期精确重算，含NaN的窗口移出后恢复
+        self.sums = (RollingSum(N), RollingSum(N), RollingSum(N))
+        self.mavr = RollingMean(M)
+
+    def update(self, close, volume):
+        """
+        输入一根新K线，返回最新的VR和MAVR;
+
+        :param close float 收盘价
+        :param volume float 成交量
+
+        :return VR float 预热期内为NaN
+        :return MAVR float 预热期内为NaN
+        """
+        pre_close = self.pre_close
+        self.pre_close = close
+        if pre_close is None:
+            return np.nan, self.mavr.update(np.nan)
+
+        # 与calc_VR的np.where一致：成交量只计入所属的一类，收盘价为NaN时计入平盘
+        if close > pre_close:
+            item = (volume, 0.0, 0.0)
+        elif close < pre_close:
+            item = (0.0, volume, 0.0)
+        else:
+            item = (0.0, 0.0, volume)
+        avs, bvs, cvs = [rolling.update(x) for rolling, x in zip(self.sums, item)]
+        # 首根K线不入窗口，第N+1根K线起窗口已满，与calc_VR前N期为NaN一致
+        with np.errstate(divide='ignore', invalid='ignore'):
+            VR = float(np.float64(avs + 1 / 2 * cvs) / (bvs + 1 / 2 * cvs))
+
+        return VR, self.mavr.update(VR)
+
+
+class BRARUpdater(object):
+    """
+    逐根K线增量计算AR和BR，与calc_BRAR一致;
+    AR = 100 * SUM(HIGH-OPEN, m) / SUM(OPEN-LOW, m)
+    BR = 100 * SUM(MAX(HIGH-REF(CLOSE,1),0), m) / SUM(MAX(REF(CLOSE,1)-LOW,0), m)，首根K线没有昨收，取正部视为0
+    """
+
+    FIELDS = ('high', 'low', 'open', 'close')
+    OUTPUTS = ('AR', 'BR')
+
+    def __init__(self, m=26):
+        """
+        :param m int 窗口长度
+        """
+        self.pre_close = np.nan
+        self.ar = (RollingSum(m), RollingSum(m))
+        self.br = (RollingSum(m), RollingSum(m))
+
+    def update(self, high, low, open_, close):
+        """
+        :param high float 最高价
+        :param low float 最低价
+        :param open_ float 开盘价
+        :param close float 收盘价
+
+        :return AR float 预热期内为NaN
+        :return BR float 预热期内为NaN
+        """
+        pre_close = self.pre_close
+        self.pre_close = close
+        with np.errstate(divide='ignore', invalid='ignore'):
+            AR = 100 * (np.float64(self.ar[0].update(high - open_)) / self.ar[1].update(open_ - low))
+            BR = 100 * (np.float64(self.br[0].update(np.fmax(high - pre_close, 0.0)))
+                        / self.br[1].update(np.fmax(pre_close - low, 0.0)))
+        return float(AR), float(BR)
+
+
+class CRUpdater(object):
+    """
+    逐根K线增量计算CR及其四条均线，与calc_CR一致;
+    CR = 100 * SUM(MAX(HIGH-REF(MID,1),0), N) / SUM(MAX(REF(MID,1)-LOW,0), N)，MID为最高、最低价的均值
+    """
+
+    FIELDS = ('high', 'low')
+    OUTPUTS = ('CR', 'MA1', 'MA2', 'MA3', 'MA4')
+
+    def __init__(self, N=26, M1=10, M2=20, M3=40, M4=62):
+        """
+        :param N int CR参数N
+        :param M1 int MA1周期
+        :param M2 int MA2周期
+        :param M3 int MA3周期
+        :param M4 int MA4周期
+        """
+        self.pre_mid = np.nan
+        self.sums = (RollingSum(N), RollingSum(N))
+        self.mas = [RollingMean(M) for M in (M1, M2, M3, M4)]
+
+    def update(self, high, low):
+        """
+        :param high float 最高价
+        :param low float 最低价
+
+        :return CR float 预热期内为NaN，分母为0时为inf或NaN
+        :return MA1 float
+        :return MA2 float
+        :return MA3 float
+        :return MA4 float
+        """
+        pre_mid = self.pre_mid
+        self.pre_mid = (high + low) / 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            CR = float(100 * (np.float64(self.sums[0].update(np.fmax(high - pre_mid, 0.0)))
+                              / self.sums[1].update(np.fmax(pre_mid - low, 0.0))))
+        return (CR,) + tuple(ma.update(CR) for ma in self.mas)
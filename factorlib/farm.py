@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+#批量回测：(策略, 标的, 参数)任务分发到进程池，行情数据只加载一次并由各进程共享
+"""
+各策略沿用对应Demo中的 calc_* -> calc_signal -> calc_position，表现统计用calc_performance，
+每个任务只回传一行数值型指标。
+行情共享：SharedMarketData将每个标的的数值列写成一个(日期 × 字段)的float64 .npy文件(优先放在/dev/shm)，
+子进程以np.load(mmap_mode='c')映射，读取不复制数据，写入时写时复制，不影响其他进程。
+(multiprocessing.shared_memory需要Python 3.8，这里用内存映射文件实现同样的零拷贝共享，兼容Python 3.6)
+任务分块：相邻任务按标的排序后每chunksize个一块，子进程处理完一块后从队列领取下一块，
+快的进程自然多领；每块只需一次进程间通信，小任务不会被通信开销淹没。
+"""
+
+#加载库
+import importlib.util
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from factorlib.performance import calc_performance
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#策略名 -> (Demo路径, 指标函数名)，均为带statistic_performance回测的Demo
+STRATEGIES = OrderedDict([
+    ('AMV', ('均线型-AMV-成本价均线/AMV_Demo.py', 'calc_AMV')),
+    ('BBI', ('均线型-BBI-多空均线/BBI_Demo.py', 'calc_BBI')),
+    ('BBIBOLL', ('均线型-BBIBOLL-多空布林线/BBIBOLL_Demo.py', 'calc_BBIBOLL')),
+    ('EXPMA', ('均线型-EXPMA-指数平均线/EXPMA_Demo.py', 'calc_EXPMA')),
+    ('HMA', ('均线型-HMA-高价平均线/HMA_Demo.py', 'calc_HMA')),
+    ('LMA', ('均线型-LMA-低价平均线/LMA_Demo.py', 'calc_LMA')),
+    ('MA', ('均线型-MA-均线/MA_Demo.py', 'calc_MA')),
+    ('VMA', ('均线型-VMA-变异平均线/VMA_Demo.py', 'calc_VMA')),
+    ('BRAR', ('能量型-BRAR/BRAR_Demo.py', 'calc_BRAR')),
+    ('CR', ('能量型-CR/CR_Demo.py', 'calc_CR')),
+    ('CHO', ('趋势类-CHO/CHO_Demo.py', 'calc_CHO')),
+    ('DMA', ('趋势类-DMA/DMA_Demo.py', 'calc_DMA')),
+    ('DMI', ('趋势类-DMI/DMI_Demo.py', 'calc_DMI')),
+    ('EMV', ('趋势类-EMV/EMV_Demo.py', 'calc_EMV')),
+    ('GDX', ('趋势类-GDX/GDX_Demo.py', 'calc_GDX')),
+    ('JS', ('趋势类-JS/JS_Demo.py', 'calc_JS')),
+    ('MACD', ('趋势类-MACD/MACD_Demo.py', 'calc_MACD')),
+    ('QR', ('趋势类-QR/QR_Demo.py', 'calc_QR')),
+    ('TRIX', ('趋势类-TRIX/TRIX_Demo.py', 'calc_TRIX')),
+    ('UOS', ('趋势类-UOS/UOS_Demo.py', 'calc_UOS')),
+    ('VMACD', ('趋势类-VMACD/VMACD_Demo.py', 'calc_MACD')),
+    ('VPT', ('趋势类-VPT/VPT_Demo.py', 'calc_VPT')),
+    ('WVAD', ('趋势类-WVAD/WVAD_Demo.py', 'calc_WVAD')),
+])
+
+#需要大盘指数行情作为第二个参数的策略
+NEEDS_BENCHMARK = ('QR',)
+
+METRIC_COLS = ['累计收益',
+               '多仓次数', '多仓胜率', '多仓平均持有期',
+               '空仓次数', '空仓胜率', '空仓平均持有期',
+               '日胜率', '最大回撤', '年化收益/最大回撤',
+               '年化收益', '年化标准差', '年化夏普']
+
+
+class SharedMarketData(object):
+    """
+    各标的行情的共享存储：父进程写入一次，子进程按标的零拷贝映射;
+    """
+
+    def __init__(self, frames=None, root=None):
+        """
+        :param frames dict 标的 -> DataFrame 行情数据，数值列写入共享存储，'date'列作为日期索引
+        :param root str 存储目录，缺省时新建临时目录(优先/dev/shm)并在close时删除
+        """
+        self.owner = root is None
+        if root is None:
+            shm = '/dev/shm'
+            root = tempfile.mkdtemp(prefix='factorlib_farm_', dir=shm if os.path.isdir(shm) else None)
+        self.root = root
+        self.columns = {}
+        for symbol, frame in (frames or {}).items():
+            self.put(symbol, frame)
+
+    def put(self, symbol, frame):
+        """
+        写入一个标的的行情;
+
+        :param symbol str 标的代码
+        :param frame DataFrame 行情数据
+        """
+        numeric = frame.select_dtypes(include=[np.number])
+        np.save(os.path.join(self.root, symbol + '.npy'), numeric.to_numpy(dtype=np.float64))
+        if 'date' in frame:
+            np.save(os.path.join(self.root, symbol + '.date.npy'), frame['date'].astype(str).to_numpy(dtype='U'))
+        self.columns[symbol] = list(numeric.columns)
+
+    def attach(self, symbol):
+        """
+        映射一个标的的行情，数值列不复制;
+
+        :param symbol str 标的代码
+
+        :return mkt_data DataFrame 与pd.read_csv读入的列一致(数值列为float64)
+        """
+        values = np.load(os.path.join(self.root, symbol + '.npy'), mmap_mode='c')
+        mkt_data = pd.DataFrame(values, columns=self.columns[symbol], copy=False)
+        date_path = os.path.join(self.root, symbol + '.date.npy')
+        if os.path.exists(date_path):
+            mkt_data.insert(0, 'date', np.load(date_path).astype(object))
+        return mkt_data
+
+    def close(self):
+        """删除自建的临时目录"""
+        if self.owner:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_strategy(name):
+    """
+    导入策略对应的Demo模块(运行部分在 __name__ == '__main__' 下，导入时不执行);
+
+    :param name str 策略名，STRATEGIES中的键
+
+    :return module module Demo模块，含calc_*、calc_signal、calc_position
+    """
+    path, _ = STRATEGIES[name]
+    spec = importlib.util.spec_from_file_location('strategy_' + name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_strategy(module, calc_name, mkt_data, params=None, benchmark_data=None):
+    """
+    按Demo的流程运行一次回测;
+
+    :param module module Demo模块
+    :param calc_name str 指标函数名
+    :param mkt_data DataFrame 行情数据
+    :param params dict 指标参数
+    :param benchmark_data DataFrame 大盘指数行情，仅QR需要
+
+    :return metrics ndarray 与METRIC_COLS对应的数值型指标
+    """
+    calc = getattr(module, calc_name)
+    if benchmark_data is None:
+        mkt_data = calc(mkt_data, **(params or {}))
+    else:
+        mkt_data = calc(mkt_data, benchmark_data, **(params or {}))
+    mkt_data = module.calc_signal(mkt_data)
+    mkt_data = module.calc_position(mkt_data)
+    return calc_performance(mkt_data['pct_chg'], mkt_data['position']).iloc[0].to_numpy(dtype=np.float64)
+
+
+#子进程状态：共享存储、已导入的策略模块
+_worker = {}
+
+
+def _init_worker(root, columns, benchmark):
+    """子进程初始化：按目录打开共享存储"""
+    store = SharedMarketData(root=root)
+    store.columns = columns
+    _worker['store'] = store
+    _worker['modules'] = {}
+    _worker['benchmark'] = benchmark
+
+
+def _run_chunk(chunk):
+    """
+    子进程运行一块任务;
+
+    :param chunk list (序号, 策略名, 标的, 参数)
+
+    :return records list (序号, 指标数组或None, 错误信息)
+    """
+    store, modules = _worker['store'], _worker['modules']
+    records = []
+    for i, name, symbol, params in chunk:
+        try:
+            if name not in modules:
+                modules[name] = load_strategy(name)
+            benchmark_data = None
+            if name in NEEDS_BENCHMARK:
+                benchmark_data = store.attach(_worker['benchmark'])
+            # 各策略会在行情上追加、改写列，每个任务重新映射一次(写时复制，开销只是一次mmap)
+            metrics = run_strategy(modules[name], STRATEGIES[name][1], store.attach(symbol), params, benchmark_data)
+            records.append((i, metrics, ''))
+        except Exception as e:
+            records.append((i, None, '%s: %s' % (type(e).__name__, e)))
+    return records
+
+
+def run_farm(frames, jobs, processes=None, chunksize=None, benchmark='000001'):
+    """
+    批量回测;
+
+    :param frames dict 标的 -> DataFrame 行情数据，或已写入的SharedMarketData
+    :param jobs list (策略名, 标的, 参数dict)，参数为None时用Demo中的默认参数
+    :param processes int 进程数，缺省为CPU核数；为1(含缺省时只有一个CPU)时不建进程池，在本进程内依次运行
+    :param chunksize int 每块的任务数，缺省为 任务数 / (进程数 × 4)
+    :param benchmark str QR策略使用的大盘指数标的
+
+    :return result_df DataFrame 每个任务一行，列为['strategy']['symbol']['params']、METRIC_COLS及['error']
+    :return stats dict 'jobs'任务数, 'processes'实际使用的进程数, 'seconds'耗时, 'jobs_per_sec'每秒任务数
+    """
+    t0 = time.perf_counter()
+    store = frames if isinstance(frames, SharedMarketData) else SharedMarketData(frames)
+    # 缺省为CPU核数：只有一个CPU时即为1，进程池只会增加进程间通信与序列化的开销；显式给出的进程数原样使用
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, -(-len(jobs) // (processes * 4)))
+
+    # 按标的、策略排序后分块，同一块内尽量是同一标的
+    order = sorted(range(len(jobs)), key=lambda i: (jobs[i][1], jobs[i][0]))
+    tasks = [(i, jobs[i][0], jobs[i][1], jobs[i][2]) for i in order]
+    chunks = [tasks[k:k + chunksize] for k in range(0, len(tasks), chunksize)]
+
+    metrics = np.full((len(jobs), len(METRIC_COLS)), np.nan)
+    errors = [''] * len(jobs)
+    pool = None
+    try:
+        if processes == 1:
+            _init_worker(store.root, store.columns, benchmark)
+            results = map(_run_chunk, chunks)
+        else:
+            pool = Pool(processes, initializer=_init_worker, initargs=(store.root, store.columns, benchmark))
+            results = pool.imap_unordered(_run_chunk, chunks)
+        for records in results:
+            for i, values, error in records:
+                if values is not None:
+                    metrics[i] = values
+                errors[i] = error
+    finally:
+        if pool is not None:
+            pool.terminate()
+        _worker.clear()
+        if store is not frames:
+            store.close()
+
+    result_df = pd.DataFrame(metrics, columns=METRIC_COLS)
+    result_df.insert(0, 'params', [repr(params or {}) for _, _, params in jobs])
+    result_df.insert(0, 'symbol', [symbol for _, symbol, _ in jobs])
+    result_df.insert(0, 'strategy', [name for name, _, _ in jobs])
+    result_df['error'] = errors
+    seconds = time.perf_counter() - t0
+    stats = {'jobs': len(jobs), 'processes': processes, 'seconds': seconds,
+             'jobs_per_sec': len(jobs) / seconds if seconds > 0 else np.inf}
+    return result_df, stats
@@ -0,0 +1,475 @@
+# -*- coding: utf-8 -*-
+#指标计算图：各指标以命名算子声明输入，相同的中间量只计算一次
+"""
+指标公式由算子节点组合而成，如 ma('close', 12)、ref('close', 1)、ma(high - low, 9)，节点由(算子, 参数)唯一确定。
+IndicatorPlan汇总多个指标声明的全部节点，按(算子, 参数)去重后拓扑排序，对一份行情数据只遍历一次，
+并统计去重消除的重复计算次数。
+各算子与原Demo中的pandas写法一一对应，结果逐位相同：
+    ma/msum/std  对应 rolling(n, min_periods).mean()/sum()/std()，min_periods缺省为n
+    hhv/llv      对应 rolling(n, min_periods).max()/min()
+    ref          对应 shift(n)
+    ema/sma/dma  对应 factorlib.recursive 中的 calc_EMA/calc_SMA/calc_DMA
+    positive_ratio 对应 factorlib.rolling.calc_positive_ratio
+    fmax/fmin    对应 pd.concat([A, B], axis=1).max(axis=1)/min(axis=1)，NaN时取另一方
+    bfill/fillna 对应 fillna(method='bfill')/fillna(value)
+    比较运算(>、>=、<、<=)得到bool数组，与数值相乘时True为1、False为0
+加法、乘法、fmax、fmin的两个操作数交换后视为同一节点(交换后结果逐位相同)，结合律不做变换。
+输入可为一维行情(DataFrame的列)，也可为二维(日期 × 标的)矩阵(dict，列名 -> DataFrame)。
+"""
+
+#加载库
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from factorlib.recursive import as_float_array, calc_EMA, calc_SMA, calc_DMA
+from factorlib.rolling import calc_positive_ratio
+from factorlib.signals import prev
+
+
+class Node(object):
+    """
+    计算图节点：算子名与参数，参数为其他节点或常数;
+    """
+
+    def __init__(self, op, *args):
+        """
+        :param op str 算子名
+        :param args tuple 参数，字符串视为行情列名
+        """
+        args = tuple(col(a) if isinstance(a, str) and op != 'col' else a for a in args)
+        if op in _COMMUTATIVE:
+            args = tuple(sorted(args, key=lambda a: repr(_key(a))))
+        self.op = op
+        self.args = args
+        self.key = (op,) + tuple(_key(a) for a in args)
+
+    def children(self):
+        """
+        :return children list 作为参数的子节点
+        """
+        return [a for a in self.args if isinstance(a, Node)]
+
+    def __repr__(self):
+        if self.op == 'col':
+            return self.args[0]
+        return '%s(%s)' % (self.op, ', '.join(repr(a) for a in self.args))
+
+    def __add__(self, other):
+        return Node('add', self, other)
+
+    def __radd__(self, other):
+        return Node('add', other, self)
+
+    def __sub__(self, other):
+        return Node('sub', self, other)
+
+    def __rsub__(self, other):
+        return Node('sub', other, self)
+
+    def __mul__(self, other):
+        return Node('mul', self, other)
+
+    def __rmul__(self, other):
+        return Node('mul', other, self)
+
+    def __truediv__(self, other):
+        return Node('div', self, other)
+
+    def __rtruediv__(self, other):
+        return Node('div', other, self)
+
+    def __neg__(self):
+        return Node('neg', self)
+
+    def __gt__(self, other):
+        return Node('gt', self, other)
+
+    def __ge__(self, other):
+        return Node('ge', self, other)
+
+    def __lt__(self, other):
+        return Node('lt', self, other)
+
+    def __le__(self, other):
+        return Node('le', self, other)
+
+    def __abs__(self):
+        return Node('abs', self)
+
+
+_COMMUTATIVE = ('add', 'mul', 'fmax', 'fmin')
+
+
+def _key(a):
+    """节点取key，常数原样返回"""
+    return a.key if isinstance(a, Node) else a
+
+
+def col(name):
+    """
+    行情列;
+
+    :param name str 列名，如'close'
+
+    :return node Node
+    """
+    return Node('col', name)
+
+
+def ref(X, n=1):
+    """
+    REF(X, n)，即X.shift(n);
+
+    :param X Node/str 输入节点或列名
+    :param n int 位移日数
+
+    :return node Node
+    """
+    return Node('ref', X, n)
+
+
+def ma(X, n, min_periods=None):
+    """
+    MA(X, n)，即X.rolling(n, min_periods).mean();
+
+    :param X Node/str 输入节点或列名
+    :param n int 窗口长度
+    :param min_periods int 最少数据个数，缺省为n
+
+    :return node Node
+    """
+    return Node('ma', X, n, n if min_periods is None else min_periods)
+
+
+def msum(X, n, min_periods=None):
+    """
+    SUM(X, n)，即X.rolling(n, min_periods).sum();
+
+    :param X Node/str 输入节点或列名
+    :param n int 窗口长度
+    :param min_periods int 最少数据个数，缺省为n
+
+    :return node Node
+    """
+    return Node('msum', X, n, n if min_periods is None else min_periods)
+
+
+def std(X, n, min_periods=None):
+    """
+    STD(X, n)，即X.rolling(n, min_periods).std();
+
+    :param X Node/str 输入节点或列名
+    :param n int 窗口长度
+    :param min_periods int 最少数据个数，缺省为n
+
+    :return node Node
+    """
+    return Node('std', X, n, n if min_periods is None else min_periods)
+
+
+def hhv(X, n, min_periods=None):
+    """
+    HHV(X, n)，即X.rolling(n, min_periods).max();
+
+    :param X Node/str 输入节点或列名
+    :param n int 窗口长度
+    :param min_periods int 最少数据个数，缺省为n
+
+    :return node Node
+    """
+    return Node('hhv', X, n, n if min_periods is None else min_periods)
+
+
+def llv(X, n, min_periods=None):
+    """
+    LLV(X, n)，即X.rolling(n, min_periods).min();
+
+    :param X Node/str 输入节点或列名
+    :param n int 窗口长度
+    :param min_periods int 最少数据个数，缺省为n
+
+    :return node Node
+    """
+    return Node('llv', X, n, n if min_periods is None else min_periods)
+
+
+def fmax(A, B):
+    """
+    逐元素取大，一方为NaN时取另一方;
+
+    :param A Node/str/float 输入节点、列名或常数
+    :param B Node/str/float 同A
+
+    :return node Node
+    """
+    return Node('fmax', A, B)
+
+
+def fmin(A, B):
+    """
+    逐元素取小，一方为NaN时取另一方;
+
+    :param A Node/str/float 输入节点、列名或常数
+    :param B Node/str/float 同A
+
+    :return node Node
+    """
+    return Node('fmin', A, B)
+
+
+def positive_ratio(A, B, n, clip=True):
+    """
+    SUM(MAX(A,0),n)/SUM(MAX(B,0),n)，同calc_positive_ratio;
+
+    :param A Node/str 分子
+    :param B Node/str 分母
+    :param n int 窗口长度
+    :param clip bool 为False时不取正部
+
+    :return node Node
+    """
+    return Node('positive_ratio', A, B, n, clip)
+
+
+def ema(X, n):
+    """
+    EMA(X, n)，同calc_EMA;
+
+    :param X Node/str 输入节点或列名
+    :param n int 周期
+
+    :return node Node
+    """
+    return Node('ema', X, n)
+
+
+def sma(X, n, m):
+    """
+    SMA(X, n, m)，同calc_SMA;
+
+    :param X Node/str 输入节点或列名
+    :param n int 周期
+    :param m int 权重
+
+    :return node Node
+    """
+    return Node('sma', X, n, m)
+
+
+def dma(X, A):
+    """
+    DMA(X, A)，同calc_DMA;
+
+    :param X Node/str 输入节点或列名
+    :param A Node/float 平滑系数，可为节点
+
+    :return node Node
+    """
+    return Node('dma', X, A)
+
+
+def bfill(X):
+    """
+    X.fillna(method='bfill');
+
+    :param X Node/str 输入节点或列名
+
+    :return node Node
+    """
+    return Node('bfill', X)
+
+
+def fillna(X, value):
+    """
+    X.fillna(value);
+
+    :param X Node/str 输入节点或列名
+    :param value float 填充值
+
+    :return node Node
+    """
+    return Node('fillna', X, value)
+
+
+def _rolling(X, n, min_periods):
+    """按维度包装为Series/DataFrame后取rolling"""
+    frame = pd.Series(X) if X.ndim == 1 else pd.DataFrame(X)
+    return frame.rolling(n, min_periods=min_periods)
+
+
+def _bfill(X):
+    frame = pd.Series(X) if X.ndim == 1 else pd.DataFrame(X)
+    return frame.fillna(method='bfill').to_numpy()
+
+
+_EVALUATORS = {
+    'add': lambda a, b: a + b,
+    'sub': lambda a, b: a - b,
+    'mul': lambda a, b: a * b,
+    'div': lambda a, b: a / b,
+    'neg': lambda a: -a,
+    'abs': lambda a: np.abs(a),
+    'gt': lambda a, b: a > b,
+    'ge': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+    'le': lambda a, b: a <= b,
+    'fmax': np.fmax,
+    'fmin': np.fmin,
+    'ref': prev,
+    'ma': lambda X, n, min_periods: _rolling(X, n, min_periods).mean().to_numpy(),
+    'msum': lambda X, n, min_periods: _rolling(X, n, min_periods).sum().to_numpy(),
+    'std': lambda X, n, min_periods: _rolling(X, n, min_periods).std().to_numpy(),
+    'hhv': lambda X, n, min_periods: _rolling(X, n, min_periods).max().to_numpy(),
+    'llv': lambda X, n, min_periods: _rolling(X, n, min_periods).min().to_numpy(),
+    'positive_ratio': calc_positive_ratio,
+    'ema': calc_EMA,
+    'sma': calc_SMA,
+    'dma': calc_DMA,
+    'bfill': _bfill,
+    'fillna': lambda X, value: np.where(np.isnan(X), value, X),
+}
+
+
+def count_nodes(node):
+    """
+    不做任何共用时计算node需要的算子次数(按表达式树展开，行情列不计);
+
+    :param node Node 节点
+
+    :return counts dict 算子名 -> 次数
+    """
+    nodes = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(node.children())
+    return _count_ops(nodes)
+
+
+def topo_sort(roots):
+    """
+    对若干根节点的全部子节点按key去重，按拓扑顺序(参数先于自身)排列;
+
+    :param roots iterable Node 根节点
+
+    :return nodes list Node
+    """
+    order = OrderedDict()
+    for root in roots:
+        # 后序遍历，已访问的key直接跳过
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node.key in order:
+                continue
+            if expanded:
+                order[node.key] = node
+                continue
+            stack.append((node, True))
+            for child in reversed(node.children()):
+                if child.key not in order:
+                    stack.append((child, False))
+    return list(order.values())
+
+
+def _count_ops(nodes):
+    """按算子名计数，行情列不计"""
+    counts = {}
+    for node in nodes:
+        if node.op != 'col':
+            counts[node.op] = counts.get(node.op, 0) + 1
+    return counts
+
+
+class IndicatorPlan(object):
+    """
+    多个指标的联合计算计划：add声明各指标的输出，evaluate对一份行情数据去重后统一计算，report统计消除的重复计算;
+    """
+
+    def __init__(self):
+        # 指标名 -> OrderedDict(输出名 -> 节点)
+        self.indicators = OrderedDict()
+
+    def add(self, name, outputs):
+        """
+        :param name str 指标名，如'MACD'
+        :param outputs dict 输出名 -> Node，如{'DIF': ..., 'DEM': ...}
+
+        :return self IndicatorPlan
+        """
+        self.indicators[name] = OrderedDict(outputs)
+        return self
+
+    def nodes(self):
+        """
+        去重后按拓扑顺序(参数先于自身)排列的全部节点;
+
+        :return nodes list Node
+        """
+        return topo_sort(root for outputs in self.indicators.values() for root in outputs.values())
+
+    def evaluate(self, mkt_data):
+        """
+        计算全部指标，每个去重后的节点只计算一次;
+
+        :param mkt_data DataFrame/dict 一维行情数据，或 列名 -> 二维(日期 × 标的)DataFrame
+                                       需包含各指标用到的列，如['close']['high']['low']
+
+        :return result OrderedDict 指标名 -> DataFrame(输出名为列，一维输入)，二维输入时为 输出名 -> DataFrame
+        """
+        if isinstance(mkt_data, dict):
+            sample = next(iter(mkt_data.values()))
+            index, columns = sample.index, sample.columns
+        else:
+            index, columns = mkt_data.index, None
+
+        values = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for node in self.nodes():
+                if node.op == 'col':
+                    values[node.key] = as_float_array(mkt_data[node.args[0]])
+                    continue
+                args = [values[a.key] if isinstance(a, Node) else a for a in node.args]
+                values[node.key] = _EVALUATORS[node.op](*args)
+
+        result = OrderedDict()
+        for name, outputs in self.indicators.items():
+            if columns is None:
+                result[name] = pd.DataFrame(OrderedDict((k, values[v.key]) for k, v in outputs.items()),
+                                            index=index)
+            else:
+                result[name] = OrderedDict((k, pd.DataFrame(values[v.key], index=index, columns=columns))
+                                           for k, v in outputs.items())
+        return result
+
+    def report(self):
+        """
+        按算子统计去重消除的重复计算;
+            声明次数：      各输出按表达式树完全展开时的算子次数，即不做任何共用
+            逐指标计算次数：各指标单独计算、只在指标内部共用中间量时的次数，相当于逐个运行各Demo的calc_*
+            计算次数：      全部指标去重后实际计算的次数
+            消除重复：      声明次数 - 计算次数，其中 逐指标计算次数 - 计算次数 为跨指标共用消除的部分
+
+        :return report_df DataFrame 每个算子一行，末行'合计'
+        """
+        expanded = {}
+        separate = {}
+        for outputs in self.indicators.values():
+            for root in outputs.values():
+                for op, n in count_nodes(root).items():
+                    expanded[op] = expanded.get(op, 0) + n
+            for op, n in _count_ops(topo_sort(outputs.values())).items():
+                separate[op] = separate.get(op, 0) + n
+        unique = _count_ops(self.nodes())
+
+        ops = sorted(expanded)
+        report_df = pd.DataFrame({'声明次数': [expanded[op] for op in ops],
+                                  '逐指标计算次数': [separate[op] for op in ops],
+                                  '计算次数': [unique[op] for op in ops]},
+                                 index=ops)
+        report_df.loc['合计'] = report_df.sum()
+        report_df['消除重复'] = report_df['声明次数'] - report_df['计算次数']
+        return report_df
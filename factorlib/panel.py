@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+#面板模式：全市场行情为(日期 × 标的)矩阵，各指标按列一次向量化计算
+"""
+Panel的各字段(open、high、low、close、volume、amount、turnover、pct_chg等)为对齐到同一交易日历的float64矩阵，
+某标的未上市、停牌的日期收盘价为NaN。
+停牌处理：计算前将每个标的的交易日(收盘价非NaN)按时间顺序移到列首(TradingDays.compress)，各指标只在标的自己的交易日上滚动、递推，
+与用该标的单独的行情数据计算的结果逐位相同；计算后再放回原日期(TradingDays.expand)，停牌日为NaN。
+列尾补齐的NaN位于该标的全部交易日之后，滚动、递推类算子只依赖过去的数据，不受影响。
+指标公式取自factorlib.catalog，多个指标一起计算时共用中间量。
+"""
+
+#加载库
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from factorlib.catalog import build_plan
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume', 'amount', 'turnover', 'pct_chg')
+
+
+class Panel(object):
+    """
+    全市场行情面板：字段 -> (日期 × 标的)矩阵;
+    """
+
+    def __init__(self, fields, dates, symbols):
+        """
+        :param fields dict 字段名 -> ndarray (日期 × 标的)
+        :param dates Index/list 交易日历
+        :param symbols Index/list 标的代码
+        """
+        self.fields = OrderedDict((k, np.asarray(v, dtype=np.float64)) for k, v in fields.items())
+        self.dates = pd.Index(dates)
+        self.symbols = pd.Index(symbols)
+
+    @classmethod
+    def from_frames(cls, frames, fields=FIELDS, date_col='date', benchmark=None):
+        """
+        由各标的的单独行情(如pd.read_csv读入的DataFrame)生成面板，日历取全部标的日期的并集;
+
+        :param frames dict 标的 -> DataFrame 行情数据，需包含日期列
+        :param fields tuple 字段名，缺少的字段跳过
+        :param date_col str 日期列名
+        :param benchmark DataFrame 大盘指数行情，给出时增加字段['close_zs']，供QR使用
+
+        :return panel Panel
+        """
+        indexed = OrderedDict((symbol, frame.set_index(date_col)) for symbol, frame in frames.items())
+        dates = pd.Index(sorted(set().union(*[frame.index for frame in indexed.values()])))
+        result = OrderedDict()
+        for field in fields:
+            if all(field in frame for frame in indexed.values()):
+                result[field] = np.column_stack([frame[field].reindex(dates).to_numpy(dtype=np.float64)
+                                                 for frame in indexed.values()])
+        if benchmark is not None:
+            close_zs = benchmark.set_index(date_col)['close'].reindex(dates).to_numpy(dtype=np.float64)
+            result['close_zs'] = np.repeat(close_zs[:, None], len(indexed), axis=1)
+        return cls(result, dates, list(indexed))
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+    def __contains__(self, field):
+        return field in self.fields
+
+    @property
+    def shape(self):
+        return len(self.dates), len(self.symbols)
+
+    def trading_mask(self):
+        """
+        :return mask ndarray bool 收盘价非NaN的日期为True
+        """
+        return ~np.isnan(self.fields['close'])
+
+    def to_frame(self, values):
+        """
+        :param values ndarray (日期 × 标的)矩阵
+
+        :return frame DataFrame 以日历为索引、标的为列
+        """
+        return pd.DataFrame(values, index=self.dates, columns=self.symbols)
+
+
+class TradingDays(object):
+    """
+    各标的交易日的位置：compress将每列的交易日按时间顺序移到列首，expand为其逆变换;
+    两者都预先算好展平后的下标，每次变换只是一次np.take
+    """
+
+    def __init__(self, mask):
+        """
+        :param mask ndarray bool (日期 × 标的)，交易日为True
+        """
+        n_date, n_symbol = mask.shape
+        # 每列交易日在前(保持时间顺序)、停牌日在后的行号
+        order = np.argsort(~mask, axis=0, kind='stable')
+        inverse = np.empty_like(order)
+        np.put_along_axis(inverse, order, np.arange(n_date)[:, None], axis=0)
+        columns = np.arange(n_symbol)
+        self.counts = mask.sum(axis=0)
+        self.compress_index = (order * n_symbol + columns).ravel()
+        self.expand_index = (inverse * n_symbol + columns).ravel()
+        self.padding = np.arange(n_date)[:, None] >= self.counts
+        self.suspended = ~mask
+
+    def compress(self, X):
+        """
+        :param X ndarray (日期 × 标的)矩阵
+
+        :return Xc ndarray 每列的交易日在列首，其余位置为NaN
+        """
+        Xc = np.take(np.asarray(X, dtype=np.float64), self.compress_index).reshape(self.padding.shape)
+        Xc[self.padding] = np.nan
+        return Xc
+
+    def expand(self, Xc):
+        """
+        :param Xc ndarray compress后的矩阵
+
+        :return X ndarray 放回原日期，停牌日为NaN
+        """
+        X = np.take(np.asarray(Xc, dtype=np.float64), self.expand_index).reshape(self.padding.shape)
+        X[self.suspended] = np.nan
+        return X
+
+
+def calc_panel(panel, names, params=None):
+    """
+    面板模式计算指标，每个指标对全部标的一次向量化计算，停牌日不参与滚动、递推;
+
+    :param panel Panel 行情面板
+    :param names list 指标名，factorlib.catalog.INDICATORS中的键，如['MACD', 'DMI']
+    :param params dict 指标名 -> 参数dict，覆盖默认参数
+
+    :return result OrderedDict 指标名 -> OrderedDict(输出名 -> DataFrame(日期 × 标的))
+    """
+    days = TradingDays(panel.trading_mask())
+    index = pd.RangeIndex(len(panel.dates))
+    compressed = {field: pd.DataFrame(days.compress(values), index=index, columns=panel.symbols)
+                  for field, values in panel.fields.items()}
+    values = build_plan(names, params).evaluate(compressed)
+
+    result = OrderedDict()
+    for name, outputs in values.items():
+        result[name] = OrderedDict((key, panel.to_frame(days.expand(frame.to_numpy())))
+                                   for key, frame in outputs.items())
+    return result
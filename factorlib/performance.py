@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#策略表现统计的共用内核，对应各Demo中的statistic_performance
+"""
+原各策略逐日循环的结算规则为：
+    持仓发生变化(含第一日)时开始一段新持仓，该段的收益以首日收益为初值，之后非零的日收益依次复利；
+    持有期与盈利周期数只统计该段除首日外的日子；
+    持仓变化时结算上一段：多仓(>0)、空仓(<0)分别计次数、盈利次数(段收益>0)、持有期、盈利周期数；
+    最后一段不结算，持仓为0或NaN的段不计入。
+这里将持仓序列游程编码(run-length encoding)为若干持仓段，用reduceat按段一次性求和/求积，
+再按持仓方向汇总。二维(日期 × 标的)矩阵的各列首尾相接后按同一规则计算，列首强制开始新段，
+各列最后一段不结算，汇总时用bincount按列分组。
+"""
+
+#加载库
+import numpy as np
+import pandas as pd
+
+
+def calc_hold_segments(position):
+    """
+    将持仓序列游程编码为持仓段;
+
+    :param position ndarray/Series 持仓，一维序列或二维(日期 × 标的)矩阵
+
+    :return starts ndarray 各段在(按列展平后)序列中的起始下标
+    :return settled ndarray bool 各段是否被结算(每列最后一段为False)
+    :return col ndarray 各段所属的列号，一维输入时全为0
+    """
+    position = np.asarray(position, dtype=np.float64)
+    if position.ndim == 1:
+        position = position[:, None]
+    length = len(position)
+    flat = position.T.ravel()
+
+    is_start = np.ones(flat.shape, dtype=bool)
+    # NaN != NaN，与原循环一致，NaN的每一日都各自成段
+    is_start[1:] = flat[1:] != flat[:-1]
+    is_start[::length] = True
+    starts = np.flatnonzero(is_start)
+
+    settled = np.ones(starts.shape, dtype=bool)
+    # 下一段从列首开始的段即该列最后一段
+    settled[:-1] = starts[1:] % length != 0
+    settled[-1] = False
+    col = starts // length
+    return starts, settled, col
+
+
+def calc_hold_stats(hold_r, position):
+    """
+    按持仓段统计多仓、空仓的开仓次数、盈利次数、持有期与盈利周期数;
+
+    :param hold_r ndarray/Series 持仓收益，一维序列或二维(日期 × 标的)矩阵
+    :param position ndarray/Series 持仓，形状同hold_r
+
+    :return pos_hold_times ndarray/int 多仓开仓次数
+    :return pos_hold_win_times ndarray/int 多仓开仓盈利次数
+    :return pos_hold_period ndarray/int 多仓持有周期数
+    :return pos_hold_win_period ndarray/int 多仓持有盈利周期数
+    :return neg_hold_times ndarray/int 空仓开仓次数
+    :return neg_hold_win_times ndarray/int 空仓开仓盈利次数
+    :return neg_hold_period ndarray/int 空仓持有周期数
+    :return neg_hold_win_period ndarray/int 空仓持有盈利周期数
+    """
+    position = np.asarray(position, dtype=np.float64)
+    hold_r = np.asarray(hold_r, dtype=np.float64)
+    is_1d = position.ndim == 1
+    n_col = 1 if is_1d else position.shape[1]
+    if len(position) == 0:
+        zeros = np.zeros(n_col, dtype=np.int64)
+        return tuple(zeros[0] if is_1d else zeros.copy() for _ in range(8))
+
+    starts, settled, col = calc_hold_segments(position)
+    r = hold_r.T.ravel()
+    pos = position.T.ravel()
+    is_start = np.zeros(r.shape, dtype=bool)
+    is_start[starts] = True
+
+    # 段收益：首日收益为初值，其后仅非零(非NaN)的日收益参与复利
+    growth = 1 + r
+    growth[~is_start & ~(np.abs(r) > 0)] = 1
+    seg_r = np.multiply.reduceat(growth, starts) - 1
+    # 持有期与盈利周期数不含段首日
+    seg_period = np.add.reduceat((~is_start).astype(np.int64), starts)
+    seg_win_period = np.add.reduceat((~is_start & (r > 0)).astype(np.int64), starts)
+    seg_win = seg_r > 0
+    seg_pos = pos[starts]
+
+    stats = []
+    for side in (seg_pos > 0, seg_pos < 0):
+        mask = settled & side
+        seg_col = col[mask]
+        for values in (np.ones(mask.sum(), dtype=np.int64), seg_win[mask],
+                       seg_period[mask], seg_win_period[mask]):
+            stats.append(np.bincount(seg_col, weights=values, minlength=n_col).astype(np.int64))
+    if is_1d:
+        return tuple(s[0] for s in stats)
+    return tuple(stats)
+
+
+def calc_performance(pct_chg, position, r0=0.03, data_period=1440):
+    """
+    批量计算多条序列的策略表现，每条序列(列)输出一行数值型指标;
+
+    :param pct_chg DataFrame/ndarray 涨跌幅(%)，二维(日期 × 标的)矩阵，一维序列视为单列
+    :param position DataFrame/ndarray 持仓，形状同pct_chg
+    :param r0 float 无风险利率
+    :param data_period int 数据周期(分钟)，日线为1440
+
+    :return performance_df DataFrame 每列一行，列为'累计收益','多仓次数', '多仓胜率', '多仓平均持有期','空仓次数', '空仓胜率',
+                                    '空仓平均持有期','日胜率', '最大回撤', '年化收益/最大回撤','年化收益', '年化标准差', '年化夏普'
+    """
+    pct_chg = pd.DataFrame(pct_chg)
+    position = pd.DataFrame(np.asarray(position, dtype=np.float64).reshape(pct_chg.shape),
+                            index=pct_chg.index, columns=pct_chg.columns)
+
+    hold_r = pct_chg / 100 * position
+    hold_cumu_r = (1 + hold_r).cumprod() - 1
+    drawdown = (hold_cumu_r.cummax() - hold_cumu_r) / (1 + hold_cumu_r).cummax()
+    ex_hold_r = hold_r - r0 / (250 * 1440 / data_period)
+
+    (pos_hold_times, pos_hold_win_times, pos_hold_period, pos_hold_win_period,
+     neg_hold_times, neg_hold_win_times, neg_hold_period, neg_hold_win_period) = calc_hold_stats(hold_r.values,
+                                                                                                position.values)
+
+    v_hold_cumu_r = hold_cumu_r.iloc[-1].values
+    v_hold_period = (position.abs() > 0).sum().values
+    v_hold_win_period = (hold_r > 0).sum().values
+    v_max_dd = drawdown.max().values
+    v_annual_ret = np.power(1 + v_hold_cumu_r, 1 / (data_period / 1440 * len(pct_chg) / 250)) - 1
+    v_annual_std = ex_hold_r.std().values * np.sqrt(250 * 1440 / data_period)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        performance_df = pd.DataFrame({'累计收益': v_hold_cumu_r,
+                                       '多仓次数': pos_hold_times,
+                                       '多仓胜率': pos_hold_win_times / pos_hold_times,
+                                       '多仓平均持有期': pos_hold_period / pos_hold_times,
+                                       '空仓次数': neg_hold_times,
+                                       '空仓胜率': neg_hold_win_times / neg_hold_times,
+                                       '空仓平均持有期': neg_hold_period / neg_hold_times,
+                                       '日胜率': v_hold_win_period / v_hold_period,
+                                       '最大回撤': v_max_dd,
+                                       '年化收益/最大回撤': v_annual_ret / v_max_dd,
+                                       '年化收益': v_annual_ret,
+                                       '年化标准差': v_annual_std,
+                                       '年化夏普': v_annual_ret / v_annual_std},
+                                      index=pct_chg.columns)
+    return performance_df
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+#开平仓状态机(滞回)的共用内核，用于RSRS与牛熊指标等阈值类策略
+"""
+原各策略逐日循环的规则为：
+    若第i日满足开仓条件且当前空仓，则 flag[i] = 1，position[i+1] = 1；
+    若第i日满足平仓条件且当前持仓，则 flag[i] = -1，position[i+1] = 0；
+    否则 position[i+1] = position[i]。
+开平仓条件同时成立时，空仓则开仓、持仓则平仓，即状态翻转。
+这里将其改写为一次向量化计算：每日的持仓状态由最近一次"置位"事件(只满足开仓或只满足平仓)决定，
+再叠加此后"翻转"事件(两者同时满足)个数的奇偶性。一维序列与二维(日期 × 标的)矩阵按同一规则沿时间轴计算。
+"""
+
+#加载库
+import numpy as np
+
+
+def calc_hysteresis_position(enter, exit, start=0):
+    """
+    由开仓、平仓条件计算开平仓标志与持仓;
+
+    :param enter ndarray/Series bool 开仓条件，一维序列或二维(日期 × 标的)矩阵，NaN比较结果视为False
+    :param exit ndarray/Series bool 平仓条件，形状同enter
+    :param start int 从第start日开始判断(之前空仓)，对应原循环的起始下标
+
+    :return flag ndarray int8 开平仓标志，1为开仓，-1为平仓，0为无操作
+    :return position ndarray int8 持仓，1为持有标的，0为空仓，第i日持仓由第i-1日信号决定
+    """
+    enter = np.asarray(enter, dtype=bool).copy()
+    exit = np.asarray(exit, dtype=bool).copy()
+    length = len(enter)
+    flag = np.zeros(enter.shape, dtype=np.int8)
+    position = np.zeros(enter.shape, dtype=np.int8)
+    if length < 2:
+        return flag, position
+
+    # 只在[start, length-2]内判断，最后一日的信号没有下一日持仓承接
+    enter[:start] = False
+    exit[:start] = False
+    enter[-1] = False
+    exit[-1] = False
+
+    # 置位事件：只满足一个条件；翻转事件：同时满足
+    toggle = enter & exit
+    is_set = enter ^ exit
+    idx = np.arange(length).reshape((length,) + (1,) * (enter.ndim - 1))
+    last_set = np.maximum.accumulate(np.where(is_set, idx, -1), axis=0)
+    has_set = last_set >= 0
+    last_set = np.where(has_set, last_set, 0)
+
+    base = np.where(has_set, np.take_along_axis(enter, last_set, axis=0), False)
+    toggle_count = np.cumsum(toggle, axis=0)
+    toggle_since = toggle_count - np.where(has_set, np.take_along_axis(toggle_count, last_set, axis=0), 0)
+    state = (base ^ (toggle_since % 2 == 1)).astype(np.int8)
+
+    # 第i日收盘后的状态即第i+1日持仓
+    position[1:] = state[:-1]
+    flag[0] = state[0]
+    flag[1:] = state[1:] - state[:-1]
+    return flag, position
+
+
+class PositionUpdater(object):
+    """
+    逐日输入开仓、平仓条件，按calc_hysteresis_position的规则更新持仓状态，每次更新O(1);
+    批量版本不判断最后一日(没有下一日持仓承接)，增量版本每根新K线都判断，标志决定下一根K线的持仓
+    """
+
+    def __init__(self, start=0):
+        """
+        :param start int 从第start次更新开始判断(之前空仓)，与calc_hysteresis_position的start一致
+        """
+        self.start = start
+        self.count = 0
+        self.state = 0
+
+    def update(self, enter, exit):
+        """
+        :param enter bool 开仓条件，NaN比较结果为False
+        :param exit bool 平仓条件
+
+        :return flag int 开平仓标志，1为开仓，-1为平仓，0为无操作
+        :return position int 当日持仓，由上一日信号决定
+        """
+        position = self.state
+        if self.count >= self.start:
+            if enter and exit:
+                self.state = 1 - self.state
+            elif enter:
+                self.state = 1
+            elif exit:
+                self.state = 0
+        self.count += 1
+        return self.state - position, position
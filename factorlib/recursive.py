@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+#通达信递推类平滑指标的共用内核
+#EMA：Y =［2 * X + (N - 1) * Y’］ / (N + 1)，Y首值取X首值
+#SMA：Y = (M * X + (N - M) * Y’) / N
+#DMA：Y = A * X + (1 - A) * Y’，A可随时间变化
+"""
+三者都是一阶线性递推 Y = (a * X + b * Y’) / c 的特例，统一由calc_recursive_filter计算，a、b可为常数或随时间变化的序列。
+一维输入按时间递推；二维输入视为(日期 × 标的)矩阵，按行递推，同一时刻的全部标的一次向量化计算。
+实盘逐根K线更新用RecursiveFilter及EMAFilter、SMAFilter、DMAFilter，只保存上一期Y值，每次更新O(1)，与批量结果逐位相同。
+递推的运算顺序与原各Demo中逐元素 list.append 的写法完全一致，因此结果逐位相同
+(scipy.signal.lfilter 会先把系数归一化为 2/(N+1)、(N-1)/(N+1)，与原写法存在1e-12量级的差异，故不采用)。
+"""
+
+#加载库
+from itertools import accumulate, chain
+
+import numpy as np
+import pandas as pd
+
+
+def as_float_array(X):
+    """
+    将Series/DataFrame/list/ndarray统一转换为C连续的float64数组;
+
+    :param X Series/DataFrame/list/ndarray 输入序列，一维或二维(日期 × 标的)
+
+    :return X ndarray float64数组
+    """
+    if isinstance(X, (pd.Series, pd.DataFrame)):
+        X = X.to_numpy(dtype=np.float64)
+    return np.ascontiguousarray(X, dtype=np.float64)
+
+
+def calc_recursive_filter(X, a, b, c=1):
+    """
+    计算一阶线性递推 Y = (a * X + b * Y’) / c，其中Y’表示上一周期的Y值，Y首值取X首值;
+
+    :param X Series/ndarray/list 一维序列，或二维(日期 × 标的)矩阵
+    :param a float/ndarray X的系数，常数，或与X形状相同(二维时也可为按日期的一维序列)的时变系数
+    :param b float/ndarray Y’的系数，同a
+    :param c float 分母
+
+    :return Y ndarray 递推结果，形状与X相同
+    """
+    X = as_float_array(X)
+    if len(X) == 0:
+        return X.copy()
+    time_varying = np.ndim(a) > 0 or np.ndim(b) > 0
+    if time_varying:
+        a = _broadcast_coef(a, X.shape)
+        b = _broadcast_coef(b, X.shape)
+
+    if X.ndim == 1:
+        if not time_varying:
+            return np.fromiter(accumulate(X, lambda y, x: (a * x + b * y) / c),
+                               dtype=np.float64, count=len(X))
+        # 首项X[0]原样作为Y首值，其后每项为(x, a, b)
+        return np.fromiter(accumulate(chain([X[0]], zip(X[1:], a[1:], b[1:])),
+                                      lambda y, xab: (xab[1] * xab[0] + xab[2] * y) / c),
+                           dtype=np.float64, count=len(X))
+
+    Y = np.empty_like(X)
+    Y[0] = X[0]
+    if time_varying:
+        for i in range(1, len(X)):
+            Y[i] = (a[i] * X[i] + b[i] * Y[i - 1]) / c
+    else:
+        for i in range(1, len(X)):
+            Y[i] = (a * X[i] + b * Y[i - 1]) / c
+    return Y
+
+
+def _broadcast_coef(a, shape):
+    """
+    将常数、按日期的一维序列或与X同形状的系数扩展为X的形状;
+
+    :param a float/Series/ndarray 系数
+    :param shape tuple X的形状
+
+    :return a ndarray 只读的广播视图
+    """
+    a = as_float_array(a)
+    a = a.reshape(a.shape + (1,) * (len(shape) - a.ndim))
+    return np.broadcast_to(a, shape)
+
+
+def calc_EMA(X, N):
+    """
+    计算指数平均数指标(EMA)
+    Y = EMA(X，N)，则Y =［2 * X + (N - 1) * Y’］ / (N + 1)，其中Y’表示上一周期的Y值，Y首值取X首值。
+
+    :param X Series/ndarray/list 一维序列，或二维(日期 × 标的)矩阵
+    :param N int EMA(X，N)参数N
+
+    :return Y ndarray EMA(X，N)的值，形状与X相同
+    """
+    return calc_recursive_filter(X, 2, N - 1, N + 1)
+
+
+def calc_EMA_multi(X, N_list):
+    """
+    一次计算多个周期的EMA，同一时刻全部周期(及全部标的)一次向量化递推，结果与逐个calc_EMA逐位相同;
+
+    :param X Series/ndarray/list 一维序列，或二维(日期 × 标的)矩阵
+    :param N_list list EMA周期列表
+
+    :return Y ndarray 形状为X.shape + (len(N_list),)，Y[..., j]为EMA(X，N_list[j])
+    """
+    X = as_float_array(X)
+    N = np.asarray(N_list, dtype=np.float64)
+    b = N - 1
+    c = N + 1
+    Y = np.empty(X.shape + N.shape)
+    if len(X) == 0:
+        return Y
+    X2 = 2 * X[..., None]
+    Y[0] = X[0][..., None]
+    for i in range(1, len(X)):
+        Y[i] = (X2[i] + b * Y[i - 1]) / c
+    return Y
+
+
+def calc_SMA(X, N, M):
+    """
+    计算SMA(X,N,M)
+    Y=SMA(X,N,M) 则 Y=(M*X+(N-M)*Y')/N，其中Y'表示上一周期Y值，N必须大于M，Y首值取X首值。
+
+    :param X Series/ndarray/list 一维序列，或二维(日期 × 标的)矩阵
+    :param N int SMA(X,N,M)参数N
+    :param M int SMA(X,N,M)参数M
+
+    :return Y ndarray SMA(X,N,M)的值，形状与X相同
+    """
+    return calc_recursive_filter(X, M, N - M, N)
+
+
+def calc_DMA(X, A):
+    """
+    计算DMA(X,A)
+    DMA(X,A)为X的动态移动平均，若Y=DMA(X,A)，则 Y=A*X+(1-A)*Y'，其中Y'为上一期Y值，Y首值取X首值。
+
+    :param X Series/ndarray/list 一维序列，或二维(日期 × 标的)矩阵
+    :param A float/Series/ndarray 平滑因子，常数或随时间变化的序列，二维时可与X同形状或按日期的一维序列
+
+    :return Y ndarray DMA(X,A)的值，形状与X相同
+    """
+    A = A if np.ndim(A) == 0 else as_float_array(A)
+    return calc_recursive_filter(X, A, 1 - A)
+
+
+class RecursiveFilter(object):
+    """
+    逐个输入计算一阶线性递推 Y = (a * X + b * Y’) / c，每次更新O(1)，与calc_recursive_filter逐位相同;
+    """
+
+    def __init__(self, a, b, c=1):
+        """
+        :param a float X的系数，时变系数时为None，由update传入
+        :param b float Y’的系数，同a
+        :param c float 分母
+        """
+        self.a = a
+        self.b = b
+        self.c = c
+        # 上一期Y值，尚无输入时为None
+        self.y = None
+
+    def update(self, x, a=None, b=None):
+        """
+        :param x float 新值
+        :param a float 本期X的系数，None时用构造时的a
+        :param b float 本期Y’的系数，None时用构造时的b
+
+        :return y float 最新的Y值，首值取X首值
+        """
+        if self.y is None:
+            self.y = x
+        else:
+            a = self.a if a is None else a
+            b = self.b if b is None else b
+            self.y = (a * x + b * self.y) / self.c
+        return self.y
+
+
+class EMAFilter(RecursiveFilter):
+    """
+    逐个输入计算EMA(X，N)，与calc_EMA逐位相同;
+    """
+
+    def __init__(self, N):
+        """
+        :param N int EMA(X，N)参数N
+        """
+        RecursiveFilter.__init__(self, 2, N - 1, N + 1)
+
+
+class SMAFilter(RecursiveFilter):
+    """
+    逐个输入计算SMA(X,N,M)，与calc_SMA逐位相同;
+    """
+
+    def __init__(self, N, M):
+        """
+        :param N int SMA(X,N,M)参数N
+        :param M int SMA(X,N,M)参数M
+        """
+        RecursiveFilter.__init__(self, M, N - M, N)
+
+
+class DMAFilter(RecursiveFilter):
+    """
+    逐个输入计算DMA(X,A)，A每期随新值一起给出，与calc_DMA逐位相同;
+    """
+
+    def __init__(self):
+        RecursiveFilter.__init__(self, None, None)
+
+    def update(self, x, A):
+        """
+        :param x float 新值
+        :param A float 本期平滑因子
+
+        :return y float 最新的DMA值
+        """
+        return RecursiveFilter.update(self, x, A, 1 - A)
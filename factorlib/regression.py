@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+#滚动窗口一元线性回归(OLS)的共用内核，用于RSRS斜率、截距与拟合优度R²
+"""
+y = alpha + beta * x，窗口长度为n。
+对x、y、x²、y²、xy各做一次前缀和，任一窗口的五个和由前缀和相减得到，再由闭式解计算:
+    Sxx = Σx² - (Σx)²/n, Syy = Σy² - (Σy)²/n, Sxy = Σxy - ΣxΣy/n
+    beta = Sxy / Sxx, alpha = (Σy - beta * Σx) / n, R² = Sxy² / (Sxx * Syy)
+全程一次向量化计算，不构造任何模型对象；多个窗口长度共用同一组前缀和。
+前缀和前先减去各列首个有效值，避免价格量级较大时相减产生的精度损失(斜率与R²对平移不变)。
+含NaN(如停牌)的窗口结果为NaN。
+RollingOLS、RollingCorr为逐个输入的增量版本：五个和各用一个factorlib.rolling.RollingSum维护，新值加入、最旧值移出，每次更新O(1)。
+"""
+
+#加载库
+import numpy as np
+
+from factorlib.recursive import as_float_array
+from factorlib.rolling import RollingSum
+
+
+def calc_prefix_sums(x, y):
+    """
+    计算滚动回归所需的前缀和;
+
+    :param x Series/ndarray 自变量，一维序列或二维(日期 × 标的)矩阵，如最低价'low'
+    :param y Series/ndarray 因变量，形状同x，如最高价'high'
+
+    :return prefix dict 前缀和，含'x','y','xx','yy','xy','nan'以及平移量'x0','y0'，首行补0
+    """
+    x = as_float_array(x)
+    y = as_float_array(y)
+    if x.shape != y.shape:
+        raise ValueError('x与y的形状不一致: {} != {}'.format(x.shape, y.shape))
+
+    nan = np.isnan(x) | np.isnan(y)
+    # 各列首个有效值作为平移量
+    first = np.argmax(~nan, axis=0)
+    x0 = np.nan_to_num(np.take_along_axis(x, np.expand_dims(first, 0), axis=0)[0]) if x.ndim > 1 \
+        else np.nan_to_num(x[first])
+    y0 = np.nan_to_num(np.take_along_axis(y, np.expand_dims(first, 0), axis=0)[0]) if y.ndim > 1 \
+        else np.nan_to_num(y[first])
+    dx = np.where(nan, 0.0, x - x0)
+    dy = np.where(nan, 0.0, y - y0)
+
+    def cumsum(v):
+        out = np.zeros((len(v) + 1,) + v.shape[1:], dtype=np.float64)
+        np.cumsum(v, axis=0, out=out[1:])
+        return out
+
+    prefix = {'x': cumsum(dx),
+              'y': cumsum(dy),
+              'xx': cumsum(dx * dx),
+              'yy': cumsum(dy * dy),
+              'xy': cumsum(dx * dy),
+              'nan': cumsum(nan.astype(np.float64)),
+              'x0': x0,
+              'y0': y0}
+    return prefix
+
+
+def calc_window_ols(prefix, n, decimals=2):
+    """
+    由前缀和计算窗口长度为n的滚动回归;
+
+    :param prefix dict calc_prefix_sums的返回值
+    :param n int 以n天序列构造OLS
+    :param decimals int 取整斜率'beta'保留的小数位数，与原策略round(beta, 2)一致
+
+    :return result dict 'beta'取整斜率，'beta_raw'未取整斜率，'alpha'截距，'r2'拟合优度；
+                        形状同输入，前n-1行为NaN
+    """
+    length = len(prefix['x']) - 1
+    shape = (length,) + prefix['x'].shape[1:]
+    result = {key: np.full(shape, np.nan) for key in ('beta', 'beta_raw', 'alpha', 'r2')}
+    if n < 2 or length < n:
+        return result
+
+    def window(key):
+        s = prefix[key]
+        return s[n:] - s[:-n]
+
+    sx, sy, sxx, syy, sxy = window('x'), window('y'), window('xx'), window('yy'), window('xy')
+    valid = window('nan') == 0
+    Sxx = sxx - sx * sx / n
+    Syy = syy - sy * sy / n
+    Sxy = sxy - sx * sy / n
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = Sxy / Sxx
+        # 截距还原到平移前的坐标
+        alpha = (sy - beta * sx) / n + prefix['y0'] - beta * prefix['x0']
+        r2 = Sxy * Sxy / (Sxx * Syy)
+
+    result['beta_raw'][n - 1:] = np.where(valid, beta, np.nan)
+    result['beta'][n - 1:] = np.round(result['beta_raw'][n - 1:], decimals)
+    result['alpha'][n - 1:] = np.where(valid, alpha, np.nan)
+    result['r2'][n - 1:] = np.where(valid, r2, np.nan)
+    return result
+
+
+def calc_rolling_ols(x, y, n, decimals=2):
+    """
+    滚动窗口OLS回归 y = alpha + beta * x;
+
+    :param x Series/ndarray 自变量，一维序列或二维(日期 × 标的)矩阵，如最低价'low'
+    :param y Series/ndarray 因变量，形状同x，如最高价'high'
+    :param n int 以n天序列构造OLS
+    :param decimals int 取整斜率'beta'保留的小数位数
+
+    :return result dict 'beta','beta_raw','alpha','r2'，详见calc_window_ols
+    """
+    return calc_window_ols(calc_prefix_sums(x, y), n, decimals)
+
+
+def calc_rolling_ols_scan(x, y, n_list, decimals=2):
+    """
+    多个窗口长度的滚动OLS回归，共用同一组前缀和，用于参数n的敏感性分析;
+
+    :param x Series/ndarray 自变量，一维序列或二维(日期 × 标的)矩阵
+    :param y Series/ndarray 因变量，形状同x
+    :param n_list list 窗口长度列表，如range(10, 31)
+    :param decimals int 取整斜率'beta'保留的小数位数
+
+    :return results dict {n: result}，result详见calc_window_ols
+    """
+    prefix = calc_prefix_sums(x, y)
+    return {n: calc_window_ols(prefix, n, decimals) for n in n_list}
+
+
+def calc_rolling_corr(x, y, n):
+    """
+    滚动窗口皮尔逊相关系数，与对每个窗口调用Series.corr(method='pearson')一致：
+    窗口内成对剔除NaN，有效样本少于2个或方差为0时为NaN;
+
+    :param x Series/ndarray 一维序列或二维(日期 × 标的)矩阵
+    :param y Series/ndarray 形状同x
+    :param n int 窗口长度
+
+    :return corr ndarray 第i个值为[i-n+1, i]窗口的相关系数，前n-1行为NaN
+    """
+    x = as_float_array(x)
+    y = as_float_array(y)
+    corr = np.full(x.shape, np.nan)
+    if len(x) < n:
+        return corr
+
+    # 窗口视图，形状为(窗口数, n, ...)
+    shape = (len(x) - n + 1, n) + x.shape[1:]
+    xw = np.lib.stride_tricks.as_strided(x, shape=shape, strides=(x.strides[0],) + x.strides, writeable=False)
+    yw = np.lib.stride_tricks.as_strided(y, shape=shape, strides=(y.strides[0],) + y.strides, writeable=False)
+
+    valid = ~(np.isnan(xw) | np.isnan(yw))
+    count = valid.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mx = np.where(valid, xw, 0.0).sum(axis=1) / count
+        my = np.where(valid, yw, 0.0).sum(axis=1) / count
+        dx = np.where(valid, xw - mx[:, None], 0.0)
+        dy = np.where(valid, yw - my[:, None], 0.0)
+        c = (dx * dy).sum(axis=1) / np.sqrt((dx * dx).sum(axis=1) * (dy * dy).sum(axis=1))
+    corr[n - 1:] = np.where(count >= 2, c, np.nan)
+    return corr
+
+
+class RollingOLS(object):
+    """
+    逐个输入计算窗口长度为n的滚动回归 y = alpha + beta * x，每次更新O(1)，与calc_rolling_ols一致;
+    与批量版本相同，先减去首个有效的(x, y)，窗口内含NaN时结果为NaN
+    """
+
+    def __init__(self, n, decimals=2, resync=None):
+        """
+        :param n int 以n天序列构造OLS
+        :param decimals int 取整斜率'beta'保留的小数位数
+        :param resync int 窗口和精确重算的间隔，见RollingSum
+        """
+        self.n = n
+        self.decimals = decimals
+        self.x0 = None
+        self.y0 = None
+        # x、y、x²、y²、xy的窗口和
+        self.sums = [RollingSum(n, resync) for _ in range(5)]
+
+    def update(self, x, y):
+        """
+        :param x float 自变量，如最低价'low'
+        :param y float 因变量，如最高价'high'
+
+        :return beta float 取整斜率，窗口未满或含NaN时为NaN
+        :return beta_raw float 未取整斜率
+        :return alpha float 截距
+        :return r2 float 拟合优度
+        """
+        if x != x or y != y:
+            dx = dy = np.nan
+        else:
+            if self.x0 is None:
+                self.x0, self.y0 = x, y
+            dx = x - self.x0
+            dy = y - self.y0
+        sx, sy, sxx, syy, sxy = [np.float64(s.update(v)) for s, v in
+                                 zip(self.sums, (dx, dy, dx * dx, dy * dy, dx * dy))]
+        n = self.n
+        Sxx = sxx - sx * sx / n
+        Syy = syy - sy * sy / n
+        Sxy = sxy - sx * sy / n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            beta = Sxy / Sxx
+            alpha = (sy - beta * sx) / n + self.y0 - beta * self.x0 if self.x0 is not None else np.nan
+            r2 = Sxy * Sxy / (Sxx * Syy)
+        return float(np.round(beta, self.decimals)), float(beta), float(alpha), float(r2)
+
+
+class RollingCorr(object):
+    """
+    逐个输入计算窗口长度为n的滚动相关系数，每次更新O(1)，与calc_rolling_corr一致：
+    窗口内成对剔除NaN，前n-1个、有效样本少于2个或方差为0时为NaN;
+    """
+
+    def __init__(self, n, resync=None):
+        """
+        :param n int 窗口长度
+        :param resync int 窗口和精确重算的间隔，见RollingSum
+        """
+        self.n = n
+        self.count = 0
+        # 有效样本个数，以及x、y、x²、y²、xy的窗口和(无效样本记为0)
+        self.sums = [RollingSum(n, resync) for _ in range(6)]
+
+    def update(self, x, y):
+        """
+        :param x float 新值
+        :param y float 新值
+
+        :return corr float 最近n个值的相关系数
+        """
+        self.count += 1
+        if x != x or y != y:
+            values = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        else:
+            values = (1.0, x, y, x * x, y * y, x * y)
+        k, sx, sy, sxx, syy, sxy = [np.float64(s.update(v)) for s, v in zip(self.sums, values)]
+        if self.count < self.n or k < 2:
+            return np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return float((sxy - sx * sy / k) / np.sqrt((sxx - sx * sx / k) * (syy - sy * sy / k)))
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+#行情回放：把日线或由其生成的分钟线逐根推给一组增量指标与信号规则，测量实盘路径的吞吐、延迟与内存分配
+"""
+Pipeline把多个Updater(FIELDS为update依次需要的K线字段，OUTPUTS为返回的指标名，见factorlib.trend)与信号规则串起来：
+每根K线先依次更新全部指标，再把指定的指标输出交给信号规则(如signals.CrossSignal)，信号经signals.SignalPosition得到持仓。
+规则的输入为'指标名.输出名'或常数阈值。
+run_replay按给定速率(根/秒)或尽快推送K线，统计每秒K线数与每次更新耗时的分位数；
+trace_alloc为True时用tracemalloc统计回放前后净增的内存块数与峰值内存，开启后耗时偏大，宜与计时分开运行。
+"""
+
+#加载库
+import time
+import tracemalloc
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from factorlib.average import EXPMAUpdater, AMVUpdater
+from factorlib.energy import VRUpdater, BRARUpdater, CRUpdater
+from factorlib.rsrs import RSRSUpdater
+from factorlib.signals import CrossSignal, SignalPosition
+from factorlib.store import DATE_FORMAT
+from factorlib.trend import MACDUpdater, TRIXUpdater, UOSUpdater, JLHBUpdater, GDXUpdater, \
+    WVADUpdater, VPTUpdater, DMIUpdater, EMVUpdater
+from factorlib.volume import OBVUpdater
+
+#可回放的增量指标(缺省参数)，QR需要大盘收盘价，不在其中
+INDICATORS = OrderedDict([
+    ('MACD', MACDUpdater),
+    ('VMACD', lambda: MACDUpdater(field='volume')),
+    ('EXPMA', EXPMAUpdater),
+    ('TRIX', TRIXUpdater),
+    ('UOS', UOSUpdater),
+    ('JLHB', JLHBUpdater),
+    ('GDX', GDXUpdater),
+    ('AMV', AMVUpdater),
+    ('BRAR', BRARUpdater),
+    ('CR', CRUpdater),
+    ('VR', VRUpdater),
+    ('OBV', OBVUpdater),
+    ('WVAD', WVADUpdater),
+    ('VPT', VPTUpdater),
+    ('DMI', DMIUpdater),
+    ('EMV', EMVUpdater),
+    ('RSRS', RSRSUpdater),
+])
+
+#各指标的交叉信号规则：(A, B)，A上穿B买进、下穿B卖出；RSRS自带开平仓决策
+RULES = OrderedDict([
+    ('MACD', ('MACD.DIF', 'MACD.DEM')),
+    ('VMACD', ('VMACD.DIF', 'VMACD.DEM')),
+    ('EXPMA', ('EXPMA.EMA1', 'EXPMA.EMA2')),
+    ('TRIX', ('TRIX.TRIX', 'TRIX.TRMA')),
+    ('CR', ('CR.CR', 'CR.MA1')),
+    ('VR', ('VR.VR', 'VR.MAVR')),
+    ('OBV', ('OBV.OBV', 'OBV.MAOBV')),
+    ('WVAD', ('WVAD.WVAD', 'WVAD.MAWVAD')),
+    ('VPT', ('VPT.VPT', 'VPT.MAVPT')),
+    ('DMI', ('DMI.PDI', 'DMI.MDI')),
+    ('EMV', ('EMV.EMV', 'EMV.MAEMV')),
+])
+
+
+class Pipeline(object):
+    """
+    一组增量指标与信号规则，逐根K线更新;
+    """
+
+    def __init__(self, indicators, rules=()):
+        """
+        :param indicators list [(指标名, Updater)]
+        :param rules list [(规则名, 规则, 输入)]，规则含update，输入为'指标名.输出名'或常数组成的元组
+        """
+        self.indicators = list(indicators)
+        self.rules = list(rules)
+        fields = []
+        for _, updater in self.indicators:
+            fields.extend(field for field in updater.FIELDS if field not in fields)
+        self.FIELDS = tuple(fields)
+        self.OUTPUTS = tuple('{}.{}'.format(name, output) for name, updater in self.indicators
+                             for output in updater.OUTPUTS)
+        self.SIGNALS = tuple(name for name, _, _ in self.rules)
+
+        # 各指标的update及其输入字段在K线中的位置
+        self._indicators = [(updater.update, tuple(self.FIELDS.index(field) for field in updater.FIELDS))
+                            for _, updater in self.indicators]
+        # 各规则的update、输入(是否引用指标输出, 输出位置或常数)与持仓
+        index = {output: i for i, output in enumerate(self.OUTPUTS)}
+        self._rules = []
+        for name, rule, inputs in self.rules:
+            for x in inputs:
+                if isinstance(x, str) and x not in index:
+                    raise KeyError('规则{}的输入{}不是指标输出，可选{}'.format(name, x, self.OUTPUTS))
+            args = tuple((True, index[x]) if isinstance(x, str) else (False, x) for x in inputs)
+            self._rules.append((rule.update, args, SignalPosition()))
+
+    def update(self, bar):
+        """
+        :param bar tuple 一根K线，依次为FIELDS中的字段
+
+        :return values list 各指标的输出，依次为OUTPUTS
+        :return signals list 各规则的(信号, 持仓)，依次为SIGNALS
+        """
+        values = []
+        for update, fields in self._indicators:
+            values.extend(update(*[bar[i] for i in fields]))
+        signals = []
+        for update, args, position in self._rules:
+            signal = update(*[values[x] if is_output else x for is_output, x in args])
+            signals.append((signal, position.update(signal)))
+        return values, signals
+
+
+def make_pipeline(names=None):
+    """
+    由INDICATORS与RULES生成回放用的Pipeline，指标均为缺省参数;
+
+    :param names list 指标名，缺省为INDICATORS中的全部
+
+    :return pipeline Pipeline
+    """
+    names = list(INDICATORS) if names is None else list(names)
+    unknown = [name for name in names if name not in INDICATORS]
+    if unknown:
+        raise KeyError('未知的指标{}，可选{}'.format(unknown, list(INDICATORS)))
+    indicators = [(name, INDICATORS[name]()) for name in names]
+    rules = [(name, CrossSignal(), RULES[name]) for name in names if name in RULES]
+    return Pipeline(indicators, rules)
+
+
+def make_minute_bars(daily, bars_per_day=240, seed=0):
+    """
+    由日线生成分钟线：每日的分钟收益为随机游走，各分钟收益之和等于当日涨跌幅，成交量按随机权重分摊到各分钟;
+
+    :param daily DataFrame 日线行情，需要包含日期['date']、收盘价['close']、涨跌幅['pct_chg']、成交量['volume']
+    :param bars_per_day int 每日分钟数
+    :param seed int 随机数种子
+
+    :return minute DataFrame 分钟线，含['date']['open']['close']['high']['low']['volume']['amount']['pct_chg']
+    """
+    rng = np.random.RandomState(seed)
+    n_day = len(daily)
+    noise = rng.standard_normal((n_day, bars_per_day)) * 0.05
+    noise -= noise.mean(axis=1, keepdims=True)
+    pct_chg = (daily['pct_chg'].to_numpy(dtype=np.float64)[:, None] / bars_per_day + noise).ravel()
+    close = daily['close'].iloc[0] * np.cumprod(1 + pct_chg / 100)
+    open_ = np.empty_like(close)
+    open_[0] = close[0] / (1 + pct_chg[0] / 100)
+    open_[1:] = close[:-1]
+    # 最高、最低价在开收盘价之外随机延伸
+    wick = np.abs(rng.standard_normal((2, len(close)))) * 2e-4
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+
+    weight = rng.random_sample((n_day, bars_per_day)) + 0.5
+    weight /= weight.sum(axis=1, keepdims=True)
+    volume = np.floor(daily['volume'].to_numpy(dtype=np.float64)[:, None] * weight).astype(np.int64).ravel()
+
+    dates = np.asarray(daily['date'])
+    if dates.dtype.kind != 'M':
+        dates = pd.to_datetime(dates, format=DATE_FORMAT).to_numpy()
+    minutes = np.arange(bars_per_day) * np.timedelta64(1, 'm') + np.timedelta64(570, 'm')
+    dates = (dates.astype('datetime64[m]')[:, None] + minutes[None, :]).ravel()
+    return pd.DataFrame({'date': dates, 'open': open_, 'close': close, 'high': high, 'low': low,
+                         'volume': volume, 'amount': volume * (open_ + close) / 2, 'pct_chg': pct_chg})
+
+
+def run_replay(bars, pipeline, rate=None, trace_alloc=False):
+    """
+    逐根推送K线，统计吞吐、每次更新的耗时与内存分配;
+
+    :param bars DataFrame/list 行情，DataFrame需包含pipeline.FIELDS中的列；list的每个元素为按FIELDS排列的元组
+    :param pipeline Pipeline 增量指标与信号规则
+    :param rate float 每秒推送的K线数，None或0为尽快推送
+    :param trace_alloc bool 是否用tracemalloc统计内存分配
+
+    :return report OrderedDict 'bars'K线数，'seconds'总耗时，'bars_per_sec'每秒K线数，
+                               'p50_us'/'p99_us'/'max_us'每次更新耗时(微秒)，'signals'非零信号数，
+                               'lag_ms'按速率推送时最多落后于计划的毫秒数，
+                               trace_alloc时另有'alloc_blocks'净增内存块数、'alloc_kb'净增内存、'peak_kb'峰值内存
+    """
+    if isinstance(bars, pd.DataFrame):
+        bars = list(zip(*[bars[field].to_numpy(dtype=np.float64).tolist() for field in pipeline.FIELDS]))
+    n = len(bars)
+    latency = np.empty(n)
+    n_signal = 0
+    lag = 0.0
+    clock = time.perf_counter
+    update = pipeline.update
+
+    if trace_alloc:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+    start = clock()
+    for i, bar in enumerate(bars):
+        if rate:
+            wait = start + i / rate - clock()
+            if wait > 0:
+                time.sleep(wait)
+            elif -wait > lag:
+                lag = -wait
+        t0 = clock()
+        _, signals = update(bar)
+        latency[i] = clock() - t0
+        for signal, _ in signals:
+            if signal:
+                n_signal += 1
+    seconds = clock() - start
+
+    report = OrderedDict()
+    report['bars'] = n
+    report['seconds'] = seconds
+    report['bars_per_sec'] = n / seconds if seconds > 0 else np.nan
+    report['p50_us'] = np.percentile(latency, 50) * 1e6 if n else np.nan
+    report['p99_us'] = np.percentile(latency, 99) * 1e6 if n else np.nan
+    report['max_us'] = latency.max() * 1e6 if n else np.nan
+    report['signals'] = n_signal
+    report['lag_ms'] = lag * 1e3
+    if trace_alloc:
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        # 不计tracemalloc自身的内存
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'filename')
+        report['alloc_blocks'] = sum(stat.count_diff for stat in diff)
+        report['alloc_kb'] = sum(stat.size_diff for stat in diff) / 1024
+        report['peak_kb'] = peak / 1024
+    return report
@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+#滚动窗口类基础算子的共用内核
+"""
+一维输入按时间计算；二维输入视为(日期 × 标的)矩阵，沿时间轴(axis=0)逐列计算。
+计数类算子基于前缀和相减，整个序列一次向量化计算，复杂度O(n)，与窗口长度无关。
+加权平均WMA由X与j * X_j的分段前缀和相减得到，同样与窗口长度无关。
+RollingSum、RollingMean、RollingExtreme为逐个输入的增量版本，供实盘每来一根新K线时O(1)更新。
+"""
+
+#加载库
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+def calc_rolling_count(cond, N):
+    """
+    计算COUNT(cond, N)，即最近N期(含当期)条件成立的次数;
+
+    :param cond ndarray/Series bool 条件，一维序列或二维(日期 × 标的)矩阵，NaN比较结果视为False
+    :param N int 窗口长度
+
+    :return count ndarray int64 成立次数，前N-1期为已有数据内的次数
+    """
+    cond = np.asarray(cond, dtype=bool)
+    count = np.cumsum(cond, axis=0, dtype=np.int64)
+    count[N:] -= count[:-N].copy()
+    return count
+
+
+def calc_up_days(X):
+    """
+    计算CLOSE>REF(CLOSE,1)，即当期值大于上期值;
+
+    :param X ndarray/Series 一维序列或二维(日期 × 标的)矩阵
+
+    :return up ndarray bool 首期及与NaN比较的结果为False
+    """
+    X = np.asarray(X, dtype=np.float64)
+    up = np.zeros(X.shape, dtype=bool)
+    np.greater(X[1:], X[:-1], out=up[1:])
+    return up
+
+
+def calc_MA(X, M):
+    """
+    计算MA(X, M)，与Series.rolling(M).mean()一致;
+
+    :param X ndarray 一维序列或二维(日期 × 标的)矩阵
+    :param M int 均线周期
+
+    :return Y ndarray MA(X, M)的值，前M-1期为NaN
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        return pd.Series(X).rolling(M).mean().to_numpy()
+    return pd.DataFrame(X).rolling(M).mean().to_numpy()
+
+
+def _calc_window_sums(X, N_list):
+    """
+    对不含NaN的X计算多个窗口长度的滚动和，共用一次前缀和;
+
+    :param X ndarray float64或complex128，一维序列或二维(日期 × 标的)矩阵，不含NaN
+    :param N_list list 窗口长度列表
+
+    :return result dict {N: SUM(X, N)}，dtype同X，前N-1期为NaN
+    """
+    prefix = np.empty((len(X) + 1,) + X.shape[1:], dtype=X.dtype)
+    prefix[0] = 0
+    np.cumsum(X, axis=0, out=prefix[1:])
+
+    result = {}
+    for N in N_list:
+        Y = np.empty(X.shape, dtype=X.dtype)
+        Y[:N - 1] = np.nan
+        if len(X) >= N:
+            np.subtract(prefix[N:], prefix[:-N], out=Y[N - 1:])
+        result[N] = Y
+    return result
+
+
+def calc_rolling_sum_multi(X, N_list):
+    """
+    计算多个窗口长度的SUM(X, N)，共用一次前缀和，窗口内含NaN(如停牌)时结果为NaN;
+
+    :param X ndarray/Series 一维序列或二维(日期 × 标的)矩阵
+    :param N_list list 窗口长度列表
+
+    :return result dict {N: SUM(X, N)}，前N-1期为NaN
+    """
+    X = np.asarray(X, dtype=np.float64)
+    nan = np.isnan(X)
+    if not nan.any():
+        return _calc_window_sums(X, N_list)
+
+    result = _calc_window_sums(np.where(nan, 0.0, X), N_list)
+    nan_prefix = np.zeros((len(X) + 1,) + X.shape[1:], dtype=np.int64)
+    np.cumsum(nan, axis=0, out=nan_prefix[1:])
+    for N in N_list:
+        if len(X) >= N:
+            result[N][N - 1:][nan_prefix[N:] - nan_prefix[:-N] > 0] = np.nan
+    return result
+
+
+def calc_rolling_sum(X, N):
+    """
+    计算SUM(X, N)，基于前缀和相减，窗口内含NaN(如停牌)时结果为NaN;
+
+    :param X ndarray/Series 一维序列或二维(日期 × 标的)矩阵
+    :param N int 窗口长度
+
+    :return Y ndarray SUM(X, N)的值，前N-1期为NaN
+    """
+    return calc_rolling_sum_multi(X, [N])[N]
+
+
+def calc_positive_ratio_multi(A, B, N_list, clip=True):
+    """
+    一次计算多个窗口长度的SUM(MAX(A,0),N)/SUM(MAX(B,0),N)，如BR、CR、VRSI;
+    取正部与原Demo中的quzheng一致：NaN视为0，例如REF(CLOSE,1)首期的NaN不会使窗口失效
+
+    :param A ndarray/Series 分子，一维序列或二维(日期 × 标的)矩阵
+    :param B ndarray/Series 分母，形状同A
+    :param N_list list 窗口长度列表
+    :param clip bool 为False时不取正部，即SUM(A,N)/SUM(B,N)，如AR
+
+    :return result dict {N: 比值}，前N-1期为NaN，分母为0时为inf或NaN
+    """
+    A = np.asarray(A, dtype=np.float64)
+    B = np.asarray(B, dtype=np.float64)
+    result = {}
+    if not clip and (np.isnan(A).any() or np.isnan(B).any()):
+        # 窗口内含NaN时为NaN，分子、分母各自处理NaN
+        sum_A = calc_rolling_sum_multi(A, N_list)
+        sum_B = calc_rolling_sum_multi(B, N_list)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for N in N_list:
+                result[N] = np.divide(sum_A[N], sum_B[N], out=sum_A[N])
+        return result
+
+    # 分子、分母作为复数的实部、虚部，各窗口长度共用一次cumsum；复数加减按实部、虚部分别进行，
+    # 结果与分别累加逐位相同，耗时约为两次实数cumsum的一半
+    pair = np.empty(A.shape, dtype=np.complex128)
+    if clip:
+        # fmax在一方为NaN时取另一方，即NaN视为0，取正部后不再含NaN
+        np.fmax(A, 0.0, out=pair.real)
+        np.fmax(B, 0.0, out=pair.imag)
+    else:
+        pair.real = A
+        pair.imag = B
+    sums = _calc_window_sums(pair, N_list)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for N in N_list:
+            result[N] = sums[N].real / sums[N].imag
+    return result
+
+
+def calc_positive_ratio(A, B, N, clip=True):
+    """
+    计算SUM(MAX(A,0),N)/SUM(MAX(B,0),N)，见calc_positive_ratio_multi;
+
+    :param A ndarray/Series 分子，一维序列或二维(日期 × 标的)矩阵
+    :param B ndarray/Series 分母，形状同A
+    :param N int 窗口长度
+    :param clip bool 为False时不取正部，即SUM(A,N)/SUM(B,N)
+
+    :return ratio ndarray 前N-1期为NaN
+    """
+    return calc_positive_ratio_multi(A, B, [N], clip)[N]
+
+
+def _calc_segment_prefix(Y, K):
+    """
+    按长度K分段的前缀和，每段从0重新累计;
+
+    :param Y ndarray 一维序列或二维(日期 × 标的)矩阵，不含NaN
+    :param K int 段长
+
+    :return prefix ndarray 形状同Y，prefix[i]为Y在i所在段内从段首到i(含)的和
+    :return total ndarray 各段的和，第0维为段号
+    """
+    n_seg = -(-len(Y) // K)
+    padded = np.zeros((n_seg * K,) + Y.shape[1:])
+    padded[:len(Y)] = Y
+    prefix = np.cumsum(padded.reshape((n_seg, K) + Y.shape[1:]), axis=1)
+    return prefix.reshape(padded.shape)[:len(Y)], prefix[:, -1]
+
+
+def calc_WMA_multi(X, n_list):
+    """
+    计算多个窗口长度的WMA(X, n)，基于前缀和相减，复杂度O(n)，与窗口长度无关;
+    WMA(X,n)_t = (n * X_t + (n-1) * X_{t-1} +...+ 2 * X_{t-n+2} + X_{t-n+1}) / (n + (n-1) +...+ 2 + 1)
+    X_j的权重为j-(t-n)，记A = SUM(X_j)，C = SUM(j * X_j)，则分子为 C - (t-n) * A；权重与下标原点无关，
+    前缀和按长度K = max(n_list)分段、以段首为原点，j * X_j的量级不随序列长度增大，相减的舍入误差与逐项累加相当；
+    窗口最多跨两段，跨段时两段分别以各自段首为原点相加
+
+    :param X ndarray/Series 一维序列或二维(日期 × 标的)矩阵
+    :param n_list list 窗口长度列表
+
+    :return result dict {n: WMA(X, n)}，前n-1期及窗口内含NaN时为NaN，与Series.rolling(n).apply的结果一致
+    """
+    X = np.asarray(X, dtype=np.float64)
+    K = max(n_list)
+    nan = np.isnan(X)
+    X0 = np.where(nan, 0.0, X)
+    shape = (-1,) + (1,) * (X.ndim - 1)
+    t = np.arange(len(X))
+    local = (t % K).astype(np.float64).reshape(shape)
+    prefix_A, total_A = _calc_segment_prefix(X0, K)
+    prefix_C, total_C = _calc_segment_prefix(local * X0, K)
+    # 从j到段尾(含)的和
+    tail_A = total_A[t // K] - prefix_A + X0
+    tail_C = total_C[t // K] - prefix_C + local * X0
+
+    result = {}
+    for n in n_list:
+        Y = np.full(X.shape, np.nan)
+        if len(X) >= n:
+            end = t[n - 1:]
+            begin = end - n + 1
+            # 窗口起点t-n相对于终点所在段首的下标
+            offset = ((end - n) - end // K * K).astype(np.float64).reshape(shape)
+            cross = (begin // K != end // K).reshape(shape)
+            same_A = prefix_A[end] - prefix_A[begin] + X0[begin]
+            same_C = prefix_C[end] - prefix_C[begin] + local[begin] * X0[begin]
+            numerator = np.where(cross,
+                                 tail_C[begin] - (offset + K) * tail_A[begin] + prefix_C[end] - offset * prefix_A[end],
+                                 same_C - offset * same_A)
+            Y[n - 1:] = numerator / (n * (n + 1) / 2)
+            Y[calc_rolling_count(nan, n) > 0] = np.nan
+        result[n] = Y
+    return result
+
+
+def calc_WMA(X, n):
+    """
+    计算WMA(X, n)，见calc_WMA_multi;
+
+    :param X ndarray/Series 一维序列或二维(日期 × 标的)矩阵
+    :param n int WMA(X, n)参数N
+
+    :return Y ndarray WMA(X, n)的值，前n-1期为NaN
+    """
+    return calc_WMA_multi(X, [n])[n]
+
+
+class RollingSum(object):
+    """
+    逐个输入计算SUM(X, N)，每次更新O(1)，与Series.rolling(N).sum()一致：窗口未满或含NaN、inf时为NaN;
+    窗口存放在长度为N的环形缓冲区中，新值覆盖最旧的值；运行和每加一个、减一个都会累积舍入误差，
+    每resync次更新用math.fsum对窗口内的值精确重算一次，误差不随K线数增长，均摊仍为O(1)
+    """
+
+    def __init__(self, N, resync=None, min_periods=None):
+        """
+        :param N int 窗口长度
+        :param resync int 精确重算运行和的间隔(更新次数)，缺省为max(N, 1024)
+        :param min_periods int 窗口内至少需要的有限值个数，此时NaN、inf不参与求和；缺省为N，窗口未满或含NaN、inf时为NaN
+        """
+        self.N = N
+        self.min_periods = min_periods
+        self.resync = max(N, 1024) if resync is None else max(int(resync), 1)
+        self.buffer = [0.0] * N
+        # 下一个写入位置、已输入的个数、距上次重算的更新次数
+        self.pos = 0
+        self.count = 0
+        self.since_sync = 0
+        # 窗口内有限值的和与非有限值(NaN、inf)个数
+        self.total = 0.0
+        self.bad = 0
+
+    def _sync(self):
+        self.total = math.fsum(v for v in self.buffer if math.isfinite(v))
+        self.since_sync = 0
+
+    def update(self, x):
+        """
+        :param x float 新值
+
+        :return total float 最新的窗口和
+        """
+        x = float(x)
+        if self.count >= self.N:
+            old = self.buffer[self.pos]
+            if math.isfinite(old):
+                self.total -= old
+            else:
+                self.bad -= 1
+        self.buffer[self.pos] = x
+        self.pos = self.pos + 1 if self.pos + 1 < self.N else 0
+        self.count += 1
+        if math.isfinite(x):
+            self.total += x
+        else:
+            self.bad += 1
+        self.since_sync += 1
+        if self.since_sync >= self.resync:
+            self._sync()
+        if self.min_periods is not None:
+            return self.total if self.valid() >= self.min_periods else np.nan
+        if self.count < self.N or self.bad > 0:
+            return np.nan
+        return self.total
+
+    def valid(self):
+        """
+        :return valid int 窗口内有限值的个数
+        """
+        return min(self.count, self.N) - self.bad
+
+
+class RollingMean(object):
+    """
+    逐个输入计算MA(X, M)，每次更新O(1)，与Series.rolling(M).mean()一致：窗口未满或含NaN、inf时为NaN;
+    """
+
+    def __init__(self, M, resync=None, min_periods=None):
+        """
+        :param M int 均线周期
+        :param resync int 窗口和精确重算的间隔，见RollingSum
+        :param min_periods int 窗口内至少需要的有限值个数，此时为有限值的均值，与rolling(M, min_periods).mean()一致
+        """
+        self.M = M
+        self.sum = RollingSum(M, resync, min_periods)
+
+    def update(self, x):
+        """
+        :param x float 新值
+
+        :return mean float 最新的均值
+        """
+        total = self.sum.update(x)
+        if self.sum.min_periods is None:
+            return total / self.M
+        return total / self.sum.valid() if total == total else np.nan
+
+
+class RollingExtreme(object):
+    """
+    逐个输入计算N期滚动最大值(HHV)或最小值(LLV)，单调队列实现，每次更新均摊O(1);
+    与Series.rolling(N, min_periods).max()/min()一致，NaN不参与比较
+    """
+
+    def __init__(self, N, mode='max', min_periods=None):
+        """
+        :param N int 窗口长度
+        :param mode str 'max'为滚动最大值，'min'为滚动最小值
+        :param min_periods int 窗口内至少需要的非NaN个数，缺省为N
+        """
+        self.N = N
+        self.sign = 1.0 if mode == 'max' else -1.0
+        self.min_periods = N if min_periods is None else min_periods
+        self.count = 0
+        # (序号, sign * 值)，值单调递减，队首为窗口内的最大值
+        self.queue = deque()
+        # 窗口内非NaN的序号
+        self.valid = deque()
+
+    def update(self, x):
+        """
+        :param x float 新值
+
+        :return extreme float 最新的窗口最大(小)值，非NaN个数不足min_periods时为NaN
+        """
+        i = self.count
+        self.count += 1
+        if x == x:
+            v = self.sign * x
+            while self.queue and self.queue[-1][1] <= v:
+                self.queue.pop()
+            self.queue.append((i, v))
+            self.valid.append(i)
+        start = i - self.N + 1
+        while self.queue and self.queue[0][0] < start:
+            self.queue.popleft()
+        while self.valid and self.valid[0] < start:
+            self.valid.popleft()
+        if len(self.valid) < self.min_periods or not self.queue:
+            return np.nan
+        return self.sign * self.queue[0][1]
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#择时类RSRS的逐根K线增量版本，供分钟线等实盘场景每来一根新K线时更新，不必重算全部历史
+"""
+与择时类-RSRS/main_Demo.py中的各策略一致：
+    beta           最高价对最低价n日回归的斜率(取整到两位小数)，大于1开仓、小于0.8平仓      cal_nbeta
+    stdbeta        斜率的m日滚动标准分，大于0.7开仓、小于-0.7平仓                           cal_stdbeta
+    better_stdbeta 修正标准分：R² × 斜率在全部样本上的标准分                               cal_better_stdbeta
+    right_stdbeta  右偏标准分：修正标准分 × 斜率                                           cal_right_stdbeta
+    ma_beta        stdbeta配合前1日与前3日的20日均线方向                                   cal_ma_beta
+    vol_beta       stdbeta配合前10日标准分与成交量的相关系数                                cal_vol_beta
+回归的五个和由factorlib.regression.RollingOLS加入、移出维护；斜率已取整，乘以10^decimals后为整数，
+斜率分布的和与平方和用Python整数精确累加、移出(BetaDistribution)，标准分没有浮点误差累积。
+批量版本的修正标准分用的是全部样本(含未来数据)的均值与标准差，增量版本缺省用截至当前的全部历史，
+也可传入mu、sigma(如由历史数据估计)，此时与批量结果逐根一致。
+"""
+
+#加载库
+import math
+from collections import deque
+
+import numpy as np
+
+from factorlib.position import PositionUpdater
+from factorlib.regression import RollingOLS, RollingCorr
+from factorlib.rolling import RollingMean
+
+# 各策略的(标准分, 开仓阈值, 平仓阈值, 开始判断的K线序号)，开仓为标准分>开仓阈值，平仓为标准分<平仓阈值
+RULES = {
+    'beta': ('beta', 1, 0.8, 0),
+    'stdbeta': ('stdbeta', 0.7, -0.7, 0),
+    'better_stdbeta': ('better_stdbeta', 0.7, -0.7, 0),
+    'right_stdbeta': ('right_stdbeta', 0.7, -0.7, 0),
+    'ma_beta': ('stdbeta', 0.7, -0.7, 5),
+    'vol_beta': ('stdbeta', 0.7, -0.7, 10),
+}
+
+
+class BetaDistribution(object):
+    """
+    取整斜率的滚动(或全部历史)均值与标准差，每次更新O(1);
+    斜率乘以10^decimals后为整数，个数、和与平方和均为Python整数，加入、移出都是精确的
+    """
+
+    def __init__(self, window=None, decimals=2):
+        """
+        :param window int 窗口长度，None为全部历史
+        :param decimals int 斜率保留的小数位数
+        """
+        self.scale = 10 ** decimals
+        self.window = deque(maxlen=window) if window is not None else None
+        self.k = 0
+        self.S = 0
+        self.Q = 0
+
+    def update(self, beta):
+        """
+        :param beta float 取整斜率，NaN不参与统计
+        """
+        v = None if beta != beta else int(round(beta * self.scale))
+        if self.window is not None:
+            if len(self.window) == self.window.maxlen:
+                self._remove(self.window[0])
+            self.window.append(v)
+        if v is not None:
+            self.k += 1
+            self.S += v
+            self.Q += v * v
+
+    def _remove(self, v):
+        if v is not None:
+            self.k -= 1
+            self.S -= v
+            self.Q -= v * v
+
+    def mean(self):
+        """
+        :return mean float 均值，没有样本时为NaN
+        """
+        return self.S / (self.k * self.scale) if self.k > 0 else np.nan
+
+    def std(self, ddof=1):
+        """
+        :param ddof int 自由度修正，1与pandas的std一致，0与np.std一致
+
+        :return std float 标准差，样本数不足时为NaN
+        """
+        if self.k - ddof <= 0:
+            return np.nan
+        return math.sqrt((self.k * self.Q - self.S * self.S) / (self.k * (self.k - ddof) * self.scale * self.scale))
+
+
+class RSRSUpdater(object):
+    """
+    逐根K线增量计算RSRS斜率、标准分、修正标准分、右偏标准分，并按rule给出开平仓标志与持仓;
+    前n-1根K线回归窗口未满，标准分为NaN、空仓；此后与对应批量策略(从第n根K线开始的df1)逐根一致
+    """
+
+    FIELDS = ('high', 'low', 'close', 'volume')
+    OUTPUTS = ('beta', 'r2', 'stdbeta', 'better_stdbeta', 'right_stdbeta', 'flag', 'position')
+
+    def __init__(self, n=18, m=60, rule='stdbeta', mu=None, sigma=None, decimals=2, ma=20, corr_n=10):
+        """
+        :param n int 以n天序列构造OLS
+        :param m int 计算标准分所用周期天数m
+        :param rule str 开平仓规则，见RULES
+        :param mu float 修正标准分所用的斜率均值，缺省为截至当前全部历史的均值
+        :param sigma float 修正标准分所用的斜率标准差(ddof=0)，缺省为截至当前全部历史的标准差
+        :param decimals int 斜率保留的小数位数
+        :param ma int ma_beta所用均线周期
+        :param corr_n int vol_beta所用相关系数的窗口长度
+        """
+        if rule not in RULES:
+            raise ValueError('未知的RSRS规则: {}，可选{}'.format(rule, sorted(RULES)))
+        self.rule = rule
+        self.score, self.enter, self.exit, start = RULES[rule]
+        self.mu = mu
+        self.sigma = sigma
+        self.ols = RollingOLS(n, decimals)
+        self.rolling_beta = BetaDistribution(m, decimals)
+        self.all_beta = BetaDistribution(None, decimals)
+        self.position = PositionUpdater(start)
+        self.count = 0
+        self.n = n
+        if rule == 'ma_beta':
+            self.ma = RollingMean(ma, min_periods=1)
+            # 前3根K线的均线
+            self.pre_ma = deque([np.nan] * 3, maxlen=3)
+        if rule == 'vol_beta':
+            self.corr = RollingCorr(corr_n)
+            self.pre_corr = np.nan
+
+    def update(self, high, low, close, volume):
+        """
+        :param high float 最高价
+        :param low float 最低价
+        :param close float 收盘价
+        :param volume float 成交量
+
+        :return beta float 取整斜率
+        :return r2 float 拟合优度
+        :return stdbeta float 滚动标准分
+        :return better_stdbeta float 修正标准分
+        :return right_stdbeta float 右偏标准分
+        :return flag int 开平仓标志，1为开仓，-1为平仓，0为无操作
+        :return position int 当根K线的持仓，由上一根K线的信号决定
+        """
+        beta, _, _, r2 = self.ols.update(low, high)
+        self.count += 1
+        if self.count < self.n:
+            return np.nan, np.nan, np.nan, np.nan, np.nan, 0, 0
+
+        self.rolling_beta.update(beta)
+        self.all_beta.update(beta)
+        mu = self.all_beta.mean() if self.mu is None else self.mu
+        sigma = self.all_beta.std(ddof=0) if self.sigma is None else self.sigma
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stdbeta = float((np.float64(beta) - self.rolling_beta.mean()) / self.rolling_beta.std())
+            better_stdbeta = float(r2 * ((np.float64(beta) - mu) / sigma))
+        right_stdbeta = better_stdbeta * beta
+        scores = {'beta': beta, 'stdbeta': stdbeta, 'better_stdbeta': better_stdbeta, 'right_stdbeta': right_stdbeta}
+
+        score = scores[self.score]
+        enter = score > self.enter
+        exit = score < self.exit
+        if self.rule == 'ma_beta':
+            ma_1, ma_3 = self.pre_ma[-1], self.pre_ma[0]
+            self.pre_ma.append(self.ma.update(close))
+            enter = enter and ma_1 > ma_3
+            exit = exit and ma_1 < ma_3
+        elif self.rule == 'vol_beta':
+            enter = enter and self.pre_corr > 0
+            self.pre_corr = self.corr.update(stdbeta, volume)
+        flag, position = self.position.update(enter, exit)
+        return beta, r2, stdbeta, better_stdbeta, right_stdbeta, flag, position
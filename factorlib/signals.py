@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+#交易信号的共用算子，对应各Demo中逐日zip(X, X.shift(1))生成信号的calc_signal
+"""
+信号约定：1为买进，-1为卖出，0为无信号，类型为int8。
+条件类算子(cross_above、cross_below)返回bool数组，可用 &、| 组合后交给make_signal或select_signal生成信号。
+输入可为一维序列或二维(日期 × 标的)矩阵，阈值可为标量；与NaN的比较一律为False，与原循环一致。
+CrossSignal、SignalPosition为逐根K线的增量版本，供实盘与行情回放(factorlib.replay)使用。
+"""
+
+#加载库
+import numpy as np
+
+
+def prev(X, n=1):
+    """
+    前n日的值，即X.shift(n)，前n行为NaN，标量原样返回;
+
+    :param X Series/ndarray/float 一维序列、二维(日期 × 标的)矩阵或标量
+    :param n int 位移日数
+
+    :return pre_X ndarray/float
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 0:
+        return X
+    pre_X = np.empty(X.shape)
+    pre_X[:n] = np.nan
+    pre_X[n:] = X[:len(X) - n]
+    return pre_X
+
+
+def cross_above(A, B, inclusive=False):
+    """
+    A上穿B：前一日A < B，当日A > B;
+
+    :param A Series/ndarray 一维序列或二维(日期 × 标的)矩阵
+    :param B Series/ndarray/float 形状同A或标量
+    :param inclusive bool 为True时当日A >= B即视为上穿
+
+    :return cond ndarray bool
+    """
+    A = np.asarray(A, dtype=np.float64)
+    B = np.asarray(B, dtype=np.float64)
+    above = A >= B if inclusive else A > B
+    return above & (prev(A) < prev(B))
+
+
+def cross_below(A, B, inclusive=False):
+    """
+    A下穿B：前一日A > B，当日A < B;
+
+    :param A Series/ndarray 一维序列或二维(日期 × 标的)矩阵
+    :param B Series/ndarray/float 形状同A或标量
+    :param inclusive bool 为True时前一日A >= B即视为在上方，与cross_above(inclusive=True)对称
+
+    :return cond ndarray bool
+    """
+    A = np.asarray(A, dtype=np.float64)
+    B = np.asarray(B, dtype=np.float64)
+    pre_above = prev(A) >= prev(B) if inclusive else prev(A) > prev(B)
+    return (A < B) & pre_above
+
+
+def make_signal(buy, sell):
+    """
+    由买进、卖出条件生成信号，两者同时成立时取买进;
+
+    :param buy ndarray/Series bool 买进条件
+    :param sell ndarray/Series bool 卖出条件
+
+    :return signal ndarray int8 1为买进，-1为卖出，0为无信号
+    """
+    buy = np.asarray(buy, dtype=bool)
+    sell = np.asarray(sell, dtype=bool)
+    return buy.astype(np.int8) - (sell & ~buy).astype(np.int8)
+
+
+def select_signal(conds, values):
+    """
+    按顺序匹配条件生成信号，先成立的条件优先，对应原循环中的if/elif链;
+
+    :param conds list 条件列表，每个为bool数组
+    :param values list 各条件对应的信号值，1或-1
+
+    :return signal ndarray int8 无条件成立时为0
+    """
+    conds = [np.asarray(cond, dtype=bool) for cond in conds]
+    return np.select(conds, values, default=0).astype(np.int8)
+
+
+def enter_band(X, lower, upper):
+    """
+    X由带外进入[lower, upper]带：1为自下方上穿lower，-1为自上方下穿upper;
+
+    :param X Series/ndarray 一维序列或二维(日期 × 标的)矩阵
+    :param lower Series/ndarray/float 下轨
+    :param upper Series/ndarray/float 上轨
+
+    :return signal ndarray int8
+    """
+    return make_signal(cross_above(X, lower), cross_below(X, upper))
+
+
+def leave_band(X, lower, upper):
+    """
+    X离开[lower, upper]带：1为向上突破upper，-1为向下跌破lower;
+
+    :param X Series/ndarray 一维序列或二维(日期 × 标的)矩阵
+    :param lower Series/ndarray/float 下轨
+    :param upper Series/ndarray/float 上轨
+
+    :return signal ndarray int8
+    """
+    return make_signal(cross_above(X, upper), cross_below(X, lower))
+
+
+def calc_signal_position(signal, init=0):
+    """
+    由信号计算持仓：沿用最近一次信号，次日生效，之前的持仓为init;
+    等价于 signal.replace(0, NaN).fillna(method='ffill').shift(1).fillna(init)
+
+    :param signal ndarray/Series int8 信号，一维序列或二维(日期 × 标的)矩阵，0或NaN为无信号
+    :param init float 首个信号生效前的持仓
+
+    :return position ndarray float
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    position = np.full(signal.shape, float(init))
+    if len(signal) < 2:
+        return position
+
+    has_signal = (signal != 0) & ~np.isnan(signal)
+    idx = np.arange(len(signal)).reshape((len(signal),) + (1,) * (signal.ndim - 1))
+    last = np.maximum.accumulate(np.where(has_signal, idx, -1), axis=0)
+    state = np.where(last >= 0, np.take_along_axis(signal, np.maximum(last, 0), axis=0), init)
+    position[1:] = state[:-1]
+    return position
+
+
+class CrossSignal(object):
+    """
+    逐根K线判断A与B的交叉，与make_signal(cross_above(A, B), cross_below(A, B))一致;
+    """
+
+    def __init__(self, inclusive=False):
+        """
+        :param inclusive bool 同cross_above、cross_below的inclusive
+        """
+        self.inclusive = inclusive
+        self.pre_A = np.nan
+        self.pre_B = np.nan
+
+    def update(self, A, B):
+        """
+        :param A float 当日A
+        :param B float 当日B，可为固定阈值
+
+        :return signal int 1为A上穿B，-1为A下穿B，0为无信号
+        """
+        pre_A, pre_B = self.pre_A, self.pre_B
+        self.pre_A, self.pre_B = A, B
+        if self.inclusive:
+            if A >= B and pre_A < pre_B:
+                return 1
+            if A < B and pre_A >= pre_B:
+                return -1
+        else:
+            if A > B and pre_A < pre_B:
+                return 1
+            if A < B and pre_A > pre_B:
+                return -1
+        return 0
+
+
+class SignalPosition(object):
+    """
+    逐根K线由信号更新持仓，与calc_signal_position一致：沿用最近一次信号，次日生效;
+    """
+
+    def __init__(self, init=0):
+        """
+        :param init float 首个信号生效前的持仓
+        """
+        self.state = init
+
+    def update(self, signal):
+        """
+        :param signal int 当日信号，0或NaN为无信号
+
+        :return position float 当日持仓，由此前的信号决定
+        """
+        position = self.state
+        if signal != 0 and signal == signal:
+            self.state = signal
+        return position
@@ -0,0 +1,392 @@
+"""
+get_state把对象的状态(EMA/SMA/DMA的上一期值、环形缓冲区、单调队列、持仓状态等)转成只含内置类型的数据：
+对象 → {属性名: 状态}，deque → list，numpy标量 → Python数值，绑定方法等可调用对象 → None。
+set_state反过来把状态写回同类、同参数新建的对象：以目标对象为准逐层恢复，deque保留原maxlen，可调用对象保持不变，
+属性名不一致(类或参数不同)时报错。
+Snapshot按列存储：put把对象拆成布局(各属性的位置与类型)和三列值：float(含环形缓冲区等浮点数列表)、int、其余内置类型
+(None、bool、str及单调队列等长度可变的容器)；类、指标名、参数与布局相同的各标的(如几千个标的的同一组指标)归为一组，
+float、int按(标的 × 值)存成float64、int64矩阵，布局每组只存一份。
+文件格式：
+    MAGIC(6字节) + 头部struct('<HIQ')：格式版本、正文crc32、正文字节数 + 正文
+    正文为pickle(protocol 4)的{'groups': [(类名, 布局, float矩阵的字节, int矩阵的字节, 其余值的列表)],
+    'index': [(标的, 指标名, 参数json, 组号, 行号)]}，只含内置类型，读取时拒绝任何类与函数
+读取时各组的float、int矩阵由np.frombuffer直接引用文件内容，不逐个标的解析；restore按布局把该标的一行的值写回新建的对象，
+重启时不必等全部标的恢复完，每个标的在第一根K线到达时恢复即可(如作为TickPipeline的make_pipeline)。
+"""
+
+#加载库
+import copy
+import gc
+import io
+import json
+import os
+import pickle
+import struct
+import zlib
+from collections import OrderedDict, deque
+
+import numpy as np
+
+MAGIC = b'FLSNAP'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<HIQ')
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def get_state(obj):
+    """
+    对象的状态，只含内置类型;
+
+    :param obj object Updater、Pipeline等增量计算对象，或其中的值
+
+    :return state 对象为dict {属性名: 状态}，其余见模块说明
+    """
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes)):
+        return obj
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (list, deque)):
+        return [get_state(v) for v in obj]
+    if isinstance(obj, tuple):
+        return tuple(get_state(v) for v in obj)
+    if isinstance(obj, dict):
+        return {k: get_state(v) for k, v in obj.items()}
+    if callable(obj):
+        return None
+    if hasattr(obj, '__dict__'):
+        return {name: get_state(v) for name, v in vars(obj).items()}
+    raise TypeError('不支持保存的状态类型: {}'.format(type(obj).__name__))
+
+
+def _restore(current, value):
+    """以目标值current为准恢复value，返回恢复后的值"""
+    if callable(current):
+        return current
+    if isinstance(current, deque):
+        current.clear()
+        current.extend(value)
+        return current
+    if isinstance(current, tuple) and len(current) == len(value):
+        return tuple(_restore(c, v) for c, v in zip(current, value))
+    if isinstance(current, list) and len(current) == len(value) and value \
+            and (isinstance(value[0], (dict, list, tuple)) or callable(current[0])):
+        # 元素为对象、可调用对象(或含有它们)时逐个恢复，纯数值直接复制
+        return [_restore(c, v) for c, v in zip(current, value)]
+    if isinstance(value, list) and isinstance(current, tuple):
+        return tuple(value)
+    if hasattr(current, '__dict__') and not isinstance(current, type):
+        set_state(current, value)
+        return current
+    return value
+
+
+def set_state(obj, state):
+    """
+    把get_state的结果写回obj;
+
+    :param obj object 与保存时同类、同参数新建的对象
+    :param state dict get_state(对象)的返回值
+
+    :return obj object
+    """
+    names = vars(obj)
+    if set(names) != set(state):
+        raise ValueError('{}的属性与快照不一致: 多出{}，缺少{}'.format(
+            type(obj).__name__, sorted(set(state) - set(names)), sorted(set(names) - set(state))))
+    for name, value in state.items():
+        names[name] = _restore(names[name], value)
+    return obj
+
+
+class _PlainUnpickler(pickle.Unpickler):
+    """只允许内置类型的pickle读取"""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError('快照中不允许类或函数: {}.{}'.format(module, name))
+
+
+def _loads(data):
+    return _PlainUnpickler(io.BytesIO(data)).load()
+
+
+def _is_int64(x):
+    return type(x) is int and INT64_MIN <= x <= INT64_MAX
+
+
+def _flatten(value, F, I, O):
+    """
+    把value的值依次追加到F、I、O，返回布局;
+
+    :param value object 对象或其中的值
+    :param F list float值
+    :param I list int值
+    :param O list 其余内置类型的值
+
+    :return node tuple 布局：('f'/'i'/'o', 位置)为单个值，('F'/'I', 起点, 长度, 是否tuple)为float、int的列表，
+                        ('L', 位置, 是否tuple)为str等不可变值的列表，('g', 位置)为get_state的结果，
+                        ('c',)为可调用对象，('s', 是否tuple, 各元素的布局)为其余列表，
+                        ('x', ((属性名, 布局), ...), 属性名集合)为对象
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if type(value) is float:
+        F.append(value)
+        return 'f', len(F) - 1
+    if _is_int64(value):
+        I.append(value)
+        return 'i', len(I) - 1
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        O.append(value)
+        return 'o', len(O) - 1
+    if isinstance(value, (list, tuple)):
+        is_tuple = isinstance(value, tuple)
+        # 环形缓冲区等定长的数值列表整段存入F、I
+        if all(type(v) is float for v in value):
+            F.extend(value)
+            return 'F', len(F) - len(value), len(value), is_tuple
+        if all(_is_int64(v) for v in value):
+            I.extend(value)
+            return 'I', len(I) - len(value), len(value), is_tuple
+        if all(v is None or isinstance(v, (bool, str, bytes)) for v in value):
+            # 输出名等不可变值组成的列表作为一个值存入O
+            O.append(list(value))
+            return 'L', len(O) - 1, is_tuple
+        return 's', is_tuple, tuple(_flatten(v, F, I, O) for v in value)
+    if isinstance(value, (deque, dict)):
+        # 单调队列等长度随标的变化，作为一个值存入O，不让布局随长度分组
+        O.append(get_state(value))
+        return 'g', len(O) - 1
+    if callable(value):
+        return 'c',
+    if hasattr(value, '__dict__'):
+        attrs = tuple((name, _flatten(v, F, I, O)) for name, v in vars(value).items())
+        return 'x', attrs, frozenset(name for name, _ in attrs)
+    raise TypeError('不支持保存的状态类型: {}'.format(type(value).__name__))
+
+
+def _apply(node, current, F, I, O):
+    """
+    按布局把F、I、O中的值写回current，返回恢复后的值;
+
+    :param node tuple _flatten返回的布局
+    :param current object 新建对象中对应的值
+    :param F list float值
+    :param I list int值
+    :param O list 其余值
+
+    :return value object
+    """
+    kind = node[0]
+    if kind == 'x':
+        names = vars(current)
+        if names.keys() != node[2]:
+            raise ValueError('{}的属性与快照不一致: 多出{}，缺少{}'.format(
+                type(current).__name__, sorted(node[2] - set(names)), sorted(set(names) - node[2])))
+        for name, child in node[1]:
+            leaf = child[0]
+            if leaf == 'f':
+                names[name] = F[child[1]]
+            elif leaf == 'i':
+                names[name] = I[child[1]]
+            elif leaf == 'o':
+                names[name] = O[child[1]]
+            else:
+                names[name] = _apply(child, names[name], F, I, O)
+        return current
+    if kind == 'f':
+        return F[node[1]]
+    if kind == 'i':
+        return I[node[1]]
+    if kind == 'o':
+        return O[node[1]]
+    if kind == 'F' or kind == 'I':
+        values = (F if kind == 'F' else I)[node[1]:node[1] + node[2]]
+        return tuple(values) if node[3] else values
+    if kind == 'L':
+        return tuple(O[node[1]]) if node[2] else list(O[node[1]])
+    if kind == 'g':
+        # 同一行可以恢复多次，deque由_restore复制，其余容器先深复制
+        value = O[node[1]]
+        return _restore(current, value if isinstance(current, deque) else copy.deepcopy(value))
+    if kind == 'c':
+        return current
+    children = node[2]
+    if len(current) != len(children):
+        raise ValueError('快照中的列表长度为{}，新建的对象中为{}'.format(len(children), len(current)))
+    values = [_apply(child, c, F, I, O) for child, c in zip(children, current)]
+    return tuple(values) if node[1] else values
+
+
+class _Group(object):
+    """类、指标名、参数与布局相同的一组状态，每个标的一行"""
+
+    def __init__(self, class_name, layout, F=None, I=None, O=None):
+        self.class_name = class_name
+        self.layout = layout
+        # put时为每行一个数组的列表，load时为文件内容上的矩阵
+        self.F = [] if F is None else F
+        self.I = [] if I is None else I
+        self.O = [] if O is None else O
+
+    def append(self, F, I, O):
+        self.F.append(np.array(F, dtype=np.float64))
+        self.I.append(np.array(I, dtype=np.int64))
+        self.O.append(O)
+        return len(self.O) - 1
+
+    def row(self, k):
+        return self.F[k].tolist(), self.I[k].tolist(), self.O[k]
+
+
+class Snapshot(object):
+    """
+    一组增量计算对象的状态，键为(标的, 指标名, 参数);
+    """
+
+    def __init__(self):
+        # 键 → (组, 行号)；(类名, 指标名, 参数json, 布局) → 组
+        self.entries = OrderedDict()
+        self.groups = {}
+
+    @staticmethod
+    def make_key(symbol, name, params=None):
+        """
+        :param symbol str 标的代码
+        :param name str 指标名，如'MACD'，或自定义的Pipeline名
+        :param params dict/list 参数，None为缺省参数
+
+        :return key tuple (标的, 指标名, 参数的json)
+        """
+        return symbol, name, json.dumps(params, sort_keys=True)
+
+    def put(self, symbol, name, obj, params=None):
+        """
+        保存obj的当前状态，此后obj继续更新不影响已保存的状态;
+
+        :param symbol str 标的代码
+        :param name str 指标名
+        :param obj object 增量计算对象
+        :param params dict/list 构造obj所用的参数
+        """
+        key = self.make_key(symbol, name, params)
+        cls = type(obj)
+        class_name = '{}.{}'.format(cls.__module__, cls.__name__)
+        F, I, O = [], [], []
+        layout = _flatten(obj, F, I, O)
+        group_key = (class_name, key[1], key[2], layout)
+        group = self.groups.get(group_key)
+        if group is None:
+            group = self.groups[group_key] = _Group(class_name, layout)
+        elif not isinstance(group.F, list):
+            # 读取的快照上继续put：矩阵拆回每行一个数组
+            group.F, group.I, group.O = list(group.F), list(group.I), list(group.O)
+        self.entries[key] = (group, group.append(F, I, O))
+
+    def restore(self, symbol, name, factory, params=None):
+        """
+        新建对象并写回保存的状态，同一状态可以恢复多次;
+
+        :param symbol str 标的代码
+        :param name str 指标名
+        :param factory function 新建对象，应与保存时同类、同参数，如lambda: MACDUpdater(**params)
+        :param params dict/list 参数，与put时一致
+
+        :return obj object 恢复后的对象
+        """
+        key = self.make_key(symbol, name, params)
+        if key not in self.entries:
+            raise KeyError('快照中没有{}'.format(key))
+        group, k = self.entries[key]
+        obj = factory()
+        cls = type(obj)
+        if '{}.{}'.format(cls.__module__, cls.__name__) != group.class_name:
+            raise ValueError('{}的类为{}，快照中为{}'.format(key, cls.__name__, group.class_name))
+        return _apply(group.layout, obj, *group.row(k))
+
+    def restore_many(self, symbols, name, factory, params=None):
+        """
+        批量恢复多个标的，期间暂停循环垃圾回收：几千个标的各新建一组对象会反复触发对全部存活对象的分代回收;
+
+        :param symbols list 标的代码
+        :param name str 指标名
+        :param factory function 新建对象，见restore
+        :param params dict/list 参数，与put时一致
+
+        :return objs list 恢复后的对象，依次对应symbols
+        """
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return [self.restore(symbol, name, factory, params) for symbol in symbols]
+        finally:
+            if enabled:
+                gc.enable()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def save(self, path):
+        """
+        写入文件，先写临时文件再替换，写入中途退出不会破坏原快照;
+
+        :param path str 文件路径
+
+        :return size int 文件字节数
+        """
+        # 只写仍被引用的行，同一键多次put留下的旧行丢弃
+        rows = OrderedDict()
+        for key, (group, k) in self.entries.items():
+            rows.setdefault(id(group), (group, []))[1].append((key, k))
+        groups, index = [], []
+        for group, items in rows.values():
+            ks = [k for _, k in items]
+            F = np.array([group.F[k] for k in ks], dtype='<f8')
+            I = np.array([group.I[k] for k in ks], dtype='<i8')
+            groups.append((group.class_name, group.layout, F.tobytes(), I.tobytes(), [group.O[k] for k in ks]))
+            index.extend(key + (len(groups) - 1, row) for row, (key, _) in enumerate(items))
+        body = pickle.dumps({'groups': groups, 'index': index}, protocol=4)
+        header = MAGIC + HEADER.pack(FORMAT_VERSION, zlib.crc32(body), len(body))
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(body)
+        os.replace(tmp_path, path)
+        return len(header) + len(body)
+
+    @classmethod
+    def load(cls, path):
+        """
+        读取文件，校验格式版本与正文crc32，各组的float、int矩阵直接引用文件内容;
+
+        :param path str 文件路径
+
+        :return snapshot Snapshot
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('{}不是增量指标快照'.format(path))
+        version, crc, length = HEADER.unpack_from(data, len(MAGIC))
+        if version != FORMAT_VERSION:
+            raise ValueError('{}的快照格式版本为{}，当前只支持{}'.format(path, version, FORMAT_VERSION))
+        body = data[len(MAGIC) + HEADER.size:]
+        if len(body) != length or zlib.crc32(body) != crc:
+            raise ValueError('{}已损坏：正文长度或crc32不一致'.format(path))
+        content = _loads(body)
+        snapshot = cls()
+        groups = []
+        for class_name, layout, F, I, O in content['groups']:
+            n = len(O)
+            group = _Group(class_name, layout, np.frombuffer(F, dtype='<f8').reshape(n, -1),
+                           np.frombuffer(I, dtype='<i8').reshape(n, -1), O)
+            groups.append(group)
+        for symbol, name, params, g, k in content['index']:
+            group = groups[g]
+            snapshot.groups.setdefault((group.class_name, name, params, group.layout), group)
+            snapshot.entries[(symbol, name, params)] = (group, k)
+        return snapshot
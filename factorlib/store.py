@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+#行情数据仓库：各标的只导入一次，按列存为可内存映射的.npy文件，取代各策略目录下重复的CSV
+"""
+目录结构(缺省为仓库根目录下的data_store，可用环境变量FACTORLIB_STORE指定)：
+    objects/ab/abcdef....npy    每一列一个.npy文件，文件名为内容的sha1，内容相同的列只存一份
+    symbols/000001.json         标的清单：行数、来源CSV的sha1、各列的列名、dtype与对应的object
+    parsed/abcdef....json       按SCHEMA解析后的CSV清单，文件名为(标的代码, CSV内容sha1, SCHEMA)的sha1，格式同标的清单
+    sources/abcdef....json      CSV的路径、大小、修改时间与内容sha1，大小与修改时间不变时不必重新计算sha1
+读取时按清单np.load映射各列，不解析CSV，也不复制数值列：DataFrame的数值列、datetime64日期列直接引用映射数组
+(写时复制)，只有与pd.read_csv一致的字符串日期列需要逐行转成Python对象。
+CSV导入兼容现有格式：首行以BOM(\\ufeff)开头、首列为无列名的行号，读入后与pd.read_csv的结果一致(列名'Unnamed: 0')。
+原始CSV统一放在仓库根目录的data目录，load_market_data遇到仓库中没有的标的时自动从该目录导入，CSV内容变化后重新导入。
+load_market_frame为按显式类型解析的版本：去掉行号列，日期为datetime64，价格为float64，成交量为int64，
+首次读取时解析CSV并写入缓存，之后CSV内容不变就直接映射缓存。
+"""
+
+#加载库
+import glob
+import hashlib
+import io
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_ROOT = os.path.join(ROOT, 'data')
+STORE_ROOT = os.environ.get('FACTORLIB_STORE', os.path.join(ROOT, 'data_store'))
+
+#行情CSV各列的类型，不在其中的列按pandas推断
+SCHEMA = OrderedDict([
+    ('date', 'datetime64[ns]'),
+    ('open', 'float64'),
+    ('close', 'float64'),
+    ('high', 'float64'),
+    ('low', 'float64'),
+    ('volume', 'int64'),
+    ('amount', 'float64'),
+    ('amp', 'float64'),
+    ('pct_chg', 'float64'),
+    ('change', 'float64'),
+    ('turnover', 'float64'),
+])
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def read_market_csv(path):
+    """
+    按现有CSV格式读入行情，结果与pd.read_csv(path)一致;
+
+    :param path str CSV路径
+
+    :return mkt_data DataFrame
+    """
+    # utf-8-sig去掉文件头的BOM，首列无列名，pandas命名为'Unnamed: 0'
+    return pd.read_csv(path, encoding='utf-8-sig')
+
+
+def parse_market_csv(path, schema=SCHEMA):
+    """
+    按显式类型解析行情CSV，去掉无列名的行号列;
+
+    :param path str CSV路径
+    :param schema OrderedDict 列名 -> dtype，日期列为'datetime64[ns]'
+
+    :return mkt_data DataFrame 日期列为datetime64，其余列按schema
+    """
+    dates = [name for name, dtype in schema.items() if dtype.startswith('datetime64')]
+    dtype = {name: dtype for name, dtype in schema.items() if name not in dates}
+    mkt_data = pd.read_csv(path, encoding='utf-8-sig', dtype=dtype,
+                           usecols=lambda name: not name.startswith('Unnamed'))
+    # 指定格式后to_datetime整列一次转换，不逐行猜测格式
+    for name in dates:
+        if name in mkt_data:
+            mkt_data[name] = pd.to_datetime(mkt_data[name], format=DATE_FORMAT)
+    return mkt_data
+
+
+def file_sha1(path):
+    """
+    :param path str 文件路径
+
+    :return digest str 文件内容的sha1
+    """
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+class MarketDataStore(object):
+    """
+    按内容寻址的列式行情仓库;
+    """
+
+    def __init__(self, root=None):
+        """
+        :param root str 仓库目录，缺省为STORE_ROOT
+        """
+        self.root = root or STORE_ROOT
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], digest + '.npy')
+
+    def _manifest_path(self, symbol):
+        return os.path.join(self.root, 'symbols', symbol + '.json')
+
+    def _parsed_path(self, key):
+        return os.path.join(self.root, 'parsed', key + '.json')
+
+    def _source_path(self, path):
+        return os.path.join(self.root, 'sources', hashlib.sha1(path.encode('utf-8')).hexdigest() + '.json')
+
+    @staticmethod
+    def _read_json(path):
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f, object_pairs_hook=OrderedDict)
+
+    @staticmethod
+    def _write_json(path, obj):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+    def put_object(self, values):
+        """
+        写入一列，已存在相同内容时不重复写入;
+
+        :param values ndarray 一维数组，数值或定长字符串
+
+        :return digest str 内容的sha1
+        :return written bool 是否新写入
+        """
+        buffer = io.BytesIO()
+        np.save(buffer, values, allow_pickle=False)
+        data = buffer.getvalue()
+        digest = hashlib.sha1(data).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再改名，并发导入时不会读到写了一半的文件
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return digest, True
+
+    def source_sha1(self, path):
+        """
+        CSV内容的sha1，文件大小与修改时间与上次记录相同时直接取记录值;
+
+        :param path str 文件路径
+
+        :return digest str 文件内容的sha1
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        record_path = self._source_path(path)
+        record = self._read_json(record_path)
+        if record is not None and record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns:
+            return record['sha1']
+        digest = file_sha1(path)
+        self._write_json(record_path, OrderedDict([('path', path), ('size', stat.st_size),
+                                                   ('mtime_ns', stat.st_mtime_ns), ('sha1', digest)]))
+        return digest
+
+    def _build_manifest(self, symbol, mkt_data, source=None, source_sha1=None):
+        """写入各列，返回清单，'written'为新写入的列数"""
+        columns = []
+        written = 0
+        for column in mkt_data.columns:
+            values = mkt_data[column].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            digest, new = self.put_object(values)
+            written += new
+            columns.append(OrderedDict([('name', column), ('dtype', mkt_data[column].dtype.str), ('object', digest)]))
+        manifest = OrderedDict([('symbol', symbol), ('rows', len(mkt_data)), ('source', source),
+                                ('source_sha1', source_sha1), ('columns', columns)])
+        return manifest, written
+
+    def put(self, symbol, mkt_data, source=None, source_sha1=None):
+        """
+        写入一个标的的行情;
+
+        :param symbol str 标的代码
+        :param mkt_data DataFrame 行情数据
+        :param source str 来源文件路径，记录在清单中
+        :param source_sha1 str 来源文件的sha1
+
+        :return manifest dict 标的清单
+        """
+        manifest, written = self._build_manifest(symbol, mkt_data, source, source_sha1)
+        self._write_json(self._manifest_path(symbol), manifest)
+        manifest['written'] = written
+        return manifest
+
+    def import_csv(self, path, symbol=None):
+        """
+        导入一个现有格式的CSV;
+
+        :param path str CSV路径
+        :param symbol str 标的代码，缺省取文件名
+
+        :return manifest dict 标的清单，'written'为新写入的列数
+        """
+        symbol = symbol or os.path.splitext(os.path.basename(path))[0]
+        return self.put(symbol, read_market_csv(path), source=os.path.abspath(path), source_sha1=self.source_sha1(path))
+
+    def import_tree(self, root=ROOT, pattern='**/data/*.csv'):
+        """
+        导入目录下的全部CSV，内容相同的文件只导入一次;
+
+        :param root str 根目录
+        :param pattern str 相对root的glob模式
+
+        :return report DataFrame 每个文件一行，列为['path']['symbol']['sha1']['imported']
+        """
+        seen = {}
+        rows = []
+        for path in sorted(glob.glob(os.path.join(root, pattern), recursive=True)):
+            symbol = os.path.splitext(os.path.basename(path))[0]
+            digest = file_sha1(path)
+            imported = seen.get(symbol) != digest
+            if imported:
+                self.import_csv(path, symbol)
+                seen[symbol] = digest
+            rows.append((os.path.relpath(path, root), symbol, digest, imported))
+        return pd.DataFrame(rows, columns=['path', 'symbol', 'sha1', 'imported'])
+
+    def manifest(self, symbol):
+        """
+        :param symbol str 标的代码
+
+        :return manifest dict 标的清单，不存在时为None
+        """
+        return self._read_json(self._manifest_path(symbol))
+
+    def symbols(self):
+        """
+        :return symbols list 仓库中的全部标的
+        """
+        return sorted(os.path.splitext(name)[0] for name in os.listdir(os.path.join(self.root, 'symbols'))
+                      if name.endswith('.json')) if os.path.isdir(os.path.join(self.root, 'symbols')) else []
+
+    def _map_columns(self, manifest, mmap_mode='r'):
+        return OrderedDict((column['name'], np.load(self._object_path(column['object']), mmap_mode=mmap_mode))
+                           for column in manifest['columns'])
+
+    def _to_frame(self, manifest):
+        # 写时复制映射：各策略在行情上改写列时只复制被改写的页，不影响仓库文件
+        arrays = self._map_columns(manifest, mmap_mode='c')
+        # dtype与存储一致的列astype不复制，copy=False时DataFrame各列直接引用映射数组；
+        # 只有pd.read_csv兼容格式中的字符串日期列需要转成逐行的Python对象
+        return pd.DataFrame(OrderedDict((column['name'], arrays[column['name']].astype(column['dtype'], copy=False))
+                                        for column in manifest['columns']), copy=False)
+
+    def load_arrays(self, symbol):
+        """
+        映射一个标的的各列，不复制数据;
+
+        :param symbol str 标的代码
+
+        :return arrays OrderedDict 列名 -> 只读的内存映射数组
+        """
+        manifest = self.manifest(symbol)
+        if manifest is None:
+            raise KeyError('行情仓库中没有标的%s' % symbol)
+        return self._map_columns(manifest)
+
+    def load(self, symbol):
+        """
+        读取一个标的的行情，列名与dtype与pd.read_csv读入的原CSV一致;
+
+        :param symbol str 标的代码
+
+        :return mkt_data DataFrame
+        """
+        manifest = self.manifest(symbol)
+        if manifest is None:
+            raise KeyError('行情仓库中没有标的%s' % symbol)
+        return self._to_frame(manifest)
+
+    def load_csv(self, path, schema=SCHEMA):
+        """
+        按schema读取CSV，结果以(标的代码, CSV内容sha1, schema)为键缓存，标的代码取文件名，CSV内容不变时直接映射缓存，不再解析;
+
+        :param path str CSV路径
+        :param schema OrderedDict 列名 -> dtype
+
+        :return mkt_data DataFrame 与parse_market_csv(path, schema)一致
+        """
+        symbol = os.path.splitext(os.path.basename(path))[0]
+        source_sha1 = self.source_sha1(path)
+        # 内容相同、文件名不同的CSV各自缓存，清单中的标的代码与来源不会互相覆盖
+        key = hashlib.sha1(json.dumps([symbol, source_sha1, list(schema.items())]).encode('utf-8')).hexdigest()
+        manifest = self._read_json(self._parsed_path(key))
+        if manifest is None:
+            manifest, _ = self._build_manifest(symbol, parse_market_csv(path, schema),
+                                               source=os.path.abspath(path), source_sha1=source_sha1)
+            self._write_json(self._parsed_path(key), manifest)
+        return self._to_frame(manifest)
+
+
+def load_market_data(symbol, store=None):
+    """
+    各策略读取行情的统一入口，仓库中没有该标的或DATA_ROOT下的同名CSV内容已变化时从该CSV导入;
+
+    :param symbol str 标的代码，如'000300'
+    :param store MarketDataStore 行情仓库，缺省为STORE_ROOT
+
+    :return mkt_data DataFrame 股票历史行情数据，日维度
+    """
+    store = store or MarketDataStore()
+    path = os.path.join(DATA_ROOT, symbol + '.csv')
+    manifest = store.manifest(symbol)
+    if manifest is None or (os.path.exists(path) and manifest['source_sha1'] != store.source_sha1(path)):
+        store.import_csv(path, symbol)
+    return store.load(symbol)
+
+
+def load_market_frame(symbol, store=None):
+    """
+    按SCHEMA读取DATA_ROOT下的行情CSV，经行情仓库缓存;
+
+    :param symbol str 标的代码，如'000300'
+    :param store MarketDataStore 行情仓库，缺省为STORE_ROOT
+
+    :return mkt_data DataFrame 日期['date']为datetime64，价格为float64，成交量['volume']为int64，无行号列
+    """
+    store = store or MarketDataStore()
+    return store.load_csv(os.path.join(DATA_ROOT, symbol + '.csv'))
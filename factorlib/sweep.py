@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#指标参数网格寻优，对应各Demo中逐组参数运行 calc_* -> calc_signal -> calc_position -> statistic_performance 的流程
+"""
+MACD的全部参数组合一次计算：
+    n1、n2中出现的每个EMA周期只计算一次，得到(日期 × 周期)矩阵；
+    DIF按(n1, n2)组合(n1 < n2)取两列相减，DEM对全部DIF列、全部m一次递推(calc_EMA_multi)，OSC = DIF - DEM；
+    信号、持仓与表现统计均为二维矩阵算子，每个参数组合对应一列。
+参数组合按列分块计算，chunk_size控制每块的列数，内存占用与网格大小无关。
+各参数组合的结果与单独运行MACD_Demo逐位相同。
+"""
+
+#加载库
+import numpy as np
+import pandas as pd
+
+from factorlib.recursive import as_float_array, calc_EMA_multi
+from factorlib.signals import cross_above, cross_below, make_signal, calc_signal_position
+from factorlib.performance import calc_performance
+
+
+def iter_MACD_grid(close, n1_list, n2_list, m_list, chunk_size=2048):
+    """
+    分块计算全部有效参数组合(n1 < n2)的DIF、DEM、OSC;
+
+    :param close Series/ndarray 收盘价，一维序列
+    :param n1_list list 短周期取值
+    :param n2_list list 长周期取值
+    :param m_list list DEM周期取值
+    :param chunk_size int 每块的参数组合数(列数)上限
+
+    :return 生成器，每块为(params, DIF, DEM, OSC)，params为(列数 × 3)的int数组[n1, n2, m]，
+            DIF、DEM、OSC为(日期 × 列数)矩阵
+    """
+    close = as_float_array(close)
+    m_list = np.asarray(m_list, dtype=np.int64)
+    spans = np.union1d(n1_list, n2_list)
+    EMA = calc_EMA_multi(close, spans)
+
+    pairs = np.array([(n1, n2) for n1 in n1_list for n2 in n2_list if n1 < n2], dtype=np.int64).reshape(-1, 2)
+    idx1 = np.searchsorted(spans, pairs[:, 0])
+    idx2 = np.searchsorted(spans, pairs[:, 1])
+    step = max(1, chunk_size // max(len(m_list), 1))
+    for start in range(0, len(pairs), step):
+        sl = slice(start, start + step)
+        DIF = EMA[:, idx1[sl]] - EMA[:, idx2[sl]]
+        DEM = calc_EMA_multi(DIF, m_list)
+        n_pair = DIF.shape[1]
+        # 列按(n1, n2)组合为主序、m为次序排列
+        DIF = np.repeat(DIF, len(m_list), axis=1)
+        DEM = DEM.reshape(len(close), n_pair * len(m_list))
+        params = np.column_stack([np.repeat(pairs[sl], len(m_list), axis=0),
+                                  np.tile(m_list, n_pair)])
+        yield params, DIF, DEM, DIF - DEM
+
+
+def sweep_MACD(mkt_data, n1_list, n2_list, m_list, r0=0.03, data_period=1440, init=1,
+               sort_by='年化夏普', chunk_size=2048):
+    """
+    MACD参数网格寻优：OSC上穿0买进、下穿0卖出(MACD_Demo的方法4)，按表现指标排序;
+
+    :param mkt_data DataFrame 股票历史行情数据，日维度，需要包含收盘价['close']、涨跌幅['pct_chg']
+    :param n1_list list 短周期取值，如range(5, 25)
+    :param n2_list list 长周期取值，如range(10, 50)，只保留n1 < n2的组合
+    :param m_list list DEM周期取值，如range(5, 20)
+    :param r0 float 无风险利率
+    :param data_period int 数据周期(分钟)，日线为1440
+    :param init float 首个信号生效前的持仓，同MACD_Demo.calc_position
+    :param sort_by str 排序所依据的表现指标，降序，NaN排在最后
+    :param chunk_size int 每块的参数组合数上限
+
+    :return sweep_df DataFrame 每个参数组合一行，列为['n1']['n2']['m']及calc_performance的各项指标，按sort_by降序排列
+    """
+    pct_chg = as_float_array(mkt_data['pct_chg'])
+    frames = []
+    for params, DIF, DEM, OSC in iter_MACD_grid(mkt_data['close'], n1_list, n2_list, m_list, chunk_size):
+        signal = make_signal(cross_above(OSC, 0), cross_below(OSC, 0))
+        position = calc_signal_position(signal, init)
+        performance_df = calc_performance(np.repeat(pct_chg[:, None], len(params), axis=1), position,
+                                          r0=r0, data_period=data_period)
+        performance_df.insert(0, 'm', params[:, 2])
+        performance_df.insert(0, 'n2', params[:, 1])
+        performance_df.insert(0, 'n1', params[:, 0])
+        frames.append(performance_df)
+    sweep_df = pd.concat(frames, ignore_index=True)
+    return sweep_df.sort_values(sort_by, ascending=False, na_position='last', kind='mergesort').reset_index(drop=True)
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+#逐笔成交(tick)到K线的asyncio流水线：按标的聚合成时间K线或成交量K线，收盘后交给增量指标与信号规则
+"""
+流水线分三个协程，之间用有界队列连接：
+    feed       逐笔读取行情源(异步可迭代对象)，记下到达时间后放入tick队列，队列满时等待(反压)，行情源随之暂停
+    aggregate  按标的聚合tick，K线收盘时放入K线队列；时间K线在下一个周期的第一笔到达时收盘，成交量K线在累计量达到阈值时收盘
+    dispatch   每根收盘的K线交给该标的的factorlib.replay.Pipeline，更新增量指标与信号规则
+K线字段与各Demo的日线一致：open、high、low、close、volume、amount，另有周期起点time与笔数ticks。
+tick到信号的延迟为信号算出的时刻减去使K线收盘的那一笔tick的到达时刻，包含排队等待的时间。
+make_ticks与iter_ticks为进程内的模拟行情源，用于测试与基准测试。
+"""
+
+#加载库
+import asyncio
+import time
+from collections import namedtuple, OrderedDict
+
+import numpy as np
+
+#一笔成交：标的、成交时间(秒)、价格、成交量
+Tick = namedtuple('Tick', ['symbol', 'time', 'price', 'volume'])
+
+
+class BarAggregator(object):
+    """
+    单个标的的tick到K线聚合;
+    """
+
+    def __init__(self, kind='time', interval=60.0):
+        """
+        :param kind str 'time'为时间K线，'volume'为成交量K线
+        :param interval float 时间K线的周期(秒)或成交量K线的成交量阈值
+        """
+        if kind not in ('time', 'volume'):
+            raise ValueError('未知的K线类型: {}，可选time、volume'.format(kind))
+        self.kind = kind
+        self.interval = interval
+        self.bar = None
+
+    def _open(self, tick, received, start):
+        self.bar = {'time': start, 'open': tick.price, 'high': tick.price, 'low': tick.price, 'close': tick.price,
+                    'volume': tick.volume, 'amount': tick.price * tick.volume, 'ticks': 1, 'received': received}
+
+    def update(self, tick, received):
+        """
+        :param tick Tick 一笔成交，成交时间不减
+        :param received float 到达时刻(time.perf_counter)
+
+        :return bar dict 本笔使之收盘的K线，没有时为None；'received'为使之收盘的那一笔的到达时刻
+        """
+        closed = None
+        bar = self.bar
+        if self.kind == 'time':
+            start = tick.time - tick.time % self.interval
+            if bar is not None and start != bar['time']:
+                bar['received'] = received
+                closed = bar
+                bar = None
+            if bar is None:
+                self._open(tick, received, start)
+                return closed
+        elif bar is None:
+            self._open(tick, received, tick.time)
+            bar = self.bar
+            if bar['volume'] >= self.interval:
+                self.bar = None
+                return bar
+            return None
+
+        price = tick.price
+        if price > bar['high']:
+            bar['high'] = price
+        if price < bar['low']:
+            bar['low'] = price
+        bar['close'] = price
+        bar['volume'] += tick.volume
+        bar['amount'] += price * tick.volume
+        bar['ticks'] += 1
+        bar['received'] = received
+        if self.kind == 'volume' and bar['volume'] >= self.interval:
+            self.bar = None
+            return bar
+        return closed
+
+    def flush(self):
+        """
+        :return bar dict 未收盘的K线，没有时为None
+        """
+        bar, self.bar = self.bar, None
+        return bar
+
+
+class TickPipeline(object):
+    """
+    tick → K线 → 增量指标与信号规则的asyncio流水线，各标的各有一个BarAggregator与Pipeline;
+    """
+
+    def __init__(self, make_pipeline, kind='time', interval=60.0, tick_maxsize=10000, bar_maxsize=1000,
+                 on_bar=None):
+        """
+        :param make_pipeline function 输入标的代码，返回该标的的factorlib.replay.Pipeline
+        :param kind str 'time'为时间K线，'volume'为成交量K线
+        :param interval float 时间K线的周期(秒)或成交量K线的成交量阈值
+        :param tick_maxsize int tick队列的容量
+        :param bar_maxsize int K线队列的容量
+        :param on_bar function 每根K线更新完后调用on_bar(symbol, bar, values, signals)，可为None
+        """
+        self.make_pipeline = make_pipeline
+        self.kind = kind
+        self.interval = interval
+        self.tick_maxsize = tick_maxsize
+        self.bar_maxsize = bar_maxsize
+        self.on_bar = on_bar
+        self.aggregators = {}
+        self.pipelines = {}
+
+    async def _feed(self, source):
+        clock = time.perf_counter
+        queue = self.tick_queue
+        async for tick in source:
+            if queue.full():
+                t0 = clock()
+                await queue.put((tick, clock()))
+                self.stats['blocked'] += clock() - t0
+                self.stats['tick_blocked'] += 1
+            else:
+                queue.put_nowait((tick, clock()))
+            self.stats['ticks'] += 1
+            if queue.qsize() > self.stats['max_tick_queue']:
+                self.stats['max_tick_queue'] = queue.qsize()
+        await queue.put(None)
+
+    async def _put_bar(self, item):
+        queue = self.bar_queue
+        if queue.full():
+            t0 = time.perf_counter()
+            await queue.put(item)
+            self.stats['blocked'] += time.perf_counter() - t0
+            self.stats['bar_blocked'] += 1
+        else:
+            queue.put_nowait(item)
+        if queue.qsize() > self.stats['max_bar_queue']:
+            self.stats['max_bar_queue'] = queue.qsize()
+
+    async def _aggregate(self):
+        tick_queue = self.tick_queue
+        while True:
+            item = await tick_queue.get()
+            if item is None:
+                break
+            tick, received = item
+            aggregator = self.aggregators.get(tick.symbol)
+            if aggregator is None:
+                aggregator = self.aggregators[tick.symbol] = BarAggregator(self.kind, self.interval)
+            bar = aggregator.update(tick, received)
+            if bar is not None:
+                await self._put_bar((tick.symbol, bar))
+        for symbol, aggregator in self.aggregators.items():
+            bar = aggregator.flush()
+            if bar is not None:
+                await self._put_bar((symbol, bar))
+        await self.bar_queue.put(None)
+
+    async def _dispatch(self):
+        clock = time.perf_counter
+        latency = self.latency
+        while True:
+            item = await self.bar_queue.get()
+            if item is None:
+                break
+            symbol, bar = item
+            pipeline = self.pipelines.get(symbol)
+            if pipeline is None:
+                pipeline = self.pipelines[symbol] = self.make_pipeline(symbol)
+            values, signals = pipeline.update(tuple(bar[field] for field in pipeline.FIELDS))
+            latency.append(clock() - bar['received'])
+            self.stats['bars'] += 1
+            for signal, _ in signals:
+                if signal:
+                    self.stats['signals'] += 1
+            if self.on_bar is not None:
+                self.on_bar(symbol, bar, values, signals)
+
+    async def run(self, source):
+        """
+        运行流水线直到行情源结束，结束时未收盘的K线一并收盘;
+
+        :param source async iterable 行情源，逐个给出Tick
+
+        :return report OrderedDict 'ticks'、'bars'、'signals'个数，'seconds'总耗时，'ticks_per_sec'每秒tick数，
+                                   'p50_ms'/'p99_ms'/'max_ms' tick到信号的延迟(毫秒)，
+                                   'tick_blocked'/'bar_blocked'tick、K线队列满时上游等待的次数，'blocked_s'等待的总秒数，
+                                   'max_tick_queue'/'max_bar_queue'队列的最大长度
+        """
+        # 队列在运行中的事件循环里创建
+        self.tick_queue = asyncio.Queue(self.tick_maxsize)
+        self.bar_queue = asyncio.Queue(self.bar_maxsize)
+        self.latency = []
+        self.stats = dict.fromkeys(('ticks', 'bars', 'signals', 'tick_blocked', 'bar_blocked', 'max_tick_queue',
+                                    'max_bar_queue'), 0)
+        self.stats['blocked'] = 0.0
+        start = time.perf_counter()
+        await asyncio.gather(self._feed(source), self._aggregate(), self._dispatch())
+        seconds = time.perf_counter() - start
+
+        latency = np.array(self.latency) * 1e3
+        report = OrderedDict()
+        report['ticks'] = self.stats['ticks']
+        report['bars'] = self.stats['bars']
+        report['signals'] = self.stats['signals']
+        report['seconds'] = seconds
+        report['ticks_per_sec'] = self.stats['ticks'] / seconds if seconds > 0 else np.nan
+        for key, q in (('p50_ms', 50), ('p99_ms', 99), ('max_ms', 100)):
+            report[key] = np.percentile(latency, q) if len(latency) else np.nan
+        report['tick_blocked'] = self.stats['tick_blocked']
+        report['bar_blocked'] = self.stats['bar_blocked']
+        report['blocked_s'] = self.stats['blocked']
+        report['max_tick_queue'] = self.stats['max_tick_queue']
+        report['max_bar_queue'] = self.stats['max_bar_queue']
+        return report
+
+
+def make_ticks(symbols, n_ticks, tick_interval=1.0, prices=None, seed=0):
+    """
+    模拟逐笔成交：各标的价格为对数随机游走，成交时间间隔服从指数分布，成交量为100股的整数倍;
+
+    :param symbols list 标的代码
+    :param n_ticks int 全部标的合计的笔数
+    :param tick_interval float 单个标的相邻两笔的平均间隔(秒)
+    :param prices dict {标的: 初始价格}，缺省为10
+    :param seed int 随机数种子
+
+    :return ticks list 按成交时间排序的Tick
+    """
+    rng = np.random.RandomState(seed)
+    symbols = list(symbols)
+    # 全市场的成交时间，每笔随机分给一个标的
+    times = np.cumsum(rng.exponential(tick_interval / len(symbols), n_ticks))
+    owner = rng.randint(0, len(symbols), n_ticks)
+    log_ret = rng.standard_normal(n_ticks) * 5e-4
+    volume = rng.randint(1, 50, n_ticks) * 100
+    price = np.empty(n_ticks)
+    for k, symbol in enumerate(symbols):
+        rows = np.flatnonzero(owner == k)
+        base = 10.0 if prices is None else prices[symbol]
+        price[rows] = np.round(base * np.exp(np.cumsum(log_ret[rows])), 2)
+    return [Tick(symbols[k], t, p, v) for k, t, p, v in zip(owner.tolist(), times.tolist(), price.tolist(),
+                                                            volume.tolist())]
+
+
+async def iter_ticks(ticks, rate=None, batch=256):
+    """
+    把tick列表变成异步行情源;
+
+    :param ticks list Tick
+    :param rate float 每秒给出的tick数，None或0为尽快给出
+    :param batch int 尽快给出时每batch笔让出一次事件循环
+
+    :return ticks async generator 逐个给出Tick
+    """
+    clock = time.perf_counter
+    start = clock()
+    for i, tick in enumerate(ticks):
+        if rate:
+            wait = start + i / rate - clock()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        elif i % batch == 0:
+            await asyncio.sleep(0)
+        yield tick
+
+
+def run_tick_pipeline(pipeline, source):
+    """
+    在新的事件循环中运行TickPipeline，供同步代码调用;
+
+    :param pipeline TickPipeline 流水线
+    :param source async iterable 行情源
+
+    :return report OrderedDict 见TickPipeline.run
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(pipeline.run(source))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+#趋势类指标的逐根K线增量版本，供实盘每来一根新K线时更新，不必重算全部历史
+"""
+各Updater只保存递推所需的状态(上一期EMA/SMA/DMA值、滚动窗口)，每次update为O(1)，
+公式与运算顺序与对应Demo中的calc_*相同：
+只含递推的输出(MACD、VMACD、QR、JLHB，TRIX的TR与TRIX)与批量结果逐位相同；
+含滚动求和、均值的输出(TRMA、UOS、MAUOS、GDX、WVAD、VPT、DMI、EMV)与pandas rolling的差异在1e-12(相对)量级，
+滚动和定期精确重算(见factorlib.rolling.RollingSum)，误差不随K线数累积。
+FIELDS为update依次需要的K线字段，OUTPUTS为update依次返回的指标名。
+"""
+
+#加载库
+from collections import deque
+
+import numpy as np
+
+from factorlib.recursive import EMAFilter, SMAFilter, DMAFilter
+from factorlib.rolling import RollingMean, RollingSum, RollingExtreme
+
+
+class MACDUpdater(object):
+    """
+    逐根K线增量计算MACD(DIF、DEM、OSC)，与calc_MACD逐位相同;
+    VMACD为成交量的MACD，用MACDUpdater(field='volume')
+    """
+
+    OUTPUTS = ('DIF', 'DEM', 'OSC')
+
+    def __init__(self, n1=12, n2=26, m=9, field='close'):
+        """
+        :param n1 int 短期EMA参数
+        :param n2 int 长期EMA参数
+        :param m int DEM参数
+        :param field str 计算所用的K线字段，MACD为'close'，VMACD为'volume'
+        """
+        self.FIELDS = (field,)
+        self.ema1 = EMAFilter(n1)
+        self.ema2 = EMAFilter(n2)
+        self.dem = EMAFilter(m)
+
+    def update(self, x):
+        """
+        :param x float 新K线的收盘价(VMACD为成交量)
+
+        :return DIF float
+        :return DEM float
+        :return OSC float
+        """
+        DIF = self.ema1.update(x) - self.ema2.update(x)
+        DEM = self.dem.update(DIF)
+        return DIF, DEM, DIF - DEM
+
+
+class TRIXUpdater(object):
+    """
+    逐根K线增量计算TRIX和TRMA，TR为收盘价的三重EMA;
+    """
+
+    FIELDS = ('close',)
+    OUTPUTS = ('TR', 'TRIX', 'TRMA')
+
+    def __init__(self, n=12, m=9):
+        """
+        :param n int EMA参数
+        :param m int TRMA参数
+        """
+        self.emas = [EMAFilter(n) for _ in range(3)]
+        self.pre_TR = np.nan
+        self.trma = RollingMean(m)
+
+    def update(self, close):
+        """
+        :param close float 收盘价
+
+        :return TR float
+        :return TRIX float 首根K线为NaN
+        :return TRMA float 预热期内为NaN
+        """
+        TR = close
+        for ema in self.emas:
+            TR = ema.update(TR)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            TRIX = float((np.float64(TR) - self.pre_TR) / self.pre_TR * 100)
+        self.pre_TR = TR
+        return TR, TRIX, self.trma.update(TRIX)
+
+
+class QRUpdater(object):
+    """
+    逐根K线增量计算QR：个股与大盘N日涨幅之差的EMA(2)，与calc_QR逐位相同;
+    """
+
+    FIELDS = ('close', 'close_zs')
+    OUTPUTS = ('gg', 'zs', 'QR')
+
+    def __init__(self, n=21):
+        """
+        :param n int 涨幅周期N
+        """
+        self.n = n
+        # 最近n+1根K线的个股、大盘收盘价
+        self.close_gg = deque(maxlen=n + 1)
+        self.close_zs = deque(maxlen=n + 1)
+        self.qr = EMAFilter(2)
+
+    def _change(self, window, close):
+        window.append(close)
+        if len(window) <= self.n:
+            return np.nan
+        ref = np.float64(window[0])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return float((close - ref) / ref * 100)
+
+    def update(self, close, close_zs):
+        """
+        :param close float 个股收盘价
+        :param close_zs float 同一日的大盘指数收盘价，缺失为NaN
+
+        :return gg float 个股N日涨幅，前N根为NaN
+        :return zs float 大盘N日涨幅
+        :return QR float 两者之差(NaN取0)的EMA(2)
+        """
+        gg = self._change(self.close_gg, close)
+        zs = self._change(self.close_zs, close_zs)
+        diff = gg - zs
+        return gg, zs, self.qr.update(0.0 if diff != diff else diff)
+
+
+class UOSUpdater(object):
+    """
+    逐根K线增量计算UOS和MAUOS;
+    与calc_UOS相同，TL取最低价与昨收的较大值，MAUOS为UOS的EMA，UOS预热期的NaN会一直传递
+    """
+
+    FIELDS = ('high', 'low', 'close')
+    OUTPUTS = ('UOS', 'MAUOS')
+
+    def __init__(self, n1=7, n2=14, n3=28, m=6):
+        """
+        :param n1 int 参数N1
+        :param n2 int 参数N2
+        :param n3 int 参数N3
+        :param m int MAUOS参数M
+        """
+        self.n = (n1, n2, n3)
+        self.pre_close = np.nan
+        self.sums = [(RollingSum(n), RollingSum(n)) for n in self.n]
+        self.mauos = EMAFilter(m)
+
+    def update(self, high, low, close):
+        """
+        :param high float 最高价
+        :param low float 最低价
+        :param close float 收盘价
+
+        :return UOS float 预热期内为NaN
+        :return MAUOS float
+        """
+        # 与pandas的max(axis=1)一致，昨收为NaN时取当日值
+        TH = np.fmax(high, self.pre_close)
+        TL = np.fmax(low, self.pre_close)
+        self.pre_close = close
+        ACC = []
+        for num, den in self.sums:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ACC.append(np.float64(num.update(close - TL)) / den.update(TH - TL))
+        n1, n2, n3 = self.n
+        UOS = float((ACC[0] * n2 * n3 + ACC[1] * n1 * n3 + ACC[2] * n1 * n2) * 100 / (n1 * n2 + n1 * n3 + n2 * n3))
+        return UOS, self.mauos.update(UOS)
+
+
+class JLHBUpdater(object):
+    """
+    逐根K线增量计算绝路航标B、VAR2和JLHB信号，与calc_JLHB逐位相同;
+    与calc_JLHB相同，HHV取的是最高价的60日最低值
+    """
+
+    FIELDS = ('high', 'low', 'close')
+    OUTPUTS = ('B', 'VAR2', 'JLHB')
+
+    def __init__(self, n=7, m=5, N=60):
+        """
+        :param n int B的SMA参数
+        :param m int VAR2的SMA参数
+        :param N int 最高、最低价的窗口长度
+        """
+        self.llv = RollingExtreme(N, 'min', min_periods=1)
+        self.hhv = RollingExtreme(N, 'min', min_periods=1)
+        self.b = SMAFilter(n, 1)
+        self.var2 = SMAFilter(m, 1)
+        self.pre_above = False
+
+    def update(self, high, low, close):
+        """
+        :param high float 最高价
+        :param low float 最低价
+        :param close float 收盘价
+
+        :return B float
+        :return VAR2 float
+        :return JLHB int VAR2下穿B且B<40时为50，否则为0
+        """
+        LLV = self.llv.update(low)
+        HHV = self.hhv.update(high)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            VAR1 = float((np.float64(close) - LLV) / (HHV - LLV) * 80)
+        B = self.b.update(VAR1)
+        VAR2 = self.var2.update(B)
+        above = VAR2 > B
+        JLHB = 50 if (not above) and self.pre_above and B < 40 else 0
+        self.pre_above = above
+        return B, VAR2, JLHB
+
+
+class GDXUpdater(object):
+    """
+    逐根K线增量计算轨道线JAX、UPPER、LOWER;
+    calc_GDX把前n-1期无法计算的平滑因子AA用第n期的值向前填充(用到了未来数据)，
+    这里先缓存前n-1根K线，到第n根时用同一个AA补算JAX，此后每根K线O(1)更新，结果与批量一致；前n-1根返回NaN
+    """
+
+    FIELDS = ('high', 'low', 'close')
+    OUTPUTS = ('JAX', 'UPPER', 'LOWER')
+
+    def __init__(self, n=30, m=9):
+        """
+        :param n int 均线参数N
+        :param m int 轨道宽度，百分比
+        """
+        self.m = m
+        self.ma = RollingMean(n)
+        self.jax = DMAFilter()
+        # 第一个有效AA之前的收盘价
+        self.pending = []
+
+    def update(self, high, low, close):
+        """
+        :param high float 最高价
+        :param low float 最低价
+        :param close float 收盘价
+
+        :return JAX float 前n-1根为NaN
+        :return UPPER float
+        :return LOWER float
+        """
+        MA = self.ma.update(close)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            AA = float(abs((2 * np.float64(close) + high + low) / 4 - MA) / MA)
+        if AA != AA and self.jax.y is None:
+            self.pending.append(close)
+            return np.nan, np.nan, np.nan
+        for pending_close in self.pending:
+            self.jax.update(pending_close, AA)
+        self.pending = []
+        JAX = self.jax.update(close, AA)
+        return JAX, (1 + self.m / 100) * JAX, (1 - self.m / 100) * JAX
+
+
+class WVADUpdater(object):
+    """
+    逐根K线增量计算WVAD和MAWVAD，与calc_WVAD一致;
+    WVAD = SUM(VOLUME * (CLOSE-OPEN) / (HIGH-LOW), n)，最高价等于最低价的K线会使其所在窗口为NaN
+    """
+
+    FIELDS = ('high', 'low', 'open', 'close', 'volume')
+    OUTPUTS = ('WVAD', 'MAWVAD')
+
+    def __init__(self, n=24, m=6):
+        """
+        :param n int WVAD参数n
+        :param m int MAWVAD参数m
+        """
+        self.wvad = RollingSum(n)
+        self.mawvad = RollingMean(m)
+
+    def update(self, high, low, open_, close, volume):
+        """
+        :param high float 最高价
+        :param low float 最低价
+        :param open_ float 开盘价
+        :param close float 收盘价
+        :param volume float 成交量
+
+        :return WVAD float 预热期内为NaN
+        :return MAWVAD float
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            X = float(volume * (np.float64(close) - open_) / (high - low))
+        WVAD = self.wvad.update(X)
+        return WVAD, self.mawvad.update(WVAD)
+
+
+class VPTUpdater(object):
+    """
+    逐根K线增量计算VPT和MAVPT，与calc_VPT一致;
+    VPT = SUM(VOLUME * (CLOSE-REF(CLOSE,1)) / REF(CLOSE,1), n)
+    """
+
+    FIELDS = ('close', 'volume')
+    OUTPUTS = ('VPT', 'MAVPT')
+
+    def __init__(self, n=51, m=6):
+        """
+        :param n int VPT参数n
+        :param m int MAVPT参数m
+        """
+        self.pre_close = np.nan
+        self.vpt = RollingSum(n)
+        self.mavpt = RollingMean(m)
+
+    def update(self, close, volume):
+        """
+        :param close float 收盘价
+        :param volume float 成交量
+
+        :return VPT float 预热期内为NaN
+        :return MAVPT float
+        """
+        pre_close = self.pre_close
+        self.pre_close = close
+        with np.errstate(divide='ignore', invalid='ignore'):
+            X = float(volume * (np.float64(close) - pre_close) / pre_close)
+        VPT = self.vpt.update(X)
+        return VPT, self.mavpt.update(VPT)
+
+
+class DMIUpdater(object):
+    """
+    逐根K线增量计算PDI、MDI、ADX和ADXR，与calc_DMI一致;
+    DMIp、DMIn取两日最高(低)价与昨日最高(低)价之差，只保留较大的一方，TR为真实波幅
+    """
+
+    FIELDS = ('high', 'low', 'close')
+    OUTPUTS = ('PDI', 'MDI', 'ADX', 'ADXR')
+
+    def __init__(self, n=14, m=6):
+        """
+        :param n int PDI、MDI参数n
+        :param m int ADX参数m
+        """
+        self.hhv = RollingExtreme(2, 'max')
+        self.llv = RollingExtreme(2, 'min')
+        self.pre_high = np.nan
+        self.pre_low = np.nan
+        self.pre_close = np.nan
+        self.sum_p = RollingSum(n)
+        self.sum_n = RollingSum(n)
+        self.sum_tr = RollingSum(n)
+        self.adx = RollingMean(m)
+        # 最近m+1期的ADX，队首为m期前的值
+        self.adx_window = deque([np.nan] * (m + 1), maxlen=m + 1)
+
+    def update(self, high, low, close):
+        """
+        :param high float 最高价
+        :param low float 最低价
+        :param close float 收盘价
+
+        :return PDI float 预热期内为NaN
+        :return MDI float
+        :return ADX float
+        :return ADXR float
+        """
+        DMIp = self.hhv.update(high) - self.pre_high
+        DMIn = self.pre_low - self.llv.update(low)
+        # 与calc_DMI相同，DMIn用的是已经处理过的DMIp
+        DMIp = DMIp * (DMIp >= DMIn)
+        DMIn = DMIn * (DMIp < DMIn)
+        # 与pandas的max(axis=1)一致，昨收为NaN时只取当日最高价与最低价之差
+        TR = np.fmax(np.fmax(high - low, abs(high - self.pre_close)), abs(low - self.pre_close))
+        self.pre_high, self.pre_low, self.pre_close = high, low, close
+
+        sum_tr = np.float64(self.sum_tr.update(TR))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            PDI = float(self.sum_p.update(DMIp) * 100 / sum_tr)
+            MDI = float(self.sum_n.update(DMIn) * 100 / sum_tr)
+            DX = float(abs(np.float64(PDI) - MDI) / (PDI + MDI) * 100)
+        ADX = self.adx.update(DX)
+        self.adx_window.append(ADX)
+        return PDI, MDI, ADX, (ADX + self.adx_window[0]) / 2
+
+
+class EMVUpdater(object):
+    """
+    逐根K线增量计算EMV和MAEMV，与calc_EMV一致;
+    EMV = MA(MID * MA(VOLUME,n) / VOLUME * (HIGH-LOW) / MA(HIGH-LOW,n), n)，
+    MID = 100 * (HIGH + LOW - REF(HIGH,1) - REF(LOW,1)) / (HIGH + LOW)
+    """
+
+    FIELDS = ('high', 'low', 'volume')
+    OUTPUTS = ('EMV', 'MAEMV')
+
+    def __init__(self, n=14, m=9):
+        """
+        :param n int EMV参数n
+        :param m int MAEMV参数m
+        """
+        self.pre_high = np.nan
+        self.pre_low = np.nan
+        self.ma_vol = RollingMean(n)
+        self.ma_hl = RollingMean(n)
+        self.emv = RollingMean(n)
+        self.maemv = RollingMean(m)
+
+    def update(self, high, low, volume):
+        """
+        :param high float 最高价
+        :param low float 最低价
+        :param volume float 成交量
+
+        :return EMV float 预热期内为NaN
+        :return MAEMV float
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            VOLUME = np.float64(self.ma_vol.update(volume)) / volume
+            MID = 100 * (high + low - self.pre_high - self.pre_low) / (np.float64(high) + low)
+            X = float(MID * VOLUME * (high - low) / self.ma_hl.update(high - low))
+        self.pre_high, self.pre_low = high, low
+        EMV = self.emv.update(X)
+        return EMV, self.maemv.update(EMV)
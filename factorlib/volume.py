@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#成交量型指标的共用内核，输入可为一维序列或二维(日期 × 标的)矩阵
+
+#加载库
+import numpy as np
+
+from factorlib.rolling import RollingMean, calc_MA, calc_positive_ratio_multi
+
+
+def calc_OBV(close, volume, M=5):
+    """
+    计算OBV和MAOBV的值，OBV为带符号成交量的累计和，一次cumsum完成
+    如果今天的收盘价高于昨天的收盘价，那么OBV＝昨天的OBV＋今天的成交量
+    如果今天的收盘价低于昨天的收盘价，那么OBV＝昨天的OBV－今天的成交量
+    如果今天的收盘价等于昨天的收盘价，那么OBV＝昨天的OBV
+    MAOBV=OBV的M日简单移动平均
+
+    :param close Series/ndarray 收盘价，一维序列或二维(日期 × 标的)矩阵
+    :param volume Series/ndarray 成交量，形状同close
+    :param M int MAOBV参数M
+
+    :return OBV ndarray OBV的值，首日为首日成交量
+    :return MAOBV ndarray MAOBV的值
+    """
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    if len(close) == 0:
+        return close.copy(), close.copy()
+
+    sign = np.zeros(close.shape)
+    sign[0] = 1
+    sign[1:] = np.sign(close[1:] - close[:-1])
+    # 与NaN比较视为平盘；平盘日与成交量为NaN(上市前、缺失)的日子不参与累计，NaN不会污染后续
+    sign[1:][np.isnan(sign[1:])] = 0
+    sign[np.isnan(volume)] = 0
+    OBV = np.cumsum(np.where(sign != 0, sign * volume, 0.0), axis=0)
+
+    return OBV, calc_MA(OBV, M)
+
+
+def calc_VRSI_multi(volume, N_list=(6, 12, 24)):
+    """
+    一次计算多个参数的VRSI，各参数共用成交量变化的正部与绝对值及其前缀和
+    VRSI(N)=MA(MAX(VOL-REF(VOL,1),0),N)/MA(ABS(VOL-REF(VOL,1)),N)*100
+
+    :param volume Series/ndarray 成交量，一维序列或二维(日期 × 标的)矩阵
+    :param N_list list VRSI参数N的列表
+
+    :return result dict {N: VRSI(N)}，前N期为NaN(首期成交量变化为NaN)
+    """
+    volume = np.asarray(volume, dtype=np.float64)
+    vol_chg = np.full(volume.shape, np.nan)
+    vol_chg[1:] = volume[1:] - volume[:-1]
+
+    ratio = calc_positive_ratio_multi(vol_chg, np.abs(vol_chg), N_list)
+    result = {}
+    for N in N_list:
+        VRSI = ratio[N]
+        VRSI *= 100
+        VRSI[:N] = np.nan
+        result[N] = VRSI
+    return result
+
+
+class OBVUpdater(object):
+    """
+    逐根K线增量计算OBV和MAOBV，每次更新O(1)，与calc_OBV的批量结果一致;
+    """
+
+    FIELDS = ('close', 'volume')
+    OUTPUTS = ('OBV', 'MAOBV')
+
+    def __init__(self, M=5):
+        """
+        :param M int MAOBV参数M
+        """
+        self.M = M
+        self.pre_close = None
+        self.obv = None
+        self.maobv = RollingMean(M)
+
+    def update(self, close, volume):
+        """
+        输入一根新K线，返回最新的OBV和MAOBV;
+
+        :param close float 收盘价
+        :param volume float 成交量，NaN时不参与累计
+
+        :return OBV float
+        :return MAOBV float 预热期内为NaN
+        """
+        if volume != volume:
+            volume = 0.0
+        if self.obv is None:
+            self.obv = float(volume)
+        elif close > self.pre_close:
+            self.obv += volume
+        elif close < self.pre_close:
+            self.obv -= volume
+        self.pre_close = close
+
+        return self.obv, self.maobv.update(self.obv)
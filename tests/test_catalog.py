@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#计算图声明测试：factorlib.catalog中每个declare_*的各输出与对应Demo中calc_*的结果逐位相同，
+#公式在两处各有一份，改动任一方而未同步另一方时本测试失败；另校验联合去重计算与各指标分别计算逐位相同
+#运行方式：python -m pytest -q tests
+
+#加载库
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.catalog import INDICATORS, build_plan
+from factorlib.farm import STRATEGIES
+from factorlib.store import load_market_data
+
+#指标名 -> (Demo路径, 指标函数名)，在回测策略之外补充MASS与RSRS的均线过滤条件
+DEMOS = dict(STRATEGIES)
+DEMOS['MASS'] = ('能量型-MASS/MASS_Demo.py', 'calc_MASS')
+DEMOS['RSRS_MA'] = ('择时类-RSRS/main_Demo.py', 'cal_ma_beta')
+#Demo中输出列名与declare_*不同的
+DEMO_COLUMNS = {('CHO', 'CHO'): '趋势类-CHO'}
+
+
+def load_demo(path):
+    """
+    导入Demo中的函数，只执行运行部分('#运行部分'，RSRS为'#导入数据')之前的代码;
+
+    :param path str Demo相对仓库根目录的路径
+
+    :return namespace dict Demo中定义的函数
+    """
+    path = os.path.join(ROOT, path)
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    marker = '#运行部分' if '#运行部分' in source else '#导入数据'
+    namespace = {'__name__': 'demo', '__file__': path}
+    exec(compile(source[:source.index(marker)], path, 'exec'), namespace)
+    return namespace
+
+
+def run_demo(name, df):
+    """
+    用Demo中的calc_*计算指标;
+
+    :param name str 指标名，INDICATORS中的键
+    :param df DataFrame 行情数据，QR的大盘指数收盘价为['close_zs']列
+
+    :return data DataFrame calc_*实际计算所用的行情，declare_*应在其上计算
+    :return outputs dict 输出名 -> Series，键与declare_*的输出一致
+    """
+    path, calc_name = DEMOS[name]
+    calc = load_demo(path)[calc_name]
+    data = df
+    if name == 'QR':
+        zs = df[['date', 'close_zs']].rename(columns={'close_zs': 'close'})
+        result = calc(df.drop(columns='close_zs'), zs)
+    elif name == 'RSRS_MA':
+        # cal_ma_beta在去掉前n-1行的df1上计算均线，ma20_1、ma20_3为其中的局部变量
+        n = 18
+        result = calc(df.copy(), n, 60)
+        result['ma20_1'] = result['ma20'].shift(1)
+        result['ma20_3'] = result['ma20'].shift(3)
+        data = df.iloc[n - 1:].reset_index(drop=True)
+    else:
+        result = calc(df.copy())
+    return data, {key: result[DEMO_COLUMNS.get((name, key), key)] for key in INDICATORS[name]()}
+
+
+@pytest.fixture(scope='module')
+def df():
+    df = load_market_data('000001')
+    # QR的大盘指数收盘价，这里取000001本身
+    df['close_zs'] = df['close']
+    return df
+
+
+def test_every_indicator_has_demo():
+    assert sorted(DEMOS) == sorted(INDICATORS)
+
+
+@pytest.mark.parametrize('name', list(INDICATORS))
+def test_declare_matches_demo(name, df):
+    data, outputs = run_demo(name, df)
+    new = build_plan([name]).evaluate(data)[name]
+    assert sorted(new) == sorted(outputs)
+    for key, values in outputs.items():
+        assert np.array_equal(values.to_numpy(dtype=np.float64), new[key].to_numpy(dtype=np.float64),
+                              equal_nan=True), (name, key)
+
+
+def test_plan_matches_separate(df):
+    plan = build_plan()
+    new = plan.evaluate(df)
+    for name in plan.indicators:
+        ref = build_plan([name]).evaluate(df)[name]
+        for key in ref:
+            assert np.array_equal(ref[key].values, new[name][key].values, equal_nan=True), (name, key)
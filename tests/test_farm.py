@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+#批量回测测试：run_farm在本进程内依次运行与进程池运行的结果一致，显式给出的进程数不被改写
+#运行方式：python -m pytest -q tests
+
+#加载库
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.farm import METRIC_COLS, run_farm
+from factorlib.store import load_market_data
+
+
+@pytest.fixture(scope='module')
+def frames():
+    return {code: load_market_data(code) for code in ('000001', '000016')}
+
+
+def make_jobs(frames):
+    return [(name, symbol, None) for symbol in frames for name in ('MACD', 'QR', 'TRIX')]
+
+
+def test_default_processes(frames):
+    _, stats = run_farm(frames, make_jobs(frames))
+    assert stats['processes'] == (os.cpu_count() or 1)
+
+
+def test_pool_matches_serial(frames):
+    jobs = make_jobs(frames)
+    serial, stats = run_farm(frames, jobs, processes=1)
+    assert stats['processes'] == 1
+    assert (serial['error'] == '').all(), serial['error'].tolist()
+    # 只有一个CPU时也按调用方给出的进程数建进程池
+    pooled, stats = run_farm(frames, jobs, processes=2, chunksize=1)
+    assert stats['processes'] == 2
+    np.testing.assert_array_equal(pooled[METRIC_COLS].to_numpy(), serial[METRIC_COLS].to_numpy())
+    assert pooled['error'].tolist() == serial['error'].tolist()
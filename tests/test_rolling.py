@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+#RollingSum测试：逐个输入的窗口和与Series.rolling(N).sum()逐步比对，覆盖窗口未满与含NaN时的预热期、
+#min_periods，以及每max(N, 1024)次更新用math.fsum精确重算(resync)前后的结果
+#运行方式：python -m pytest -q tests
+
+#加载库
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.rolling import RollingSum, RollingMean
+
+RTOL = 1e-10
+
+
+def make_volume(n, nan_at=(), seed=0):
+    """
+    生成量级与成交量相近的随机数，指定位置为NaN;
+
+    :param n int 输入个数
+    :param nan_at tuple 置为NaN的位置
+
+    :return X ndarray 输入序列
+    """
+    rng = np.random.RandomState(seed)
+    X = np.exp(rng.standard_normal(n)) * 1e6
+    X[list(nan_at)] = np.nan
+    return X
+
+
+def run_rolling(rolling, X):
+    return np.array([rolling.update(x) for x in X.tolist()])
+
+
+@pytest.mark.parametrize('N', [1, 5, 20, 1500])
+def test_rolling_sum_matches_pandas(N):
+    # 开头的NaN延长预热期，中间的NaN使其后N个窗口为NaN，长度跨过多次resync
+    X = make_volume(5000, nan_at=(0, 3, 1024, 2500, 2501))
+    out = run_rolling(RollingSum(N), X)
+    ref = pd.Series(X).rolling(N).sum().to_numpy()
+    np.testing.assert_array_equal(np.isnan(out), np.isnan(ref))
+    np.testing.assert_allclose(out, ref, rtol=RTOL)
+    assert np.isnan(out[:N]).all()
+
+
+def test_rolling_sum_min_periods():
+    X = make_volume(3000, nan_at=(1, 2, 500, 501, 502, 503, 1030))
+    out = run_rolling(RollingSum(10, min_periods=3), X)
+    ref = pd.Series(X).rolling(10, min_periods=3).sum().to_numpy()
+    np.testing.assert_array_equal(np.isnan(out), np.isnan(ref))
+    np.testing.assert_allclose(out, ref, rtol=RTOL)
+
+
+def test_rolling_mean_matches_pandas():
+    X = make_volume(3000, nan_at=(7, 2000))
+    out = run_rolling(RollingMean(6), X)
+    ref = pd.Series(X).rolling(6).mean().to_numpy()
+    np.testing.assert_array_equal(np.isnan(out), np.isnan(ref))
+    np.testing.assert_allclose(out, ref, rtol=RTOL)
+
+
+@pytest.mark.parametrize('N', [20, 1024, 1500])
+def test_rolling_sum_resync_boundary(N):
+    resync = max(N, 1024)
+    X = make_volume(3 * resync + 5, seed=1)
+    rolling = RollingSum(N)
+    assert rolling.resync == resync
+    for i, x in enumerate(X.tolist()):
+        total = rolling.update(x)
+        count = i + 1
+        window = X[max(count - N, 0):count]
+        if count < N:
+            assert np.isnan(total)
+            continue
+        if count % resync == 0:
+            # 第resync、2*resync…次更新后运行和由math.fsum重算，与窗口的精确和逐位相同
+            assert rolling.since_sync == 0
+            assert total == math.fsum(window)
+        else:
+            assert rolling.since_sync == count % resync
+            assert total == pytest.approx(math.fsum(window), rel=RTOL)
+
+
+def test_rolling_sum_resync_with_nan():
+    # NaN在第1024次更新时仍在窗口内：重算跳过NaN，结果保持NaN，NaN移出窗口后恢复
+    N = 20
+    X = make_volume(1100, nan_at=(1020,), seed=2)
+    out = run_rolling(RollingSum(N), X)
+    assert np.isnan(out[1020:1040]).all()
+    assert not np.isnan(out[1040:]).any()
+    np.testing.assert_allclose(out, pd.Series(X).rolling(N).sum().to_numpy(), rtol=RTOL)
+
+
+def test_rolling_sum_resync_every_update():
+    X = make_volume(200, seed=3)
+    out = run_rolling(RollingSum(7, resync=1), X)
+    ref = [math.fsum(X[i - 6:i + 1]) for i in range(6, len(X))]
+    assert out[6:].tolist() == ref
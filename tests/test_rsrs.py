@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+#RSRS增量版本测试：在000300上逐根K线喂给RSRSUpdater，与择时类-RSRS/main_Demo.py中各策略的批量结果逐步比对
+#标准分允许rtol=1e-7的误差(批量R²由前缀和相减得到，窗口内波动小时有1e-8量级的相减误差)，开平仓标志与持仓完全相同；
+#修正标准分、右偏标准分传入批量版本所用的全部样本mu、sigma，缺省时与截至当前全部历史的均值、标准差比对
+#运行方式：python -m pytest -q tests
+
+#加载库
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.regression import calc_rolling_ols
+from factorlib.rsrs import RULES, BetaDistribution, RSRSUpdater
+from factorlib.store import load_market_data
+
+RTOL = 1e-7
+ATOL = 1e-12
+
+
+def load_rsrs_demo():
+    """
+    导入RSRS Demo中的函数，只执行'#导入数据'之前的代码(该Demo没有__name__ == '__main__'保护);
+
+    :return namespace dict Demo中定义的函数
+    """
+    path = os.path.join(ROOT, '择时类-RSRS', 'main_Demo.py')
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    namespace = {'__name__': 'demo', '__file__': path}
+    exec(compile(source[:source.index('#导入数据')], path, 'exec'), namespace)
+    return namespace
+
+
+def run_stream(updater, mkt_data):
+    columns = [mkt_data[field].to_numpy(dtype=np.float64).tolist() for field in updater.FIELDS]
+    rows = [updater.update(*bar) for bar in zip(*columns)]
+    return pd.DataFrame(rows, columns=list(updater.OUTPUTS))
+
+
+@pytest.fixture(scope='module')
+def df():
+    return load_market_data('000300')
+
+
+@pytest.fixture(scope='module')
+def full_beta(df):
+    # 修正标准分的批量版本：全部样本(n=16)斜率的均值与标准差
+    beta = calc_rolling_ols(df['low'], df['high'], 16)['beta'][15:]
+    return np.mean(beta), np.std(beta)
+
+
+#(规则, n, m, 批量策略, 标准分列, 是否传入全部样本的mu、sigma)
+CASES = [
+    ('beta', 18, 60, lambda demo, d: demo['cal_nbeta'](d, 18), 'beta', False),
+    ('stdbeta', 18, 60, lambda demo, d: demo['cal_stdbeta'](d, 18, 60), 'stdbeta', False),
+    ('better_stdbeta', 16, 60, lambda demo, d: demo['cal_better_stdbeta'](d, 16), 'better_stdbeta', True),
+    ('right_stdbeta', 16, 60, lambda demo, d: demo['cal_right_stdbeta'](d, 16, 60), 'right_stdbeta', True),
+    ('ma_beta', 16, 60, lambda demo, d: demo['cal_ma_beta'](d, 16, 60), 'stdbeta', False),
+    ('vol_beta', 16, 60, lambda demo, d: demo['cal_vol_beta'](d, 16, 60), 'stdbeta', False),
+]
+
+
+def test_cases_cover_rules():
+    assert sorted(rule for rule, _, _, _, _, _ in CASES) == sorted(RULES)
+
+
+@pytest.mark.parametrize('rule, n, m, batch, score, full', CASES, ids=[case[0] for case in CASES])
+def test_updater_matches_batch(rule, n, m, batch, score, full, df, full_beta):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        calc = batch(load_rsrs_demo(), df.copy())
+    params = dict(zip(('mu', 'sigma'), full_beta)) if full else {}
+    stream = run_stream(RSRSUpdater(n, m, rule, **params), df)
+    # 前n-1根K线回归窗口未满，批量版本从第n根K线开始
+    assert stream.iloc[:n - 1][['flag', 'position']].eq(0).all().all()
+    stream = stream.iloc[n - 1:]
+    np.testing.assert_allclose(stream[score].to_numpy(), calc[score].to_numpy(dtype=np.float64),
+                               rtol=RTOL, atol=ATOL, err_msg=rule)
+    # 批量版本不判断最后一根K线
+    assert np.array_equal(stream['flag'].to_numpy()[:-1], calc['flag'].to_numpy()[:-1]), rule
+    assert np.array_equal(stream['position'].to_numpy(), calc['position'].to_numpy()), rule
+
+
+@pytest.mark.parametrize('rule', ['better_stdbeta', 'right_stdbeta'])
+def test_causal_better_stdbeta(rule, df):
+    # 缺省mu、sigma为截至当前全部历史的均值与标准差(ddof=0)
+    n = 16
+    stream = run_stream(RSRSUpdater(n, 60, rule), df).iloc[n - 1:]
+    beta = stream['beta']
+    mu = beta.expanding().mean()
+    sigma = beta.expanding().std(ddof=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        better = stream['r2'] * ((beta - mu) / sigma)
+    np.testing.assert_allclose(stream['better_stdbeta'].to_numpy(), better.to_numpy(), rtol=1e-9, atol=ATOL)
+    np.testing.assert_allclose(stream['right_stdbeta'].to_numpy(), (better * beta).to_numpy(),
+                               rtol=1e-9, atol=ATOL)
+
+
+@pytest.mark.parametrize('window', [None, 60])
+def test_beta_distribution(window):
+    rng = np.random.RandomState(0)
+    beta = np.round(rng.standard_normal(3000) * 0.3 + 1, 2)
+    beta[[0, 100, 101, 2000]] = np.nan
+    dist = BetaDistribution(window)
+    series = pd.Series(beta)
+    roll = series.expanding() if window is None else series.rolling(window, min_periods=1)
+    mean, std, std0 = roll.mean().to_numpy(), roll.std().to_numpy(), roll.std(ddof=0).to_numpy()
+    for i, b in enumerate(beta.tolist()):
+        dist.update(b)
+        np.testing.assert_allclose([dist.mean(), dist.std(), dist.std(ddof=0)], [mean[i], std[i], std0[i]],
+                                   rtol=1e-9, atol=1e-12)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#快照测试：Pipeline中途保存、写入文件、读回恢复后继续运行，指标输出、信号与持仓与不中断运行逐位相同
+#运行方式：python -m pytest -q tests
+
+#加载库
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.replay import make_pipeline
+from factorlib.snapshot import Snapshot
+from factorlib.store import load_market_data
+from factorlib.trend import MACDUpdater, TRIXUpdater
+
+
+@pytest.fixture(scope='module')
+def bars():
+    mkt_data = load_market_data('000001')
+    return list(zip(*[mkt_data[field].to_numpy(dtype=np.float64).tolist() for field in make_pipeline().FIELDS]))
+
+
+def run(pipeline, bars):
+    values, signals = [], []
+    for bar in bars:
+        v, s = pipeline.update(bar)
+        values.append(v)
+        signals.append(s)
+    return np.array(values, dtype=np.float64), np.array(signals, dtype=np.float64)
+
+
+def assert_same(a, b):
+    for x, y in zip(a, b):
+        assert np.array_equal(x, y, equal_nan=True)
+
+
+def test_restore_matches_uninterrupted(bars, tmp_path):
+    half = len(bars) // 2
+    ref = run(make_pipeline(), bars)
+    pipeline = make_pipeline()
+    run(pipeline, bars[:half])
+    snapshot = Snapshot()
+    for symbol in ('000001', '000002'):
+        snapshot.put(symbol, 'all', pipeline)
+    # 保存后继续更新不影响已保存的状态
+    run(pipeline, bars[half:half + 10])
+    path = str(tmp_path / 'indicators.snap')
+    snapshot.save(path)
+    loaded = Snapshot.load(path)
+    assert len(loaded.groups) == 1
+    restored = [loaded.restore('000001', 'all', make_pipeline)]
+    restored += loaded.restore_many(['000001', '000002'], 'all', make_pipeline)
+    for obj in restored:
+        values, signals = run(obj, bars[half:])
+        assert_same((values, signals), (ref[0][half:], ref[1][half:]))
+
+
+def feed(updater, bars):
+    return [updater.update(bar[0]) for bar in bars]
+
+
+def test_put_after_load(bars, tmp_path):
+    path = str(tmp_path / 'macd.snap')
+    updaters = [MACDUpdater(), MACDUpdater()]
+    feed(updaters[0], bars[:100])
+    feed(updaters[1], bars[:200])
+    snapshot = Snapshot()
+    snapshot.put('000000', 'MACD', updaters[0])
+    snapshot.put('000001', 'MACD', updaters[1])
+    snapshot.save(path)
+
+    # 读回后覆盖一个标的、新增一个标的，被覆盖的行在保存时丢弃
+    loaded = Snapshot.load(path)
+    loaded.put('000000', 'MACD', updaters[1])
+    loaded.put('000002', 'MACD', updaters[0])
+    loaded.save(path)
+    loaded = Snapshot.load(path)
+    assert len(loaded) == 3
+    for symbol, n in (('000000', 200), ('000001', 200), ('000002', 100)):
+        ref = MACDUpdater()
+        feed(ref, bars[:n])
+        restored = loaded.restore(symbol, 'MACD', MACDUpdater)
+        assert np.array_equal(feed(restored, bars[n:n + 100]), feed(ref, bars[n:n + 100]), equal_nan=True)
+
+
+def test_rejects_mismatch(tmp_path):
+    snapshot = Snapshot()
+    snapshot.put('000001', 'MACD', MACDUpdater())
+    with pytest.raises(ValueError):
+        snapshot.restore('000001', 'MACD', TRIXUpdater)
+    with pytest.raises(KeyError):
+        snapshot.restore('000002', 'MACD', MACDUpdater)
+
+    path = str(tmp_path / 'macd.snap')
+    snapshot.save(path)
+    with open(path, 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b'\x00')
+    with pytest.raises(ValueError):
+        Snapshot.load(path)
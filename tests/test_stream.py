@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#增量指标测试：逐根K线喂给factorlib中的各Updater，每一步的输出与对应Demo的calc_*批量结果比对
+#批量结果逐位相同的输出要求完全相等(含NaN位置)，基于pandas滚动和、滚动均值的输出允许rtol=1e-10、atol=1e-12的误差;
+#窗口和、窗口均值由RollingSum维护，样本跨过多次resync，预热期的NaN位置必须与批量结果一致
+#运行方式：python -m pytest -q tests
+
+#加载库
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from factorlib.average import EXPMAUpdater, AMVUpdater
+from factorlib.energy import VRUpdater, BRARUpdater, CRUpdater
+from factorlib.farm import load_strategy
+from factorlib.store import load_market_data
+from factorlib.trend import MACDUpdater, TRIXUpdater, QRUpdater, UOSUpdater, JLHBUpdater, GDXUpdater, \
+    WVADUpdater, VPTUpdater, DMIUpdater, EMVUpdater
+
+RTOL = 1e-10
+ATOL = 1e-12
+
+
+def load_demo(path):
+    """
+    导入没有 __name__ == '__main__' 保护的Demo中的函数，只执行'#运行部分'之前的代码;
+
+    :param path str Demo相对仓库根目录的路径
+
+    :return namespace dict Demo中定义的函数
+    """
+    path = os.path.join(ROOT, path)
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    namespace = {'__name__': 'demo', '__file__': path}
+    exec(compile(source[:source.index('#运行部分')], path, 'exec'), namespace)
+    return namespace
+
+
+def run_stream(updater, mkt_data):
+    """
+    逐根K线调用updater.update;
+
+    :param updater object 增量指标，含FIELDS、OUTPUTS与update
+    :param mkt_data DataFrame 行情数据
+
+    :return result DataFrame 每根K线一行，列为updater.OUTPUTS
+    """
+    columns = [mkt_data[field].to_numpy(dtype=np.float64).tolist() for field in updater.FIELDS]
+    rows = [updater.update(*bar) for bar in zip(*columns)]
+    return pd.DataFrame(rows, columns=list(updater.OUTPUTS), dtype=np.float64)
+
+
+def calc_QR(df_gg):
+    df_zs = load_market_data('000001')
+    return load_strategy('QR').calc_QR(df_gg, df_zs)
+
+
+#(名称, 生成Updater, 标的, 批量计算函数, 逐位相同的输出)
+CASES = [
+    ('MACD', MACDUpdater, '000001', lambda d: load_strategy('MACD').calc_MACD(d), ('DIF', 'DEM', 'OSC')),
+    ('VMACD', lambda: MACDUpdater(field='volume'), '000001', lambda d: load_strategy('VMACD').calc_MACD(d),
+     ('DIF', 'DEM', 'OSC')),
+    ('EXPMA', EXPMAUpdater, '000001', lambda d: load_strategy('EXPMA').calc_EXPMA(d), ('EMA1', 'EMA2')),
+    ('TRIX', TRIXUpdater, '000001', lambda d: load_strategy('TRIX').calc_TRIX(d), ('TR', 'TRIX')),
+    # QR的批量结果含按日期对齐到个股的大盘收盘价['close_zs']，增量版本逐根读取
+    ('QR', QRUpdater, '000016', calc_QR, ('gg', 'zs', 'QR')),
+    ('UOS', UOSUpdater, '000001', lambda d: load_strategy('UOS').calc_UOS(d), ()),
+    ('JLHB', JLHBUpdater, '000001', lambda d: load_demo('趋势类-JLHB/JLHB_Demo.py')['calc_JLHB'](d),
+     ('B', 'VAR2', 'JLHB')),
+    ('GDX', GDXUpdater, '000001', lambda d: load_strategy('GDX').calc_GDX(d), ()),
+    ('AMV', AMVUpdater, '000001', lambda d: load_strategy('AMV').calc_AMV(d), ()),
+    ('VR', VRUpdater, '000001', lambda d: load_demo('能量型-VR/VR_Demo.py')['calc_VR'](d), ()),
+    ('BRAR', BRARUpdater, '000001', lambda d: load_strategy('BRAR').calc_BRAR(d), ()),
+    ('CR', CRUpdater, '000001', lambda d: load_strategy('CR').calc_CR(d), ()),
+    ('WVAD', WVADUpdater, '000001', lambda d: load_strategy('WVAD').calc_WVAD(d), ()),
+    ('VPT', VPTUpdater, '000001', lambda d: load_strategy('VPT').calc_VPT(d), ()),
+    ('DMI', DMIUpdater, '000001', lambda d: load_strategy('DMI').calc_DMI(d), ()),
+    ('EMV', EMVUpdater, '000001', lambda d: load_strategy('EMV').calc_EMV(d), ()),
+]
+
+
+def check_outputs(name, updater, calc, exact):
+    """
+    逐列比对增量结果与批量结果，NaN的位置(含预热期)必须一致;
+
+    :param name str 指标名称
+    :param updater object 已生成、尚未更新过的增量指标
+    :param calc DataFrame 批量计算的结果，含updater.FIELDS与updater.OUTPUTS
+    :param exact tuple 要求逐位相同的输出
+    """
+    stream = run_stream(updater, calc)
+    assert len(stream) == len(calc)
+    for key in updater.OUTPUTS:
+        ref = calc[key].to_numpy(dtype=np.float64).copy()
+        if name == 'GDX':
+            # 批量版本的前n-1期用到了未来数据，增量版本为NaN
+            ref[:updater.ma.M - 1] = np.nan
+        out = stream[key].to_numpy()
+        np.testing.assert_array_equal(np.isnan(out), np.isnan(ref), err_msg=name + key)
+        if key in exact:
+            assert np.array_equal(out, ref, equal_nan=True), (name, key)
+        else:
+            np.testing.assert_allclose(out, ref, rtol=RTOL, atol=ATOL, err_msg=name + key)
+
+
+@pytest.mark.parametrize('name, make, symbol, batch, exact', CASES, ids=[case[0] for case in CASES])
+def test_updater_matches_batch(name, make, symbol, batch, exact):
+    calc = batch(load_market_data(symbol).copy())
+    # 样本长度跨过多次RollingSum的resync(每1024次更新)，重算前后的每一步都参与比对
+    assert len(calc) > 2 * 1024
+    check_outputs(name, make(), calc, exact)
+
+
+def test_VR_nan_volume():
+    # 成交量为NaN只影响包含它的N个窗口(及其后的MAVR)，窗口移出后与批量结果一致
+    mkt_data = load_market_data('000001').copy()
+    mkt_data['volume'] = mkt_data['volume'].astype(np.float64)
+    mkt_data.loc[[5, 1000, 1001, 3000], 'volume'] = np.nan
+    calc = load_demo('能量型-VR/VR_Demo.py')['calc_VR'](mkt_data, N=3)
+    assert calc['VR'].iloc[9:1000].notna().all() and calc['VR'].iloc[1000:1004].isna().all()
+    check_outputs('VR', VRUpdater(N=3), calc, ())
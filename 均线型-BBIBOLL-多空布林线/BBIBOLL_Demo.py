@@ -23,12 +23,19 @@ DWN:BBIBOLL-M*STD(BBIBOLL,N);
 #加载库
 import numpy as np
 import pandas as pd
-import datetime
 
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib.performance import calc_hold_stats
+from factorlib.signals import enter_band, calc_signal_position
+from factorlib.store import load_market_data
+from factorlib.chart import plot_backtest
+
 #计算BBIBOLL UPR DWN 的值
 def calc_BBIBOLL(mkt_data, N = 11, M = 6):
     """
@@ -68,17 +75,11 @@ def calc_signal(mkt_data):
     DOWN = mkt_data['DOWN']
 
     """ 计算信号 """
-    signals = []
-    for bb, pre_bb, down, pre_down, up, pre_up in zip(close, close.shift(1), UPPER, UPPER.shift(1), DOWN, DOWN.shift(1)):
-        signal = None
-        if (bb < down) & (pre_bb > pre_down):
-            signal = 1
-        elif (bb > up) & (pre_bb < pre_up):
-            signal = -1
-        signals.append(signal)
+    # 收盘价自上方下穿UPPER买进，自下方上穿DOWN卖出
+    signal = -enter_band(close, DOWN, UPPER)
 
     """ 信号赋值 """
-    mkt_data['signal'] = signals
+    mkt_data['signal'] = signal
     return mkt_data
 
 #计算持仓
@@ -90,8 +91,8 @@ def calc_position(mkt_data):
 
     :return mkt_data DataFrame 新增1列['position']
     """
-    #mkt_data['position'] = mkt_data['signal'].fillna(method='ffill').shift(1).fillna(0)
-    mkt_data['position'] = mkt_data['signal'].fillna(method='ffill').shift(1).fillna(1)
+    #mkt_data['position'] = calc_signal_position(mkt_data['signal'], 0)
+    mkt_data['position'] = calc_signal_position(mkt_data['signal'], 1)
 
     return mkt_data
 
@@ -146,43 +147,8 @@ def statistic_performance(mkt_data, r0=0.03, data_period=1440):
     """
     v_hold_cumu_r = hold_cumu_r.tolist()[-1]
 
-    v_pos_hold_times = 0
-    v_pos_hold_win_times = 0
-    v_pos_hold_period = 0
-    v_pos_hold_win_period = 0
-    v_neg_hold_times = 0
-    v_neg_hold_win_times = 0
-    v_neg_hold_period = 0
-    v_neg_hold_win_period = 0
-    for w, r, pre_pos, pos in zip(hold_win, hold_r, position.shift(1), position):
-        # 有换仓（先结算上一次持仓，再初始化本次持仓）
-        if pre_pos != pos:
-            # 判断pre_pos非空：若为空则是循环的第一次，此时无需结算，直接初始化持仓即可
-            if pre_pos == pre_pos:
-                # 结算上一次持仓
-                if pre_pos > 0:
-                    v_pos_hold_times += 1
-                    v_pos_hold_period += tmp_hold_period
-                    v_pos_hold_win_period += tmp_hold_win_period
-                    if tmp_hold_r > 0:
-                        v_pos_hold_win_times += 1
-                elif pre_pos < 0:
-                    v_neg_hold_times += 1
-                    v_neg_hold_period += tmp_hold_period
-                    v_neg_hold_win_period += tmp_hold_win_period
-                    if tmp_hold_r > 0:
-                        v_neg_hold_win_times += 1
-            # 初始化本次持仓
-            tmp_hold_r = r
-            tmp_hold_period = 0
-            tmp_hold_win_period = 0
-        else:  # 未换仓
-            if abs(pos) > 0:
-                tmp_hold_period += 1
-                if r > 0:
-                    tmp_hold_win_period += 1
-                if abs(r) > 0:
-                    tmp_hold_r = (1 + tmp_hold_r) * (1 + r) - 1
+    (v_pos_hold_times, v_pos_hold_win_times, v_pos_hold_period, v_pos_hold_win_period,
+     v_neg_hold_times, v_neg_hold_win_times, v_neg_hold_period, v_neg_hold_win_period) = calc_hold_stats(hold_r, position)
 
     v_hold_period = (abs(position) > 0).sum()
     v_hold_win_period = (hold_r > 0).sum()
@@ -224,72 +190,16 @@ def visualize_performance(mkt_data):
 
     :return plot html 可交互式图
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-    f2 = figure(height=200, sizing_mode='stretch_width',
-                title='Position',
-                x_axis_label="trade_datetime", y_axis_label="position",
-                x_axis_type='datetime',
-                x_range=f1.x_range)
-    f3 = figure(height=200, sizing_mode='stretch_width',
-                title='Return',
-                x_axis_type='datetime',
-                x_range=f1.x_range)
-    f4 = figure(height=200, sizing_mode='stretch_width',
-                title='Drawdown',
-                x_axis_type='datetime',
-                x_range=f1.x_range)
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='Factor',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    cumu_hold_close = (mkt_data['hold_cumu_r'] + 1)
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-    f1.line(dt, cumu_hold_close, line_width=1, color='red')
-
-    # 绘制指标
-    indi.line(dt, mkt_data['close'], line_width=1, color='red')
-    indi.line(dt, mkt_data['UPPER'], line_width=1, color='yellow')
-    indi.line(dt, mkt_data['DOWN'], line_width=1, color='green')
-
-    # 绘制仓位
-    position = mkt_data['position']
-    f2.step(dt, position)
-
-    # 绘制收益
-    hold_r = mkt_data['hold_r']
-    f3.vbar(x=dt, top=hold_r)
-
-    # 绘制回撤
-    drawdown = mkt_data['drawdown']
-    f4.line(dt, -drawdown, line_width=1)
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  [indi],
-                  [f2],
-                  [f3],
-                  [f4]
-                  ])
+    p = plot_backtest(mkt_data, [('close', 'red'), ('UPPER', 'yellow'), ('DOWN', 'green')])
     show(p)
 
 #运行部分
-data = pd.read_csv('data/000300.csv')
-data = calc_BBIBOLL(data)
-data = calc_signal(data)
-data = calc_position(data)
-result, performance_df = statistic_performance(data)
-visualize_performance(result)
-print(performance_df)
+if __name__ == '__main__':
+    data = load_market_data('000300')
+    data = calc_BBIBOLL(data)
+    data = calc_signal(data)
+    data = calc_position(data)
+    result, performance_df = statistic_performance(data)
+    visualize_performance(result)
+    print(performance_df)
 
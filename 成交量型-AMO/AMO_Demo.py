@@ -15,12 +15,17 @@
 #加载库
 import numpy as np
 import pandas as pd
-import datetime
 
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib.store import load_market_data
+from factorlib.chart import plot_indicator
+
 #计算AMOW，AMO1和AMO2 的值
 def calc_AMO(mkt_data, M1=5, M2=10):
     """
@@ -48,38 +53,11 @@ def visualize_performance(mkt_data):
 
     :return plot html 可交互式图
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='Factor',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-
-    # 绘制指标
-    indi.line(dt, mkt_data['AMO1'], line_width=1, color='green')
-    indi.line(dt, mkt_data['AMO2'], line_width=1, color='yellow')
-    indi.vbar(dt, top=mkt_data['AMOW'], width=0.9)
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  [indi]
-                  ])
+    p = plot_indicator(mkt_data, [('AMO1', 'green'), ('AMO2', 'yellow'), ('AMOW', '#1f77b4', 'vbar')])
     show(p)
 
 #运行部分
-data = pd.read_csv('data/000001.csv')
+data = load_market_data('000001')
 data = calc_AMO(data)
 visualize_performance(data)
 
@@ -22,12 +22,17 @@ MADBLB=DBLB的M日简单移动平均
 #加载库
 import numpy as np
 import pandas as pd
-import datetime
 
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib.store import load_market_data
+from factorlib.chart import plot_indicator
+
 #计算DBLB和MADBLB 的值
 def calc_DBLB(mkt_data_gg, mkt_data_zs, N=5, M=5):
     """
@@ -62,40 +67,14 @@ def visualize_performance(mkt_data, mkt_data_zs):
 
     :return plot html 可交互式图
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='Factor',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    close_zs = mkt_data_zs['close']
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-    f1.line(dt, close_zs / close_zs.tolist()[0], line_width=1, color='yellow')
-
-    # 绘制指标
-    indi.line(dt, mkt_data['DBLB'], line_width=1, color='green')
-    indi.line(dt, mkt_data['MADBLB'], line_width=1, color='yellow')
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  [indi]
-                  ])
+    # 大盘指数按日期对齐到个股的交易日
+    close_zs = mkt_data_zs.set_index('date')['close'].reindex(mkt_data['date'])
+    p = plot_indicator(mkt_data, [('DBLB', 'green'), ('MADBLB', 'yellow')], benchmark_close=close_zs)
     show(p)
 
 #运行部分
-data_zs = pd.read_csv('data/000001.csv')
-data_gg = pd.read_csv('data/000016.csv')
+data_zs = load_market_data('000001')
+data_gg = load_market_data('000016')
 
 data = calc_DBLB(data_gg, data_zs)
 visualize_performance(data_gg, data_zs)
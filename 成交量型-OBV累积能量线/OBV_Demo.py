@@ -22,39 +22,34 @@
 #加载库
 import numpy as np
 import pandas as pd
-import datetime
 
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
 
-#计算OBV 的值
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib import volume
+from factorlib.store import load_market_data
+from factorlib.chart import plot_indicator
+
+#计算OBV和MAOBV 的值
 def calc_OBV(mkt_data, M=5):
     """
-    计算OBV 的值
+    计算OBV和MAOBV 的值
     如果今天的收盘价高于昨天的收盘价，那么OBV＝昨天的OBV＋今天的成交量
     如果今天的收盘价低于昨天的收盘价，那么OBV＝昨天的OBV－今天的成交量
     如果今天的收盘价等于昨天的收盘价，那么OBV＝昨天的OBV
+    MAOBV=OBV的M日简单移动平均
 
     :param mkt_data DataFrame 个股历史行情数据，日维度，需要包含收盘价['close']、成交量['volume']
-    :param M int MAHSL参数M
+    :param M int MAOBV参数M
 
-    :return mkt_data DataFrame 新增1列，OBV 的值
+    :return mkt_data DataFrame 新增2列，OBV和MAOBV 的值
     """
 
-    def obv(close, volume):
-        obv=pd.Series(index=close.index)
-        obv[0] = volume[0]
-        for i in range(1,len(close)):
-            if close[i] > close[i-1]:
-                obv[i] = obv[i-1] + volume[i]
-            elif close[i] < close[i-1]:
-                obv[i] = obv[i-1] - volume[i]
-            else:
-                obv[i] = obv[i - 1]
-        return obv
-
-    mkt_data['OBV'] = obv(mkt_data['close'], mkt_data['volume'])
+    mkt_data['OBV'], mkt_data['MAOBV'] = volume.calc_OBV(mkt_data['close'], mkt_data['volume'], M)
 
     return mkt_data
 
@@ -67,36 +62,11 @@ def visualize_performance(mkt_data):
 
     :return plot html 可交互式图
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='Factor',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-
-    # 绘制指标
-    indi.line(dt, mkt_data['OBV'], line_width=1, color='green')
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  [indi]
-                  ])
+    p = plot_indicator(mkt_data, [('OBV', 'green'), ('MAOBV', 'yellow')])
     show(p)
 
 #运行部分
-data = pd.read_csv('data/000001.csv')
+data = load_market_data('000001')
 data = calc_OBV(data)
 visualize_performance(data)
 
@@ -14,12 +14,17 @@
 #加载库
 import numpy as np
 import pandas as pd
-import datetime
 
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib.store import load_market_data
+from factorlib.chart import plot_indicator
+
 #计算VOL 和 MAVOL 的值
 def calc_VOL(mkt_data, M=5):
     """
@@ -45,37 +50,11 @@ def visualize_performance(mkt_data):
 
     :return plot html 可交互式图
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='Factor',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-
-    # 绘制指标
-    indi.line(dt, mkt_data['VOL'], line_width=1, color='green')
-    indi.line(dt, mkt_data['MAVOL'], line_width=1, color='yellow')
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  [indi]
-                  ])
+    p = plot_indicator(mkt_data, [('VOL', 'green'), ('MAVOL', 'yellow')])
     show(p)
 
 #运行部分
-data = pd.read_csv('data/000001.csv')
+data = load_market_data('000001')
 data = calc_VOL(data)
 visualize_performance(data)
 
@@ -20,12 +20,18 @@ VRSI(N)=SMA(MAX(VOL-REF(VOL,1),0),N,1)/SMA(ABS(VOL-REF(VOL,1)),N,1)*100
 #加载库
 import numpy as np
 import pandas as pd
-import datetime
 
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib import volume
+from factorlib.store import load_market_data
+from factorlib.chart import plot_indicator
+
 #计算VRSI1，VRSI2和VRSI3 的值
 def calc_VRSI(mkt_data, N1=6, N2=12, N3=24):
     """
@@ -39,19 +45,10 @@ def calc_VRSI(mkt_data, N1=6, N2=12, N3=24):
 
     :return mkt_data DataFrame 新增3列，VRSI1，VRSI2和VRSI3 的值
     """
-    def VRSI(volume,N):
-        def quzheng(x):
-            z = x if x > 0 else 0
-            return z
-
-        vol_chg = volume - volume.shift(1)
-        vrsi = 100 * vol_chg.apply(quzheng).rolling(N).mean()/vol_chg.apply(abs).rolling(N).mean()
-
-        return vrsi
-
-    mkt_data['VRSI1'] = VRSI(mkt_data['volume'],N1)
-    mkt_data['VRSI2'] = VRSI(mkt_data['volume'],N2)
-    mkt_data['VRSI3'] = VRSI(mkt_data['volume'],N3)
+    VRSI = volume.calc_VRSI_multi(mkt_data['volume'], (N1, N2, N3))
+    mkt_data['VRSI1'] = VRSI[N1]
+    mkt_data['VRSI2'] = VRSI[N2]
+    mkt_data['VRSI3'] = VRSI[N3]
 
     return mkt_data
 
@@ -64,38 +61,11 @@ def visualize_performance(mkt_data):
 
     :return plot html 可交互式图
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='Factor',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-
-    # 绘制指标
-    indi.line(dt, mkt_data['VRSI1'], line_width=1, color='green')
-    indi.line(dt, mkt_data['VRSI2'], line_width=1, color='yellow')
-    indi.line(dt, mkt_data['VRSI3'], line_width=1, color='purple')
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  [indi]
-                  ])
+    p = plot_indicator(mkt_data, [('VRSI1', 'green'), ('VRSI2', 'yellow'), ('VRSI3', 'purple')])
     show(p)
 
 #运行部分
-data = pd.read_csv('data/000001.csv')
+data = load_market_data('000001')
 data = calc_VRSI(data)
 visualize_performance(data)
 
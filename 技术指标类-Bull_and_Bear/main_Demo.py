@@ -17,6 +17,12 @@ plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
 plt.rcParams['axes.spines.top'] = False
 plt.rcParams['axes.spines.right'] = False
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib.position import calc_hysteresis_position
+from factorlib.store import load_market_data
+
 # 构造牛熊指标，牛熊指标 = 250日波动率/250日换手率
 def calc_fac(df):
     """
@@ -47,19 +53,10 @@ def calc_netv(df):
     df1['kernel_60'] = pd.Series.rolling(df1.kernel,window = 60,min_periods = 1).mean()
     df1['position'] = 0
     df1['flag'] = 0
-    position1 = 0
-
-    for i in range(df.shape[0]-1):
-        if df1.loc[i,'kernel_20'] < df1.loc[i,'kernel_60'] and position1 == 0:
-            df1.loc[i,'flag'] = 1
-            df1.loc[i+1,'position'] = 1
-            position1 = 1
-        elif df1.loc[i,'kernel_20'] > df1.loc[i,'kernel_60'] and position1 == 1:
-            df1.loc[i,'flag'] = -1
-            df1.loc[i+1,'position'] = 0
-            position1 = 0
-        else:
-            df1.loc[i+1,'position'] = df1.loc[i,'position']
+
+    #短均线下穿长均线开仓，上穿平仓
+    df1['flag'], df1['position'] = calc_hysteresis_position(df1['kernel_20'] < df1['kernel_60'],
+                                                            df1['kernel_20'] > df1['kernel_60'])
     df1['net_value'] = (1+(df1['pct_chg']/100)*df1.position).cumprod()
     return df1
 
@@ -78,18 +75,9 @@ def clac_itself(df):
     df_itself['ma_60'] = pd.Series.rolling(df_itself['close'],window = 60,min_periods = 1).mean()
     df_itself['position'] = 0
     df_itself['flag'] = 0
-    position2 = 0
-    for i in range(df_itself.shape[0]-1):
-        if df_itself.loc[i,'ma_20'] >  df_itself.loc[i,'ma_60'] and position2 == 0:
-            df_itself.loc[i,'flag'] = 1
-            df_itself.loc[i+1,'position'] = 1
-            position2 = 1
-        elif df_itself.loc[i,'ma_20'] <  df_itself.loc[i,'ma_60'] and position2 == 1:
-            df_itself.loc[i+1,'position'] = 0
-            df_itself.loc[i,'flag'] = -1
-            position2 = 0
-        else:
-            df_itself.loc[i+1,'position'] = df_itself.loc[i,'position']
+    #短均线上穿长均线开仓，下穿平仓
+    df_itself['flag'], df_itself['position'] = calc_hysteresis_position(df_itself['ma_20'] > df_itself['ma_60'],
+                                                                        df_itself['ma_20'] < df_itself['ma_60'])
     df_itself['net_value'] = (1+(df_itself['pct_chg']/100)*df_itself.position).cumprod()
     return df_itself
 
@@ -111,19 +99,10 @@ def bollinger_netv(df):
 
     df1['position'] = 0
     df1['flag'] = 0
-    position = 0
-
-    for i in range(df1.shape[0]-1):
-        if df1.loc[i,'kernel'] < df1.loc[i,'bullin_down'] and position == 0:
-            df1.loc[i,'flag'] = 1
-            df1.loc[i+1,'position'] = 1
-            position = 1
-        elif df1.loc[i,'kernel'] > df1.loc[i,'bullin_up'] and position == 1:
-            df1.loc[i+1,'position'] = 0
-            df1.loc[i,'flag'] = -1
-            position = 0
-        else:
-            df1.loc[i+1,'position'] = df1.loc[i,'position']
+
+    #跌破下轨开仓，突破上轨平仓
+    df1['flag'], df1['position'] = calc_hysteresis_position(df1['kernel'] < df1['bullin_down'],
+                                                            df1['kernel'] > df1['bullin_up'])
     df1['net_value'] = (1+(df1['pct_chg']/100)*df1.position).cumprod()
 
     return df1
@@ -145,19 +124,10 @@ def bollinger_itself(df):
 
     df1['position'] = 0
     df1['flag'] = 0
-    position = 0
-
-    for i in range(df1.shape[0]-1):
-        if df1.loc[i,'close'] > df1.loc[i,'bullin_up'] and position == 0:
-            df1.loc[i,'flag'] = 1
-            df1.loc[i+1,'position'] = 1
-            position = 1
-        elif df1.loc[i,'close'] < df1.loc[i,'bullin_down'] and position == 1:
-            df1.loc[i+1,'position'] = 0
-            df1.loc[i,'flag'] = -1
-            position = 0
-        else:
-            df1.loc[i+1,'position'] = df1.loc[i,'position']
+
+    #突破上轨开仓，跌破下轨平仓
+    df1['flag'], df1['position'] = calc_hysteresis_position(df1['close'] > df1['bullin_up'],
+                                                            df1['close'] < df1['bullin_down'])
     df1['net_value'] = (1+(df1['pct_chg']/100)*df1.position).cumprod()
     return df1
 
@@ -284,7 +254,8 @@ def plot_net(df_signal,df_itself):
     plt.show()
 
 #导入数据
-df = pd.read_csv('data/000001.csv', parse_dates=['date'], index_col=['date'], encoding='utf-8')
+df = load_market_data('000001')
+df = df.set_index(pd.to_datetime(df['date'])).drop(columns='date')
 #计算牛熊指标
 df = calc_fac(df)
 
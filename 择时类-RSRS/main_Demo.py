@@ -5,16 +5,22 @@
 #本文件：主要对基于阻力支撑相对强度（择时类-RSRS）择时进行回测，需要数据包含，最低价'low'，最高价'high'，收盘价'close'
 #测试时间：20220308
 
-import datetime
 import math
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
-import statsmodels.api as sm
 import warnings
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib.regression import calc_rolling_ols, calc_rolling_corr
+from factorlib.position import calc_hysteresis_position
+from factorlib.store import load_market_data
+from factorlib.chart import make_source, plot_backtest
 warnings.filterwarnings("ignore")
 plt.rcParams['font.sans-serif'] = ['SimHei']
 plt.rcParams['axes.unicode_minus'] = False
@@ -137,43 +143,16 @@ def cal_nbeta(df, n):
 
     :return df1 DataFrame 新增策略净值'net_asset_value'
     """
-    nbeta = []
-    trade_days = len(df.index)
-
     df['position'] = 0
     df['flag'] = 0
-    position = 0
-
-    # 计算斜率值
-    for i in range(trade_days):
-        if i < (n - 1):
-            # n-1为配合接下来用iloc索引
-            continue
-        else:
-            x = df['low'].iloc[i - n + 1:i + 1]
-            # iloc左闭右开
-            x = sm.add_constant(x) #增加常量变量
-            y = df['high'].iloc[i - n + 1:i + 1]
-            regr = sm.OLS(y, x)
-            res = regr.fit()
-            beta = round(res.params[1], 2)  # 斜率指标
-            nbeta.append(beta)
+
+    # 计算斜率值，前n-1天没有完整窗口
+    nbeta = calc_rolling_ols(df['low'], df['high'], n)['beta'][n - 1:]  # 斜率指标
     df1 = df.iloc[n - 1:]
     df1['beta'] = nbeta
 
-    # 执行交易策略
-    for i in range(len(df1.index) - 1):
-        # 此处-1是为了避免最后一行
-        if df1['beta'].iloc[i] > 1 and position == 0:
-            df1['flag'].iloc[i] = 1  # 开仓标志
-            df1['position'].iloc[i + 1] = 1  # 仓位不为空
-            position = 1
-        elif df1['beta'].iloc[i] < 0.8 and position == 1:
-            df1['flag'].iloc[i] = -1  # 平仓标志
-            df1['position'].iloc[i + 1] = 0  # 仓位为空
-            position = 0
-        else:
-            df1['position'].iloc[i + 1] = df1['position'].iloc[i]
+    # 执行交易策略，斜率大于1开仓，小于0.8平仓
+    df1['flag'], df1['position'] = calc_hysteresis_position(df1['beta'] > 1, df1['beta'] < 0.8)
     # 计算净值序列
     df1['net_asset_value'] = (1 + df1.close.pct_change(1).fillna(0) * df1.position).cumprod()
 
@@ -192,7 +171,6 @@ def cal_stdbeta(df, n, m):
     """
     df['position'] = 0
     df['flag'] = 0
-    position = 0
 
     df1 = cal_nbeta(df, n)
     pre_stdbeta = df1['beta']
@@ -207,18 +185,7 @@ def cal_stdbeta(df, n, m):
 
     df1['stdbeta'] = stdbeta
 
-    for i in range(len(df1.index) - 1):
-        # 此处-1是为了避免最后一行
-        if df1['stdbeta'].iloc[i] > 0.7 and position == 0:
-            df1['flag'].iloc[i] = 1
-            df1['position'].iloc[i + 1] = 1
-            position = 1
-        elif df1['stdbeta'].iloc[i] < -0.7 and position == 1:
-            df1['flag'].iloc[i] = -1
-            df1['position'].iloc[i + 1] = 0
-            position = 0
-        else:
-            df1['position'].iloc[i + 1] = df1['position'].iloc[i]
+    df1['flag'], df1['position'] = calc_hysteresis_position(df1['stdbeta'] > 0.7, df1['stdbeta'] < -0.7)
 
     df1['net_asset_value'] = (1 + df1.close.pct_change(1).fillna(0) * df1.position).cumprod()
     return df1
@@ -235,25 +202,9 @@ def cal_better_stdbeta(df, n):
 
     :return df1 DataFrame 新增策略净值'net_asset_value'
     """
-    nbeta = []
-    R2 = []
-    trade_days = len(df.index)
-    for i in range(trade_days):
-        if i < (n - 1):
-            # n-1为配合接下来用iloc索引
-            continue
-        else:
-
-            x = df['low'].iloc[i - n + 1:i + 1]
-            # iloc左闭右开
-            x = sm.add_constant(x)
-            y = df['high'].iloc[i - n + 1:i + 1]
-            regr = sm.OLS(y, x)
-            res = regr.fit()
-            beta = round(res.params[1], 2)
-
-            R2.append(res.rsquared)
-            nbeta.append(beta)
+    ols = calc_rolling_ols(df['low'], df['high'], n)
+    nbeta = ols['beta'][n - 1:]
+    R2 = ols['r2'][n - 1:]
 
     prebeta = np.array(nbeta)
     sigma = np.std(prebeta)
@@ -267,21 +218,10 @@ def cal_better_stdbeta(df, n):
     df1['beta'] = nbeta
     df1['flag'] = 0
     df1['position'] = 0
-    position = 0
     df1['better_stdbeta'] = better_stdbeta
 
-    for i in range(len(df1.index) - 1):
-        # 此处-1是为了避免最后一行
-        if df1['better_stdbeta'].iloc[i] > 0.7 and position == 0:
-            df1['flag'].iloc[i] = 1
-            df1['position'].iloc[i + 1] = 1
-            position = 1
-        elif df1['better_stdbeta'].iloc[i] < -0.7 and position == 1:
-            df1['flag'].iloc[i] = -1
-            df1['position'].iloc[i + 1] = 0
-            position = 0
-        else:
-            df1['position'].iloc[i + 1] = df1['position'].iloc[i]
+    df1['flag'], df1['position'] = calc_hysteresis_position(df1['better_stdbeta'] > 0.7,
+                                                            df1['better_stdbeta'] < -0.7)
     df1['net_asset_value'] = (1 + df1.close.pct_change(1).fillna(0) * df1.position).cumprod()
     return df1
 
@@ -300,23 +240,12 @@ def cal_right_stdbeta(df, n, m):
     df1['position'] = 0
     df1['flag'] = 0
     df1['net_value'] = 0
-    position = 0
 
     df1['right_stdbeta'] = df1['better_stdbeta'] * df1['beta']
     # 修正标准分与斜率值相乘能够达到使原有分布右偏的效果
 
-    for i in range(len(df1.index) - 1):
-        # 此处-1是为了避免最后一行
-        if df1['right_stdbeta'].iloc[i] > 0.7 and position == 0:
-            df1['flag'].iloc[i] = 1
-            df1['position'].iloc[i + 1] = 1
-            position = 1
-        elif df1['right_stdbeta'].iloc[i] < -0.7 and position == 1:
-            df1['flag'].iloc[i] = -1
-            df1['position'].iloc[i + 1] = 0
-            position = 0
-        else:
-            df1['position'].iloc[i + 1] = df1['position'].iloc[i]
+    df1['flag'], df1['position'] = calc_hysteresis_position(df1['right_stdbeta'] > 0.7,
+                                                            df1['right_stdbeta'] < -0.7)
     df1['net_asset_value'] = (1 + df1.close.pct_change(1).fillna(0) * df1.position).cumprod()
     return df1
 
@@ -336,20 +265,13 @@ def cal_ma_beta(df, n, m):
     df1['position'] = 0
     df1['flag'] = 0
     df1['net_asset_value'] = 0
-    position = 0
-
-    # beta是前17天没有数据（n=18） ma20是前20天没有数据
-    for i in range(5, len(df1.index) - 1):
-        if df1['stdbeta'].iloc[i] > 0.7 and df1['ma20'].iloc[i - 1] > df1['ma20'].iloc[i - 3] and position == 0:
-            df1['flag'].iloc[i] = 1
-            df1['position'].iloc[i + 1] = 1
-            position = 1
-        elif df1['stdbeta'].iloc[i] < -0.7 and df1['ma20'].iloc[i - 1] < df1['ma20'].iloc[i - 3] and position == 1:
-            df1['flag'].iloc[i] = -1
-            df1['position'].iloc[i + 1] = 0
-            position = 0
-        else:
-            df1['position'].iloc[i + 1] = df1['position'].iloc[i]
+
+    # beta是前17天没有数据（n=18） ma20是前20天没有数据，从第5天开始判断
+    ma20_1 = df1['ma20'].shift(1)
+    ma20_3 = df1['ma20'].shift(3)
+    df1['flag'], df1['position'] = calc_hysteresis_position((df1['stdbeta'] > 0.7) & (ma20_1 > ma20_3),
+                                                            (df1['stdbeta'] < -0.7) & (ma20_1 < ma20_3),
+                                                            start=5)
     df1['net_asset_value'] = (1 + df1.close.pct_change(1).fillna(0) * df1.position).cumprod()
     return df1
 
@@ -369,24 +291,12 @@ def cal_vol_beta(df, n, m):
     df1['position'] = 0
     df1['flag'] = 0
     df1['net_asset_value'] = 0
-    position = 0
-
-    for i in range(10, len(df1.index) - 1):
-
-        pre_volume = df1['volume'].iloc[i - 10:i]
-        series_beta = df1['stdbeta'].iloc[i - 10:i]
-        # 计算相关系数需要数据为series格式
-        corr = series_beta.corr(pre_volume, method='pearson')
-        if df1['stdbeta'].iloc[i] > 0.7 and corr > 0 and position == 0:
-            df1['flag'].iloc[i] = 1
-            df1['position'].iloc[i + 1] = 1
-            position = 1
-        elif df1['stdbeta'].iloc[i] < -0.7 and position == 1:
-            df1['flag'].iloc[i] = -1
-            df1['position'].iloc[i + 1] = 0
-            position = 0
-        else:
-            df1['position'].iloc[i + 1] = df1['position'].iloc[i]
+
+    # 第i天使用前10天(不含当天)标准分与成交量的相关系数，从第10天开始判断
+    corr = pd.Series(calc_rolling_corr(df1['stdbeta'], df1['volume'], 10), index=df1.index).shift(1)
+    df1['flag'], df1['position'] = calc_hysteresis_position((df1['stdbeta'] > 0.7) & (corr > 0),
+                                                            df1['stdbeta'] < -0.7,
+                                                            start=10)
 
     df1['net_asset_value'] = (1 + df1.close.pct_change(1).fillna(0) * df1.position).cumprod()
     return df1
@@ -401,61 +311,7 @@ def visualize_performance(mkt_data):
 
     :return plt html
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-    f2 = figure(height=200, sizing_mode='stretch_width',
-                title='Position',
-                x_axis_label="trade_datetime", y_axis_label="position",
-                x_axis_type='datetime',
-                x_range=f1.x_range)
-    f3 = figure(height=200, sizing_mode='stretch_width',
-                title='Return',
-                x_axis_type='datetime',
-                x_range=f1.x_range)
-    f4 = figure(height=200, sizing_mode='stretch_width',
-                title='Drawdown',
-                x_axis_type='datetime',
-                x_range=f1.x_range)
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='KDJ',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    cumu_hold_close = (mkt_data['hold_cumu_r'] + 1)
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-    f1.line(dt, cumu_hold_close, line_width=1, color='red')
-
-    # 绘制指标
-
-    # 绘制仓位
-    position = mkt_data['position']
-    f2.step(dt, position)
-
-    # 绘制收益
-    hold_r = mkt_data['hold_r']
-    f3.vbar(x=dt, top=hold_r)
-
-    # 绘制回撤
-    drawdown = mkt_data['drawdown']
-    f4.line(dt, -drawdown, line_width=1)
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  # [indi],
-                  [f2],
-                  [f3],
-                  [f4]
-                  ])
+    p = plot_backtest(mkt_data, [])
     show(p)
 
 def visualize_performance_2(mkt_data,mkt_data_std):
@@ -467,9 +323,10 @@ def visualize_performance_2(mkt_data,mkt_data_std):
 
     :return plt html
     """
-    mkt_data_std['trade_datetime'] = mkt_data_std['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
+    # 两个策略结果来自同一份行情，逐行对齐
+    source = make_source(mkt_data['date'], {'close_nav': mkt_data['close'] / mkt_data['close'].iloc[0],
+                                            'hold_nav': mkt_data['net_asset_value'] + 1,
+                                            'hold_nav_std': mkt_data_std['net_asset_value'].to_numpy() + 1})
 
     f1 = figure(height=300, width=700,
                 #legend_location = "top_left",
@@ -479,19 +336,16 @@ def visualize_performance_2(mkt_data,mkt_data_std):
                 x_axis_label="trade_datetime", y_axis_label="close")
 
     # 绘制行情
-    close = mkt_data['close']
-    cumu_hold_close = (mkt_data['net_asset_value'] + 1)
-    cumu_hold_close_std = (mkt_data_std['net_asset_value'] + 1)
-    f1.line(dt, close / close.tolist()[0], line_width=1,legend='沪深300指数净值')
-    f1.line(dt, cumu_hold_close, line_width=1, color='red',legend='斜率策略净值')
-    f1.line(dt, cumu_hold_close_std, line_width=1, color='purple',legend='标准分策略净值')
+    f1.line('trade_datetime', 'close_nav', line_width=1, legend_label='沪深300指数净值', source=source)
+    f1.line('trade_datetime', 'hold_nav', line_width=1, color='red', legend_label='斜率策略净值', source=source)
+    f1.line('trade_datetime', 'hold_nav_std', line_width=1, color='purple', legend_label='标准分策略净值', source=source)
 
     p = gridplot([[f1]])
     show(p)
 
 
 #导入数据
-df = pd.read_csv('data/000300.csv', encoding='utf-8')
+df = load_market_data('000300')
 mkt_data = cal_nbeta(df,18) #斜率策略
 mkt_data_std = cal_stdbeta(df,18, 60) #标准分策略
 
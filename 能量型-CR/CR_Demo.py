@@ -24,12 +24,20 @@ MA4 = MA(CR,M4);
 #加载库
 import numpy as np
 import pandas as pd
-import datetime
 
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib.rolling import calc_positive_ratio
+from factorlib.performance import calc_hold_stats
+from factorlib.signals import prev, select_signal, calc_signal_position
+from factorlib.store import load_market_data
+from factorlib.chart import plot_backtest
+
 #计算CR和MA1，MA2，MA3，MA4 的值
 def calc_CR(mkt_data, N=26, M1=10, M2=20, M3=40, M4=62):
     """
@@ -47,12 +55,9 @@ def calc_CR(mkt_data, N=26, M1=10, M2=20, M3=40, M4=62):
     :return mkt_data DataFrame 新增6列，中间价格['mid']，CR和MA1，MA2，MA3，MA4 的值
     """
 
-    def quzheng(x):
-        z = x if x > 0 else 0
-        return z
-
     mkt_data['mid'] = (mkt_data['high'] + mkt_data['low']) / 2
-    mkt_data['CR'] = 100 * (mkt_data['high'] - mkt_data['mid'].shift(1)).apply(quzheng).rolling(N).sum() / (mkt_data['mid'].shift(1) - mkt_data['low']).apply(quzheng).rolling(N).sum()
+    pre_mid = mkt_data['mid'].shift(1)
+    mkt_data['CR'] = 100 * calc_positive_ratio(mkt_data['high'] - pre_mid, pre_mid - mkt_data['low'], N)
 
     mkt_data['MA1'] = mkt_data['CR'].rolling(M1).mean()
     mkt_data['MA2'] = mkt_data['CR'].rolling(M2).mean()
@@ -81,21 +86,10 @@ def calc_signal(mkt_data):
     MAmin = mkt_data[['MA1','MA2','MA3','MA4']].min(axis=1)
 
     """ 计算信号 """
-    signals = [None]
-    for i in range(1,len(mkt_data)):
-        signal = None
-        if CR.loc[i] < 40:
-            signal = 1
-        elif (CR.loc[i] > 400) & (CR.loc[i] < CR.loc[i-1]):
-            signal = -1
-        elif (CR.loc[i] < MAmin.loc[i]) & (CR.loc[i-1] > MAmax.loc[i-1]):
-            signal = -1
-        elif (CR.loc[i] > MAmax.loc[i]) & (CR.loc[i-1] < MAmin.loc[i-1]):
-            signal = 1
-        signals.append(signal)
+    signal = select_signal([CR < 40, (CR > 400) & (CR < prev(CR)), (CR < MAmin) & (prev(CR) > prev(MAmax)), (CR > MAmax) & (prev(CR) < prev(MAmin))], [1, -1, -1, 1])
 
     """ 信号赋值 """
-    mkt_data['signal'] = signals
+    mkt_data['signal'] = signal
     return mkt_data
 
 #计算持仓
@@ -107,8 +101,8 @@ def calc_position(mkt_data):
 
     :return mkt_data DataFrame 新增1列['position']
     """
-    #mkt_data['position'] = mkt_data['signal'].fillna(method='ffill').shift(1).fillna(0)
-    mkt_data['position'] = mkt_data['signal'].fillna(method='ffill').shift(1).fillna(1)
+    #mkt_data['position'] = calc_signal_position(mkt_data['signal'], 0)
+    mkt_data['position'] = calc_signal_position(mkt_data['signal'], 1)
 
     return mkt_data
 
@@ -163,43 +157,8 @@ def statistic_performance(mkt_data, r0=0.03, data_period=1440):
     """
     v_hold_cumu_r = hold_cumu_r.tolist()[-1]
 
-    v_pos_hold_times = 0
-    v_pos_hold_win_times = 0
-    v_pos_hold_period = 0
-    v_pos_hold_win_period = 0
-    v_neg_hold_times = 0
-    v_neg_hold_win_times = 0
-    v_neg_hold_period = 0
-    v_neg_hold_win_period = 0
-    for w, r, pre_pos, pos in zip(hold_win, hold_r, position.shift(1), position):
-        # 有换仓（先结算上一次持仓，再初始化本次持仓）
-        if pre_pos != pos:
-            # 判断pre_pos非空：若为空则是循环的第一次，此时无需结算，直接初始化持仓即可
-            if pre_pos == pre_pos:
-                # 结算上一次持仓
-                if pre_pos > 0:
-                    v_pos_hold_times += 1
-                    v_pos_hold_period += tmp_hold_period
-                    v_pos_hold_win_period += tmp_hold_win_period
-                    if tmp_hold_r > 0:
-                        v_pos_hold_win_times += 1
-                elif pre_pos < 0:
-                    v_neg_hold_times += 1
-                    v_neg_hold_period += tmp_hold_period
-                    v_neg_hold_win_period += tmp_hold_win_period
-                    if tmp_hold_r > 0:
-                        v_neg_hold_win_times += 1
-            # 初始化本次持仓
-            tmp_hold_r = r
-            tmp_hold_period = 0
-            tmp_hold_win_period = 0
-        else:  # 未换仓
-            if abs(pos) > 0:
-                tmp_hold_period += 1
-                if r > 0:
-                    tmp_hold_win_period += 1
-                if abs(r) > 0:
-                    tmp_hold_r = (1 + tmp_hold_r) * (1 + r) - 1
+    (v_pos_hold_times, v_pos_hold_win_times, v_pos_hold_period, v_pos_hold_win_period,
+     v_neg_hold_times, v_neg_hold_win_times, v_neg_hold_period, v_neg_hold_win_period) = calc_hold_stats(hold_r, position)
 
     v_hold_period = (abs(position) > 0).sum()
     v_hold_win_period = (hold_r > 0).sum()
@@ -241,73 +200,16 @@ def visualize_performance(mkt_data):
 
     :return plot html 可交互式图
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-    f2 = figure(height=200, sizing_mode='stretch_width',
-                title='Position',
-                x_axis_label="trade_datetime", y_axis_label="position",
-                x_axis_type='datetime',
-                x_range=f1.x_range)
-    f3 = figure(height=200, sizing_mode='stretch_width',
-                title='Return',
-                x_axis_type='datetime',
-                x_range=f1.x_range)
-    f4 = figure(height=200, sizing_mode='stretch_width',
-                title='Drawdown',
-                x_axis_type='datetime',
-                x_range=f1.x_range)
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='Factor',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    cumu_hold_close = (mkt_data['hold_cumu_r'] + 1)
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-    f1.line(dt, cumu_hold_close, line_width=1, color='red')
-
-    # 绘制指标
-    CR = mkt_data['CR']
-    MA1 = mkt_data['MA1']
-    indi.line(dt, CR, line_width=1, color='yellow')
-    indi.line(dt, MA1, line_width=1, color='blue')
-
-    # 绘制仓位
-    position = mkt_data['position']
-    f2.step(dt, position)
-
-    # 绘制收益
-    hold_r = mkt_data['hold_r']
-    f3.vbar(x=dt, top=hold_r)
-
-    # 绘制回撤
-    drawdown = mkt_data['drawdown']
-    f4.line(dt, -drawdown, line_width=1)
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  [indi],
-                  [f2],
-                  [f3],
-                  [f4]
-                  ])
+    p = plot_backtest(mkt_data, [('CR', 'yellow'), ('MA1', 'blue')])
     show(p)
 
 #运行部分
-data = pd.read_csv('data/000300.csv')
-data = calc_CR(data)
-data = calc_signal(data)
-data = calc_position(data)
-result_daily, performance_df = statistic_performance(data)
-visualize_performance(result_daily)
-print(performance_df)
+if __name__ == '__main__':
+    data = load_market_data('000300')
+    data = calc_CR(data)
+    data = calc_signal(data)
+    data = calc_position(data)
+    result_daily, performance_df = statistic_performance(data)
+    visualize_performance(result_daily)
+    print(performance_df)
 
@@ -17,28 +17,17 @@ CYR市场强弱=(DIVE÷昨日DIVE-1)X100
 #加载库
 import numpy as np
 import pandas as pd
-import datetime
 
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
 
-#加权平均WMA(X, n)
-def calc_WMA(X, n):
-    """
-    计算WMA(X, n)
-    WMA(X,n)_t = (n * X_t + (n-1) * X_{t-1} +...+ 2 * X_{t-n+2} + X_{t-n+1}) / (n + (n-1) +...+ 2 + 1)
-
-    :param X Series WMA(X, n)的X
-    :param n int WMA(X, n)参数N
-
-    :return Y Series WMA(X, n)的值
-    """
-    weights = np.array(range(1, n+1))
-    sum_weights = np.sum(weights)
-
-    res = X.rolling(window=n).apply(lambda x: np.sum(weights*x) / sum_weights, raw=False)
-    return res
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib.rolling import calc_WMA
+from factorlib.store import load_market_data
+from factorlib.chart import plot_indicator
 
 #计算CYR 和 MACYR 的值
 def calc_CYR(mkt_data, n=13, m=5):
@@ -57,7 +46,9 @@ def calc_CYR(mkt_data, n=13, m=5):
     high = mkt_data['high']
     low = mkt_data['low']
     """计算指标"""
-    DIVE = 0.01 * calc_WMA(mkt_data['amount'], n) + calc_WMA(mkt_data['volume'], n)
+    # 成交额与成交量按列合并，一次计算两者的WMA
+    WMA = calc_WMA(mkt_data[['amount', 'volume']], n)
+    DIVE = pd.Series(0.01 * WMA[:, 0] + WMA[:, 1], index=mkt_data.index)
     CYR = (DIVE / DIVE.shift(1) - 1) * 100
     MACYR = CYR.rolling(m).mean()
     """指标赋值"""
@@ -75,39 +66,11 @@ def visualize_performance(mkt_data):
 
     :return plot html 可交互式图
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='Factor',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-
-    # 绘制指标
-    CYR = mkt_data['CYR']
-    MACYR = mkt_data['MACYR']
-    indi.line(dt, CYR, line_width=1, color='green')
-    indi.line(dt, MACYR, line_width=1, color='yellow')
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  [indi]
-                  ])
+    p = plot_indicator(mkt_data, [('CYR', 'green'), ('MACYR', 'yellow')])
     show(p)
 
 #运行部分
-data = pd.read_csv('data/000001.csv')
+data = load_market_data('000001')
 data = calc_CYR(data)
 visualize_performance(data)
 
@@ -20,12 +20,18 @@
 #加载库
 import numpy as np
 import pandas as pd
-import datetime
 
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib.signals import prev, select_signal, calc_signal_position
+from factorlib.store import load_market_data
+from factorlib.chart import plot_indicator
+
 #计算MASS和MAMASS 的值
 def calc_MASS(mkt_data, N1=9, N2=25, M=6):
     """
@@ -62,17 +68,10 @@ def calc_signal(mkt_data):
     MAMASS = mkt_data['MAMASS']
 
     """ 计算信号 """
-    signals = []
-    for mass, pre_mass in zip(MASS, MASS.shift(1)):
-        signal = None
-        if (mass < 26.5) & (pre_mass > 27):
-            signal = -1
-        elif (mass < 26.5) & (pre_mass < 27):
-            signal = 1
-        signals.append(signal)
+    signal = select_signal([(MASS < 26.5) & (prev(MASS) > 27), (MASS < 26.5) & (prev(MASS) < 27)], [-1, 1])
 
     """ 信号赋值 """
-    mkt_data['signal'] = signals
+    mkt_data['signal'] = signal
     return mkt_data
 
 #计算持仓
@@ -84,8 +83,8 @@ def calc_position(mkt_data):
 
     :return mkt_data DataFrame 新增1列['position']
     """
-    #mkt_data['position'] = mkt_data['signal'].fillna(method='ffill').shift(1).fillna(0)
-    mkt_data['position'] = mkt_data['signal'].fillna(method='ffill').shift(1).fillna(1)
+    #mkt_data['position'] = calc_signal_position(mkt_data['signal'], 0)
+    mkt_data['position'] = calc_signal_position(mkt_data['signal'], 1)
 
     return mkt_data
 
@@ -98,39 +97,11 @@ def visualize_performance(mkt_data):
 
     :return plot html 可交互式图
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='Factor',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-
-    # 绘制指标
-    MASS = mkt_data['MASS']
-    MAMASS = mkt_data['MAMASS']
-    indi.line(dt, MASS, line_width=1, color='green')
-    indi.line(dt, MAMASS, line_width=1, color='yellow')
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  [indi]
-                  ])
+    p = plot_indicator(mkt_data, [('MASS', 'green'), ('MAMASS', 'yellow')])
     show(p)
 
 #运行部分
-data = pd.read_csv('data/000001.csv')
+data = load_market_data('000001')
 data = calc_MASS(data)
 data = calc_signal(data)
 visualize_performance(data)
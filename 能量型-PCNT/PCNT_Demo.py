@@ -19,28 +19,17 @@
 #加载库
 import numpy as np
 import pandas as pd
-import datetime
 
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
 
-#加权平均WMA(X, n)
-def calc_WMA(X, n):
-    """
-    计算WMA(X, n)
-    WMA(X,n)_t = (n * X_t + (n-1) * X_{t-1} +...+ 2 * X_{t-n+2} + X_{t-n+1}) / (n + (n-1) +...+ 2 + 1)
-
-    :param X Series WMA(X, n)的X
-    :param n int WMA(X, n)参数N
-
-    :return Y Series WMA(X, n)的值
-    """
-    weights = np.array(range(1, n+1))
-    sum_weights = np.sum(weights)
-
-    res = X.rolling(window=n).apply(lambda x: np.sum(weights*x) / sum_weights, raw=False)
-    return res
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib.rolling import calc_WMA
+from factorlib.store import load_market_data
+from factorlib.chart import plot_indicator
 
 #计算PCNT 和 MAPCNT 的值
 def calc_PCNT(mkt_data, M=5):
@@ -69,39 +58,11 @@ def visualize_performance(mkt_data):
 
     :return plot html 可交互式图
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='Factor',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-
-    # 绘制指标
-    PCNT = mkt_data['PCNT']
-    MAPCNT = mkt_data['MAPCNT']
-    indi.line(dt, PCNT, line_width=1, color='green')
-    indi.line(dt, MAPCNT, line_width=1, color='yellow')
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  [indi]
-                  ])
+    p = plot_indicator(mkt_data, [('PCNT', 'green'), ('MAPCNT', 'yellow')])
     show(p)
 
 #运行部分
-data = pd.read_csv('data/000001.csv')
+data = load_market_data('000001')
 data = calc_PCNT(data)
 visualize_performance(data)
 
@@ -19,12 +19,18 @@ PSYMA:MA(PSY,M);
 #加载库
 import numpy as np
 import pandas as pd
-import datetime
 
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib.energy import calc_PSY_multi
+from factorlib.store import load_market_data
+from factorlib.chart import plot_indicator
+
 #计算PSY和PSYMA的值
 def calc_PSY(mkt_data, N=12, M=6):
     """
@@ -33,23 +39,15 @@ def calc_PSY(mkt_data, N=12, M=6):
     PSYMA:MA(PSY,M);
 
     :param mkt_data DataFrame 股票历史行情数据，日维度，需要包含收盘价['close']
+    :param N int PSY参数N
     :param M int MAPSY参数M
 
     :return mkt_data DataFrame 新增2列，PSY和PSYMA的值
     """
-    def calc_days(X,N):
-        Z = [0] * N
-        for i in range(N,len(X)):
-            XX = X.loc[i-N:i]
-            z=0
-            for x, px in zip(XX, XX.shift(1)):
-                if x > px:
-                    z += 1
-            Z.append(z/N * 100)
-        return Z
+    result = calc_PSY_multi(mkt_data['close'], [N], M)[N]
 
-    mkt_data['PSY'] = calc_days(mkt_data['close'],N)
-    mkt_data['PSYMA'] = mkt_data['PSY'].rolling(M).mean()
+    mkt_data['PSY'] = result['PSY']
+    mkt_data['PSYMA'] = result['PSYMA']
 
     return mkt_data
 
@@ -62,39 +60,11 @@ def visualize_performance(mkt_data):
 
     :return plot html 可交互式图
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='Factor',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-
-    # 绘制指标
-    PSY = mkt_data['PSY']
-    PSYMA = mkt_data['PSYMA']
-    indi.line(dt, PSY, line_width=1, color='green')
-    indi.line(dt, PSYMA, line_width=1, color='yellow')
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  [indi]
-                  ])
+    p = plot_indicator(mkt_data, [('PSY', 'green'), ('PSYMA', 'yellow')])
     show(p)
 
 #运行部分
-data = pd.read_csv('data/000001.csv')
+data = load_market_data('000001')
 data = calc_PSY(data)
 visualize_performance(data)
 
@@ -23,30 +23,18 @@
 #加载库
 import numpy as np
 import pandas as pd
-import datetime
 
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
 
 
-def calc_days(X, N):
-    VR = [None] * N
-    for i in range(N, len(X)):
-        XX = X.loc[i - N:i]
-        av = 0
-        bv = 0
-        cv = 0
-        for j in range(1, len(XX)):
-            if XX['close'].iloc[j] > XX['close'].iloc[j - 1]:
-                av += XX['volume'].iloc[j]
-            elif XX['close'].iloc[j] < XX['close'].iloc[j - 1]:
-                bv += XX['volume'].iloc[j]
-            else:
-                cv = cv + XX['volume'].iloc[j]
-        VR.append((av + 1 / 2 * cv) / (bv + 1 / 2 * cv))
-
-    return VR
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib import energy
+from factorlib.store import load_market_data
+from factorlib.chart import plot_indicator
 
 #计算VR和MAVR 的值
 def calc_VR(mkt_data, N=26, M=6):
@@ -58,14 +46,14 @@ def calc_VR(mkt_data, N=26, M=6):
     4.VR=(AVS+1/2CVS)/(BVS+1/2CVS)
     5.MAVR=VR的M日简单移动平均
 
-    :param mkt_data DataFrame 股票历史行情数据，日维度，需要包含收盘价['close']
+    :param mkt_data DataFrame 股票历史行情数据，日维度，需要包含收盘价['close']、成交量['volume']
+    :param N int VR参数N
     :param M int MAPSY参数M
 
     :return mkt_data DataFrame 新增2列，VR和MAVR 的值
     """
 
-    mkt_data['VR'] = calc_days(mkt_data[['close','volume']],N)
-    mkt_data['MAVR'] = mkt_data['VR'].rolling(M).mean()
+    mkt_data['VR'], mkt_data['MAVR'] = energy.calc_VR(mkt_data['close'], mkt_data['volume'], N, M)
 
     return mkt_data
 
@@ -78,39 +66,11 @@ def visualize_performance(mkt_data):
 
     :return plot html 可交互式图
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='Factor',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-
-    # 绘制指标
-    VR = mkt_data['VR']
-    MAVR = mkt_data['MAVR']
-    indi.line(dt, VR, line_width=1, color='green')
-    indi.line(dt, MAVR, line_width=1, color='yellow')
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  [indi]
-                  ])
+    p = plot_indicator(mkt_data, [('VR', 'green'), ('MAVR', 'yellow')])
     show(p)
 
 #运行部分
-data = pd.read_csv('data/000300.csv')
+data = load_market_data('000300')
 data = calc_VR(data)
 visualize_performance(data)
 
@@ -17,30 +17,17 @@ JLHB = IF(CROSS(B,VAR2) AND B<40,50,0)
 #加载库
 import numpy as np
 import pandas as pd
-import datetime
 
 from bokeh.plotting import figure, show, output_notebook
 from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models import Span
 
-#Y=SMA(X,N,M) 则 Y=(M*X+(N-M)*Y')/N，其中Y'表示上一周期Y值，N必须大于M。
-def calc_SMA(X, N, M):
-    """
-    计算SMA(X,N,M)
-    Y=SMA(X,N,M) 则 Y=(M*X+(N-M)*Y')/N，其中Y'表示上一周期Y值，N必须大于M。
-
-    :param X Series SMA(X,N,M)的X
-    :param N int SMA(X,N,M)参数N
-    :param M int SMA(X,N,M)参数M
-
-    :return Y list EMA(X，N)的值
-    """
-    Y = []
-    Y.append(X[0])
-    for i in range(1, len(X)):
-        Y.append((M * X[i] + (N - M) * Y[i-1]) / N)
-
-    return Y
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from factorlib.recursive import calc_SMA
+from factorlib.store import load_market_data
+from factorlib.chart import plot_indicator
 
 #计算B, VAR2和绝路航标的值。
 def calc_JLHB(mkt_data, n=7, m=5):
@@ -84,41 +71,11 @@ def visualize_performance(mkt_data):
 
     :return plot html 可交互式图
     """
-    mkt_data['trade_datetime'] = mkt_data['date'].apply(lambda x: datetime.datetime.strptime(str(x), '%Y-%m-%d'))
-    dt = mkt_data['trade_datetime']
-
-    f1 = figure(height=300, width=700,
-                sizing_mode='stretch_width',
-                title='Target Trend',
-                x_axis_type='datetime',
-                x_axis_label="trade_datetime", y_axis_label="close")
-
-    indi = figure(height=200, sizing_mode='stretch_width',
-                  title='Factor',
-                  x_axis_type='datetime',
-                  x_range=f1.x_range
-                  )
-
-    # 绘制行情
-    close = mkt_data['close']
-    f1.line(dt, close / close.tolist()[0], line_width=1)
-
-    # 绘制指标
-    B = mkt_data['B']
-    VAR2 = mkt_data['VAR2']
-    JLHB = mkt_data['JLHB']
-    indi.line(dt, B, line_width=1, color='green')
-    indi.line(dt, VAR2, line_width=1, color='yellow')
-    indi.line(dt, JLHB, line_width=1, color='blue')
-
-    # p = column(f1,f2,f3,f4)
-    p = gridplot([[f1],
-                  [indi]
-                  ])
+    p = plot_indicator(mkt_data, [('B', 'green'), ('VAR2', 'yellow'), ('JLHB', 'blue')])
     show(p)
 
 #运行部分
-data = pd.read_csv('data/000016.csv')
+data = load_market_data('000016')
 data = calc_JLHB(data)
 visualize_performance(data)
 